@@ -71,3 +71,24 @@ class ModifiedHeadersTestCase(django.test.TestCase):
             limit_rate=None,
         )
         self.assertEqual(response["X-Test"], "header")
+
+
+class CachedTestCase(django.test.TestCase):
+    def test_response(self):
+        """'nginx:cached' returns X-Accel response with cache headers."""
+        setup_file()
+        url = reverse("nginx:cached")
+        response = self.client.get(url)
+        assert_x_accel_redirect(
+            self,
+            response,
+            content_type="text/plain; charset=utf-8",
+            charset="utf-8",
+            basename="hello-world.txt",
+            redirect_url="/nginx-cached/hello-world.txt",
+            expires=None,
+            with_buffering=None,
+            limit_rate=None,
+        )
+        self.assertEqual(response["Cache-Control"], "public, max-age=3600")
+        self.assertTrue(response.has_header("Expires"))
@@ -21,4 +21,9 @@ urlpatterns = [
         views.modified_headers,
         name="modified_headers",
     ),
+    path(
+        "cached/",
+        views.cached,
+        name="cached",
+    ),
 ]
@@ -3,7 +3,7 @@ import os
 from django.conf import settings
 from django.core.files.storage import FileSystemStorage
 
-from django_downloadview import StorageDownloadView
+from django_downloadview import CachePolicy, StorageDownloadView
 from django_downloadview.nginx import x_accel_redirect
 
 storage_dir = os.path.join(settings.MEDIA_ROOT, "nginx")
@@ -36,3 +36,14 @@ modified_headers = x_accel_redirect(
     source_url=storage.base_url,
     destination_url="/nginx-modified-headers/",
 )
+
+
+cached = x_accel_redirect(
+    StorageDownloadView.as_view(
+        storage=storage,
+        path="hello-world.txt",
+        cache_policy=CachePolicy(max_age=3600, public=True),
+    ),
+    source_url=storage.base_url,
+    destination_url="/nginx-cached/",
+)
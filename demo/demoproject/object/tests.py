@@ -4,6 +4,7 @@ from django.urls import reverse
 
 from django_downloadview import assert_download_response, temporary_media_root
 
+from asgiref.sync import sync_to_async
 from demoproject.object.models import Document
 
 # Fixtures.
@@ -85,3 +86,23 @@ class InlineFileTestCase(django.test.TestCase):
             mime_type="text/plain",
             attachment=False,
         )
+
+
+class AsyncFileTestCase(django.test.TestCase):
+    @temporary_media_root()
+    async def test_download_response(self):
+        """'async_file' streams Document.file asynchronously."""
+        await sync_to_async(setup_document)()
+        url = reverse("object:async_file", kwargs={"slug": slug})
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        content = b"".join([part async for part in response])
+        self.assertEqual(content, file_content.encode())
+
+    @temporary_media_root()
+    async def test_not_found(self):
+        """'async_file' returns 404 if there is no matching Document."""
+        url = reverse("object:async_file", kwargs={"slug": "unknown"})
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 404)
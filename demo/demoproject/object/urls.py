@@ -24,4 +24,9 @@ urlpatterns = [
         views.inline_file_view,
         name="inline_file",
     ),
+    re_path(
+        r"^async-file/(?P<slug>[a-zA-Z0-9_-]+)/$",
+        views.async_file_view,
+        name="async_file",
+    ),
 ]
@@ -1,4 +1,4 @@
-from django_downloadview import ObjectDownloadView
+from django_downloadview import AsyncObjectDownloadView, ObjectDownloadView
 
 from demoproject.object.models import Document
 
@@ -18,3 +18,6 @@ deserialized_basename_view = ObjectDownloadView.as_view(
 
 #: Serve ``file`` attribute of ``Document`` model, inline (not as attachment).
 inline_file_view = ObjectDownloadView.as_view(model=Document, attachment=False)
+
+#: Serve ``file`` attribute of ``Document`` model, asynchronously.
+async_file_view = AsyncObjectDownloadView.as_view(model=Document)
@@ -1,3 +1,7 @@
+from unittest import mock
+from wsgiref.util import FileWrapper
+
+from django.core.handlers.wsgi import WSGIHandler
 import django.test
 from django.urls import reverse
 
@@ -30,3 +34,57 @@ class DynamicPathTestCase(django.test.TestCase):
             basename="hello-world.txt",
             mime_type="text/plain",
         )
+
+
+class RangePathTestCase(django.test.TestCase):
+    def test_partial_content(self):
+        """'static_path' serves byte ranges of 'fixtures/hello-world.txt'."""
+        url = reverse("path:static_path")
+        response = self.client.get(url, HTTP_RANGE="bytes=6-10")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 6-10/13")
+        assert_download_response(self, response, content="world")
+
+    def test_multiple_ranges(self):
+        """'static_path' serves several byte ranges as multipart content."""
+        url = reverse("path:static_path")
+        response = self.client.get(url, HTTP_RANGE="bytes=0-4,6-10")
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response["Content-Type"].startswith("multipart/byteranges"))
+        content = b"".join(response.streaming_content)
+        self.assertEqual(int(response["Content-Length"]), len(content))
+        self.assertIn(b"Content-Range: bytes 0-4/13\r\n\r\nHello\r\n", content)
+        self.assertIn(b"Content-Range: bytes 6-10/13\r\n\r\nworld\r\n", content)
+
+    def test_range_not_satisfiable(self):
+        """'static_path' returns 416 for out of bounds byte ranges."""
+        url = reverse("path:static_path")
+        response = self.client.get(url, HTTP_RANGE="bytes=100-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */13")
+
+
+class HeadPathTestCase(django.test.TestCase):
+    def test_head(self):
+        """'static_path' answers HEAD requests with metadata headers."""
+        url = reverse("path:static_path")
+        response = self.client.head(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Length"], "13")
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+        self.assertEqual(response.content, b"")
+
+
+class FileWrapperPathTestCase(django.test.TestCase):
+    def test_wsgi_file_wrapper(self):
+        """'static_path' hands file to server's ``wsgi.file_wrapper``."""
+        url = reverse("path:static_path")
+        environ = django.test.RequestFactory().get(url).environ
+        environ["wsgi.file_wrapper"] = FileWrapper
+        start_response = mock.Mock()
+        result = WSGIHandler()(environ, start_response)
+        self.assertIsInstance(result, FileWrapper)
+        self.assertEqual(b"".join(result), b"Hello world!\n")
+        result.close()
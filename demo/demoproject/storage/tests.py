@@ -1,4 +1,6 @@
+import base64
 import datetime
+import hashlib
 import unittest
 
 from django.core.files.base import ContentFile
@@ -64,6 +66,25 @@ class StaticPathTestCase(django.test.TestCase):
             mime_type="text/plain",
         )
 
+    @temporary_media_root()
+    def test_etag_not_modified_download_response(self):
+        """'storage:static_path' sends not modified response if ETag matches."""
+        setup_file("1.txt")
+        url = reverse("storage:static_path", kwargs={"path": "1.txt"})
+        response = self.client.get(url)
+        etag = response["ETag"]
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertTrue(isinstance(response, HttpResponseNotModified))
+        self.assertEqual(response["ETag"], etag)
+
+    @temporary_media_root()
+    def test_etag_modified_download_response(self):
+        """'storage:static_path' streams file if ETag does not match."""
+        setup_file("1.txt")
+        url = reverse("storage:static_path", kwargs={"path": "1.txt"})
+        response = self.client.get(url, headers={"if-none-match": 'W/"outdated"'})
+        assert_download_response(self, response, content=file_content)
+
 
 class DynamicPathIntegrationTestCase(django.test.TestCase):
     """Integration tests around ``storage:dynamic_path`` URL."""
@@ -113,3 +134,46 @@ class DynamicPathUnitTestCase(unittest.TestCase):
         )
         path = view.get_path()
         self.assertEqual(path, "DUMMY PATH")
+
+
+class PrecompressedPathTestCase(django.test.TestCase):
+    def setUp(self):
+        views.StorageDownloadView.precompressed_cache.clear()
+
+    @temporary_media_root()
+    def test_precompressed_sibling(self):
+        """'storage:precompressed_path' streams precompressed sibling."""
+        setup_file("1.txt")
+        views.storage.save("1.txt.gz", ContentFile(b"fake gzip"))
+        url = reverse("storage:precompressed_path", kwargs={"path": "1.txt"})
+        response = self.client.get(url, headers={"accept-encoding": "gzip"})
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(b"".join(response.streaming_content), b"fake gzip")
+        assert_download_response(
+            self, response, basename="1.txt", mime_type="text/plain"
+        )
+
+    @temporary_media_root()
+    def test_identity(self):
+        """'storage:precompressed_path' streams file if no sibling matches."""
+        setup_file("1.txt")
+        url = reverse("storage:precompressed_path", kwargs={"path": "1.txt"})
+        response = self.client.get(url, headers={"accept-encoding": "br"})
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        assert_download_response(self, response, content=file_content)
+
+
+class DigestPathTestCase(django.test.TestCase):
+    @temporary_media_root()
+    def test_sidecar_digest(self):
+        """'storage:digest_path' sends digest read from sidecar file."""
+        setup_file("1.txt")
+        sha256 = hashlib.sha256(file_content.encode("utf-8"))
+        views.storage.save("1.txt.sha256", ContentFile(sha256.hexdigest()))
+        url = reverse("storage:digest_path", kwargs={"path": "1.txt"})
+        response = self.client.get(url)
+        digest = base64.b64encode(sha256.digest()).decode("ascii")
+        self.assertEqual(response["Repr-Digest"], f"sha-256=:{digest}:")
+        assert_download_response(self, response, content=file_content)
@@ -9,6 +9,16 @@ urlpatterns = [
         views.static_path,
         name="static_path",
     ),
+    re_path(
+        r"^precompressed-path/(?P<path>[a-zA-Z0-9_-]+\.[a-zA-Z0-9]{1,4})$",
+        views.precompressed_path,
+        name="precompressed_path",
+    ),
+    re_path(
+        r"^digest-path/(?P<path>[a-zA-Z0-9_-]+\.[a-zA-Z0-9]{1,4})$",
+        views.digest_path,
+        name="digest_path",
+    ),
     re_path(
         r"^dynamic-path/(?P<path>[a-zA-Z0-9_-]+\.[a-zA-Z0-9]{1,4})$",
         views.dynamic_path,
@@ -8,6 +8,16 @@ storage = FileSystemStorage()
 #: Serve file using ``path`` argument.
 static_path = StorageDownloadView.as_view(storage=storage)
 
+#: Serve file using ``path`` argument, or its precompressed siblings.
+precompressed_path = StorageDownloadView.as_view(
+    storage=storage, precompressed_encodings=("br", "gzip")
+)
+
+#: Serve file using ``path`` argument, with digest from "<path>.sha256" file.
+digest_path = StorageDownloadView.as_view(
+    storage=storage, digest_sidecar_suffix=".sha256"
+)
+
 
 class DynamicStorageDownloadView(StorageDownloadView):
     """Serve file of storage by path.upper()."""
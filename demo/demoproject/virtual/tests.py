@@ -1,3 +1,5 @@
+import gzip
+
 import django.test
 from django.urls import reverse
 
@@ -44,3 +46,14 @@ class GeneratedTestCase(django.test.TestCase):
             basename="hello-world.txt",
             mime_type="text/plain",
         )
+
+
+class CompressedTestCase(django.test.TestCase):
+    def test_download_response(self):
+        """'virtual:compressed' serves gzipped 'hello-world.txt'."""
+        url = reverse("virtual:compressed")
+        response = self.client.get(url, headers={"accept-encoding": "gzip"})
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        content = b"".join(response.streaming_content)
+        self.assertEqual(gzip.decompress(content), b"Hello world!\n")
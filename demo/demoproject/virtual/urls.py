@@ -7,4 +7,5 @@ urlpatterns = [
     path("text/", views.TextDownloadView.as_view(), name="text"),
     path("stringio/", views.StringIODownloadView.as_view(), name="stringio"),
     path("gerenated/", views.GeneratedDownloadView.as_view(), name="generated"),
+    path("compressed/", views.CompressedDownloadView.as_view(), name="compressed"),
 ]
@@ -29,3 +29,9 @@ class GeneratedDownloadView(VirtualDownloadView):
         """Return wrapper on ``StringIteratorIO`` object."""
         file_obj = TextIteratorIO(generate_hello())
         return VirtualFile(file_obj, name="hello-world.txt")
+
+
+class CompressedDownloadView(GeneratedDownloadView):
+    """Compress generated content on the fly, if client accepts it."""
+
+    compress_encodings = ("br", "zstd", "gzip")
@@ -1,13 +1,27 @@
 # flake8: noqa
 """Declaration of API shortcuts."""
 
-from django_downloadview.files import HTTPFile, StorageFile, VirtualFile
+from django_downloadview.cache_control import CachePolicy
+from django_downloadview.compression import CompressedCache
+from django_downloadview.content_cache import ContentCache
+from django_downloadview.digest import ChecksumIndex
+from django_downloadview.files import (
+    HTTPFile,
+    MappedFile,
+    PathFile,
+    SpooledFile,
+    StorageFile,
+    VirtualFile,
+)
 from django_downloadview.io import BytesIteratorIO, TextIteratorIO
+from django_downloadview.metadata import MappedMetadataCache, MetadataCache
 from django_downloadview.middlewares import (
     BaseDownloadMiddleware,
     DownloadDispatcherMiddleware,
     SmartDownloadMiddleware,
 )
+from django_downloadview.open_files import OpenFileCache
+from django_downloadview.page_cache import PageCachePolicy
 from django_downloadview.response import DownloadResponse, ProxiedDownloadResponse
 from django_downloadview.shortcuts import sendfile
 from django_downloadview.test import (
@@ -16,6 +30,10 @@ from django_downloadview.test import (
     temporary_media_root,
 )
 from django_downloadview.views import (
+    AsyncBaseDownloadView,
+    AsyncHTTPDownloadView,
+    AsyncObjectDownloadView,
+    AsyncStorageDownloadView,
     BaseDownloadView,
     DownloadMixin,
     HTTPDownloadView,
@@ -0,0 +1,110 @@
+"""Declarative HTTP caching policies for download responses."""
+
+import time
+
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+
+
+class CachePolicy(object):
+    """Policy for "Cache-Control" and "Expires" headers of downloads.
+
+    >>> from django_downloadview.cache_control import CachePolicy
+    >>> policy = CachePolicy(max_age=3600, public=True, stale_while_revalidate=60)
+    >>> print(policy.cache_control)
+    public, max-age=3600, stale-while-revalidate=60
+
+    Content-hashed filenames never change, so they can be cached "forever":
+
+    >>> print(CachePolicy(max_age=31536000, public=True, immutable=True))
+    public, max-age=31536000, immutable
+
+    """
+
+    def __init__(
+        self,
+        max_age=None,
+        s_maxage=None,
+        public=False,
+        private=False,
+        immutable=False,
+        stale_while_revalidate=None,
+        no_cache=False,
+        expires=True,
+    ):
+        """Constructor.
+
+        max_age, s_maxage, stale_while_revalidate:
+          Durations in seconds, for browsers and for shared caches (CDN,
+          reverse proxies). ``None`` omits the directive.
+
+        public, private, immutable, no_cache:
+          Whether to send these directives. ``public`` and ``private`` are
+          mutually exclusive.
+
+        expires:
+          Whether to send an "Expires" header computed from ``max_age``, for
+          HTTP/1.0 caches.
+
+        """
+        if public and private:
+            raise ValueError("Cache policy cannot be both public and private.")
+        self.max_age = max_age
+        self.s_maxage = s_maxage
+        self.public = public
+        self.private = private
+        self.immutable = immutable
+        self.stale_while_revalidate = stale_while_revalidate
+        self.no_cache = no_cache
+        self.expires = expires
+
+    def __str__(self):
+        return self.cache_control
+
+    def get_directives(self):
+        """Return dictionary of "Cache-Control" directives, as expected by
+        :func:`django.utils.cache.patch_cache_control`."""
+        directives = {}
+        if self.public:
+            directives["public"] = True
+        if self.private:
+            directives["private"] = True
+        if self.no_cache:
+            directives["no_cache"] = True
+        if self.max_age is not None:
+            directives["max_age"] = self.max_age
+        if self.s_maxage is not None:
+            directives["s_maxage"] = self.s_maxage
+        if self.immutable:
+            directives["immutable"] = True
+        if self.stale_while_revalidate is not None:
+            directives["stale_while_revalidate"] = self.stale_while_revalidate
+        return directives
+
+    @property
+    def cache_control(self):
+        """Value of "Cache-Control" header."""
+        parts = []
+        for key, value in self.get_directives().items():
+            directive = key.replace("_", "-")
+            parts.append(directive if value is True else f"{directive}={value}")
+        return ", ".join(parts)
+
+    def patch_response(self, response):
+        """Add "Cache-Control" and "Expires" headers to ``response``.
+
+        Existing "Cache-Control" directives are updated, as with
+        :func:`~django.utils.cache.patch_cache_control`. Existing "Expires"
+        header is kept.
+
+        """
+        directives = self.get_directives()
+        if directives:
+            patch_cache_control(response, **directives)
+        if (
+            self.expires
+            and self.max_age is not None
+            and not response.has_header("Expires")
+        ):
+            response["Expires"] = http_date(time.time() + self.max_age)
+        return response
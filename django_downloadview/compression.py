@@ -0,0 +1,219 @@
+"""Streaming compression of download content.
+
+Compressors encode content block by block: each block is flushed as soon as
+it is compressed, so that memory usage does not depend on content size.
+
+``gzip`` is always available. ``br`` and ``zstd`` require the optional
+`brotli <https://pypi.org/project/Brotli/>`_ and
+`zstandard <https://pypi.org/project/zstandard/>`_ packages.
+
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+class GzipCompressor(object):
+    """Streaming "gzip" content-coding, using :mod:`zlib`."""
+
+    def __init__(self, level=6):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        """Return compressed ``data``, flushed at block boundary."""
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        """Return end of compressed stream."""
+        return self.compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor(object):
+    """Streaming "br" content-coding, using :mod:`brotli`."""
+
+    def __init__(self, level=4):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        """Return compressed ``data``, flushed at block boundary."""
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self):
+        """Return end of compressed stream."""
+        return self.compressor.finish()
+
+
+class ZstdCompressor(object):
+    """Streaming "zstd" content-coding, using :mod:`zstandard`."""
+
+    def __init__(self, level=3):
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        """Return compressed ``data``, flushed at block boundary."""
+        return self.compressor.compress(data) + self.compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self):
+        """Return end of compressed stream."""
+        return self.compressor.flush()
+
+
+#: Compressor classes of available content-codings.
+COMPRESSORS = {"gzip": GzipCompressor}
+if brotli is not None:  # pragma: no cover
+    COMPRESSORS["br"] = BrotliCompressor
+if zstandard is not None:  # pragma: no cover
+    COMPRESSORS["zstd"] = ZstdCompressor
+
+
+def compress_chunks(chunks, encoding):
+    """Generate ``chunks`` compressed with ``encoding`` content-coding.
+
+    >>> import gzip
+    >>> from django_downloadview.compression import compress_chunks
+    >>> compressed = b''.join(compress_chunks([b'Hello ', b'world!'], 'gzip'))
+    >>> print(gzip.decompress(compressed).decode())
+    Hello world!
+
+    Empty compressed blocks are skipped.
+
+    """
+    compressor = COMPRESSORS[encoding]()
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressedCache(object):
+    """Bounded on-disk cache of compressed content.
+
+    Entries are identified by a content key (any string, such as a hash or a
+    name and a version) and an encoding. When total size of entries exceeds
+    ``max_size`` bytes, least recently used entries are removed by
+    :meth:`prune`.
+
+    Pruning lists the whole directory: it runs after a store only if
+    ``max_size / 10`` bytes were stored, or ``prune_interval`` seconds
+    elapsed, since the previous pruning in the process. The directory may
+    therefore exceed ``max_size`` a little, in between. :meth:`prune` may
+    also be called periodically, e.g. by a scheduled task.
+
+    """
+
+    def __init__(self, directory, max_size=100 * 1024 * 1024, prune_interval=60):
+        """Constructor.
+
+        directory:
+          Absolute path of directory to store entries in. Created if missing.
+
+        max_size:
+          Maximum size of entries, in bytes.
+
+        prune_interval:
+          Maximum delay, in seconds, between prunings of stored entries.
+
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.prune_interval = prune_interval
+        self._stored_size = 0
+        self._pruned_time = time.monotonic()
+
+    def get_path(self, key, encoding):
+        """Return path of entry for ``key`` and ``encoding``."""
+        digest = hashlib.sha256(f"{encoding}\0{key}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.{encoding}")
+
+    def get(self, key, encoding):
+        """Return entry for ``key`` and ``encoding`` as a file open in binary
+        mode, or ``None``.
+
+        The entry is opened here, so that it can be read to the end even if
+        :meth:`prune` removes it meanwhile.
+
+        """
+        path = self.get_path(key, encoding)
+        try:
+            entry = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(entry.fileno())  # Mark as recently used.
+        except (NotImplementedError, OSError):
+            pass
+        return entry
+
+    def tee(self, key, encoding, chunks):
+        """Generate ``chunks``, and store them as entry for ``key`` and
+        ``encoding``.
+
+        The entry is stored only if ``chunks`` are consumed completely, e.g.
+        not when the client disconnects before the end of the download.
+
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                for chunk in chunks:
+                    temp_file.write(chunk)
+                    size += len(chunk)
+                    yield chunk
+            os.replace(temp_path, self.get_path(key, encoding))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self._stored_size += size
+        if (
+            self._stored_size >= self.max_size / 10
+            or time.monotonic() - self._pruned_time >= self.prune_interval
+        ):
+            self.prune()
+
+    def prune(self):
+        """Remove least recently used entries until size fits ``max_size``."""
+        self._stored_size = 0
+        self._pruned_time = time.monotonic()
+        entries = []
+        with os.scandir(self.directory) as scanner:
+            for entry in scanner:
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Removed concurrently.
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+    def clear(self):
+        """Remove all entries."""
+        for name in os.listdir(self.directory):
+            if not name.endswith(".tmp"):
+                os.remove(os.path.join(self.directory, name))
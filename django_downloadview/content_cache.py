@@ -0,0 +1,112 @@
+"""In-memory cache of small files content."""
+
+import collections
+import threading
+
+
+class ContentCache(object):
+    """Thread-safe, in-process cache of small files content.
+
+    Entries are identified by a key, such as storage and name of a file, and
+    validated by a ``validator`` such as an ETag: entries whose validator
+    changed are discarded. Files bigger than ``max_file_size`` bytes are not
+    cached. When total size of entries exceeds ``max_size`` bytes, least
+    recently used entries are evicted.
+
+    >>> from django_downloadview.content_cache import ContentCache
+    >>> cache = ContentCache(max_size=10, max_file_size=6)
+    >>> cache.set('a', 'v1', b'Hello')
+    >>> cache.get('a', 'v1')
+    b'Hello'
+    >>> cache.get('a', 'v2') is None  # File changed.
+    True
+    >>> cache.set('b', 'v1', b'Hello world!')  # Too big.
+    >>> cache.get('b', 'v1') is None
+    True
+
+    """
+
+    def __init__(self, max_size=32 * 1024 * 1024, max_file_size=64 * 1024):
+        """Constructor.
+
+        max_size:
+          Maximum total size of entries, in bytes.
+
+        max_file_size:
+          Maximum size of a single entry, in bytes.
+
+        """
+        self.max_size = max_size
+        self.max_file_size = max_file_size
+        self.size = 0
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, validator):
+        """Return content for ``key``, or ``None`` if missing or if it was
+        stored with another ``validator``."""
+        with self._lock:
+            try:
+                stored_validator, content = self._items[key]
+            except KeyError:
+                return None
+            if stored_validator != validator:
+                self._remove(key)
+                return None
+            self._items.move_to_end(key)
+            return content
+
+    def set(self, key, validator, content):
+        """Store ``content`` for ``key``, evicting least recently used
+        entries.
+
+        Content bigger than :attr:`max_file_size` or :attr:`max_size` is not
+        stored.
+
+        """
+        content = bytes(content)
+        if len(content) > min(self.max_file_size, self.max_size):
+            return
+        with self._lock:
+            self._remove(key)
+            self._items[key] = (validator, content)
+            self.size += len(content)
+            while self.size > self.max_size:
+                self._remove(next(iter(self._items)))
+
+    def delete(self, key):
+        """Remove entry for ``key``, if present."""
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+    def _remove(self, key):
+        """Remove entry for ``key``. Caller holds the lock."""
+        try:
+            _, content = self._items.pop(key)
+        except KeyError:
+            return
+        self.size -= len(content)
+
+    def tee(self, key, validator, chunks):
+        """Generate ``chunks``, and store them as content for ``key`` once
+        they have all been consumed.
+
+        Nothing is stored if content is bigger than :attr:`max_file_size`:
+        chunks are then no longer buffered.
+
+        """
+        buffer = bytearray()
+        for chunk in chunks:
+            if buffer is not None:
+                buffer += chunk
+                if len(buffer) > self.max_file_size:
+                    buffer = None
+            yield chunk
+        if buffer is not None:
+            self.set(key, validator, buffer)
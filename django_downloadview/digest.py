@@ -0,0 +1,148 @@
+"""Digests of file content, for "Repr-Digest" and "Digest" headers."""
+
+import base64
+import hashlib
+
+from django.core.cache import caches
+
+from django_downloadview.files import get_storage_id
+
+
+def digest_headers(hexdigest):
+    """Return dictionary of digest headers for SHA-256 ``hexdigest``.
+
+    "Repr-Digest" is defined by :rfc:`9530`, "Digest" by the obsolete
+    :rfc:`3230`, which is still used by some clients.
+
+    >>> from django_downloadview.digest import digest_headers
+    >>> headers = digest_headers(hashlib.sha256(b'Hello world!').hexdigest())
+    >>> print(headers['Repr-Digest'])
+    sha-256=:wFNeS+K3n/2TKRMFQ2v4iTFOSj+uwF7P/Lt98xrZ5Ro=:
+    >>> print(headers['Digest'])
+    sha-256=wFNeS+K3n/2TKRMFQ2v4iTFOSj+uwF7P/Lt98xrZ5Ro=
+
+    """
+    value = base64.b64encode(bytes.fromhex(hexdigest)).decode("ascii")
+    return {
+        "Repr-Digest": f"sha-256=:{value}:",
+        "Digest": f"sha-256={value}",
+    }
+
+
+def parse_sidecar(content):
+    """Return SHA-256 hexadecimal digest read from sidecar file ``content``.
+
+    Sidecar files contain either the digest alone or the output of
+    ``sha256sum``. Returns ``None`` if ``content`` is not a valid digest.
+
+    >>> from django_downloadview.digest import parse_sidecar
+    >>> hexdigest = hashlib.sha256(b'Hello world!').hexdigest()
+    >>> parse_sidecar(f'{hexdigest.upper()}  hello.txt\\n') == hexdigest
+    True
+    >>> parse_sidecar('not a digest') is None
+    True
+
+    """
+    if isinstance(content, bytes):
+        content = content.decode("ascii", "replace")
+    parts = content.split()
+    if not parts:
+        return None
+    digest = parts[0].lower()
+    if len(digest) != 64:
+        return None
+    try:
+        bytes.fromhex(digest)
+    except ValueError:
+        return None
+    return digest
+
+
+class ChecksumIndex(object):
+    """Index of SHA-256 digests of files, stored in a Django cache.
+
+    Entries are keyed by storage, name, size and modification time of files,
+    so that modified files get a new entry. The index is persistent if the
+    cache backend is, e.g. database, file-based or Redis caches.
+
+    The index is filled lazily, by :meth:`tee`, while files are streamed.
+
+    """
+
+    #: Prefix of cache keys.
+    key_prefix = "django_downloadview.sha256"
+
+    def __init__(self, cache_alias="default", timeout=None):
+        """Constructor.
+
+        cache_alias:
+          Name of cache in ``settings.CACHES``.
+
+        timeout:
+          Lifetime of entries in seconds. ``None`` (the default) means
+          entries never expire.
+
+        """
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        """Django cache instance."""
+        return caches[self.cache_alias]
+
+    def get_storage_id(self, file_instance):
+        """Return string identifying storage of ``file_instance``."""
+        storage = getattr(file_instance, "storage", None)
+        if storage is None:
+            return "path"
+        return get_storage_id(storage)
+
+    def get_key(self, file_instance):
+        """Return cache key for ``file_instance``, or ``None``.
+
+        Returns ``None`` if size or modification time of the file is not
+        known, e.g. for generated files.
+
+        """
+        try:
+            name = file_instance.name
+            size = int(file_instance.size)
+            modified_time = file_instance.modified_time
+        except (AttributeError, NotImplementedError, OSError, TypeError):
+            return None
+        if not name or modified_time is None:
+            return None
+        identity = "\0".join(
+            [
+                self.get_storage_id(file_instance),
+                str(name),
+                str(size),
+                modified_time.isoformat(),
+            ]
+        )
+        digest = hashlib.sha256(identity.encode("utf-8")).hexdigest()
+        return f"{self.key_prefix}.{digest}"
+
+    def get(self, file_instance):
+        """Return SHA-256 hexadecimal digest of ``file_instance``, or
+        ``None``."""
+        key = self.get_key(file_instance)
+        if key is None:
+            return None
+        return self.cache.get(key)
+
+    def set(self, file_instance, hexdigest):
+        """Store SHA-256 hexadecimal digest of ``file_instance``."""
+        key = self.get_key(file_instance)
+        if key is not None:
+            self.cache.set(key, hexdigest, self.timeout)
+
+    def tee(self, file_instance, chunks):
+        """Generate ``chunks`` of ``file_instance`` content, and store their
+        digest once they have all been consumed."""
+        sha256 = hashlib.sha256()
+        for chunk in chunks:
+            sha256.update(chunk)
+            yield chunk
+        self.set(file_instance, sha256.hexdigest())
@@ -1,25 +1,235 @@
 """File wrappers for use as exchange data between views and responses."""
 
+from datetime import datetime, timezone
+from functools import cached_property
+import hashlib
 from io import BytesIO
+import mmap
+import os
+import stat
+import tempfile
 from urllib.parse import urlparse
 
+from django.conf import settings
 from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage
 from django.utils.encoding import force_bytes
 
-from django_downloadview.io import BytesIteratorIO
+from django_downloadview.io import BytesIteratorIO, encode_chunks
 
 import requests
 
 
+class FileStat(object):
+    """Metadata of a file: size and times, as returned by ``stat()`` methods
+    of file wrappers."""
+
+    #: Whether the file exists.
+    exists = True
+
+    def __init__(
+        self,
+        size=None,
+        modified_time=None,
+        accessed_time=None,
+        created_time=None,
+        etag=None,
+        mime_type=None,
+        inode=None,
+        is_file=True,
+        modified_time_ns=None,
+    ):
+        #: Size of the file, in bytes.
+        self.size = size
+
+        #: Last modification time, as datetime object.
+        self.modified_time = modified_time
+
+        #: Last access time, as datetime object.
+        self.accessed_time = accessed_time
+
+        #: Creation time, as datetime object.
+        self.created_time = created_time
+
+        #: Optional ETag reported by storage, such as an object store's one.
+        self.etag = etag
+
+        #: Optional MIME type reported by storage.
+        self.mime_type = mime_type
+
+        #: Inode number, for files on local filesystem.
+        self.inode = inode
+
+        #: Whether this is a regular file, e.g. not a directory.
+        self.is_file = is_file
+
+        #: Last modification time, as integer nanoseconds since epoch, for
+        #: files on local filesystem.
+        self.modified_time_ns = modified_time_ns
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(size={self.size!r}, "
+            f"modified_time={self.modified_time!r})"
+        )
+
+    @classmethod
+    def from_os_stat(cls, stat_result, tz=timezone.utc):
+        """Return instance built from :func:`os.stat` result.
+
+        Times are datetime objects in ``tz`` timezone (naive if ``None``).
+
+        """
+        return cls(
+            size=stat_result.st_size,
+            modified_time=datetime.fromtimestamp(stat_result.st_mtime, tz),
+            accessed_time=datetime.fromtimestamp(stat_result.st_atime, tz),
+            created_time=datetime.fromtimestamp(stat_result.st_ctime, tz),
+            inode=stat_result.st_ino,
+            is_file=stat.S_ISREG(stat_result.st_mode),
+            modified_time_ns=stat_result.st_mtime_ns,
+        )
+
+
+class StorageStat(object):
+    """Metadata of a file, fetched lazily from a storage.
+
+    Used for storages which cannot return all metadata at once: each
+    attribute is fetched at most once.
+
+    """
+
+    #: Storages' API does not provide ETags.
+    etag = None
+
+    #: Storages' API does not provide MIME types.
+    mime_type = None
+
+    #: Storages' API does not provide inodes.
+    inode = None
+
+    def __init__(self, storage, name):
+        self.storage = storage
+        self.name = name
+
+    @cached_property
+    def exists(self):
+        """Whether the file exists."""
+        return self.storage.exists(self.name)
+
+    @cached_property
+    def size(self):
+        """Size of the file, in bytes."""
+        return self.storage.size(self.name)
+
+    def _get_time(self, kind):
+        try:
+            method = getattr(self.storage, f"get_{kind}_time")
+        except AttributeError:
+            method = getattr(self.storage, f"{kind}_time")
+        return method(self.name)
+
+    @cached_property
+    def modified_time(self):
+        """Last modification time."""
+        return self._get_time("modified")
+
+    @cached_property
+    def accessed_time(self):
+        """Last access time."""
+        return self._get_time("accessed")
+
+    @cached_property
+    def created_time(self):
+        """Creation time."""
+        return self._get_time("created")
+
+
+#: Attributes which tell apart storages of the same class, in addition to
+#: arguments storages were built with: local directory, bucket, endpoint...
+STORAGE_ID_ATTRIBUTES = (
+    "location",
+    "base_url",
+    "bucket_name",
+    "endpoint_url",
+    "custom_domain",
+    "account_name",
+    "azure_container",
+)
+
+
+def get_storage_id(storage):
+    """Return string identifying ``storage``, for use in cache keys.
+
+    Uses storage's ``cache_id`` attribute if set. Else, the identifier is
+    built from storage's class and configuration: arguments returned by
+    ``deconstruct()`` and :data:`STORAGE_ID_ATTRIBUTES`, so that storages of
+    the same class with distinct buckets or endpoints do not share cache
+    entries. Set ``cache_id`` on storages configured by other means.
+
+    """
+    cache_id = getattr(storage, "cache_id", None)
+    if cache_id is not None:
+        return str(cache_id)
+    cls = storage.__class__
+    try:
+        _path, args, kwargs = storage.deconstruct()
+    except (AttributeError, TypeError, ValueError):
+        args, kwargs = (), {}
+    attributes = [
+        (name, getattr(storage, name, None)) for name in STORAGE_ID_ATTRIBUTES
+    ]
+    config = repr((args, sorted(kwargs.items()), attributes))
+    digest = hashlib.sha256(config.encode("utf-8")).hexdigest()[:32]
+    return f"{cls.__module__}.{cls.__qualname__}:{digest}"
+
+
+def storage_stat(storage, name):
+    """Return metadata of file ``name`` in ``storage``.
+
+    If storage has a ``stat(name)`` method, it is used to fetch all metadata
+    in one call, e.g. a single HEAD request to an object store. It must
+    return an object with the attributes of :class:`FileStat`, and raise
+    ``FileNotFoundError`` if file does not exist.
+
+    Else, for :class:`~django.core.files.storage.FileSystemStorage`, a single
+    :func:`os.stat` call is made.
+
+    Else, returns a :class:`StorageStat`, which calls the storage at most once
+    per attribute.
+
+    """
+    try:
+        storage_method = storage.stat
+    except AttributeError:
+        pass
+    else:
+        return storage_method(name)
+    if isinstance(storage, FileSystemStorage):
+        # Same timezone handling as FileSystemStorage.get_modified_time().
+        tz = timezone.utc if settings.USE_TZ else None
+        return FileStat.from_os_stat(os.stat(storage.path(name)), tz)
+    return StorageStat(storage, name)
+
+
 class StorageFile(File):
     """A file in a Django storage.
 
     This class looks like :py:class:`django.db.models.fields.files.FieldFile`,
     but unrelated to model instance.
 
+    Metadata, such as size or modification time, are fetched once per file
+    wrapper: see :meth:`stat`. The file is opened only when its content is
+    read.
+
     """
 
-    def __init__(self, storage, name, file=None):
+    #: Files are always opened in binary mode.
+    mode = "rb"
+
+    def __init__(
+        self, storage, name, file=None, metadata_cache=None, open_file_cache=None
+    ):
         """Constructor.
 
         storage:
@@ -28,15 +238,35 @@ class StorageFile(File):
         name:
           File identifier in storage, usually a filename as a string.
 
+        metadata_cache:
+          Optional :class:`~django_downloadview.metadata.MetadataCache`-like
+          instance, to share metadata between file wrappers.
+
+        open_file_cache:
+          Optional :class:`~django_downloadview.open_files.OpenFileCache`
+          instance, to share descriptors of files of
+          :class:`~django.core.files.storage.FileSystemStorage`.
+
         """
         self.storage = storage
         self.name = name
         self.file = file
+        self.metadata_cache = metadata_cache
+        self.open_file_cache = open_file_cache
+        self._stat = None
+        self._stat_is_cached = False
 
     def _get_file(self):
         """Getter for :py:attr:``file`` property."""
         if not hasattr(self, "_file") or self._file is None:
-            self._file = self.storage.open(self.name, "rb")
+            if self.open_file_cache is not None and isinstance(
+                self.storage, FileSystemStorage
+            ):
+                self._file = self.open_file_cache.open(
+                    self.storage.path(self.name), self.stat()
+                )
+            else:
+                self._file = self.storage.open(self.name, "rb")
         return self._file
 
     def _set_file(self, file):
@@ -50,6 +280,32 @@ class StorageFile(File):
     #: Required by django.core.files.utils.FileProxy.
     file = property(_get_file, _set_file, _del_file)
 
+    @property
+    def closed(self):
+        """Return True unless the file has been opened and not closed yet."""
+        file = getattr(self, "_file", None)
+        return file is None or file.closed
+
+    def close(self):
+        """Close the file if it has been opened."""
+        file = getattr(self, "_file", None)
+        if file is not None:
+            file.close()
+
+    def seekable(self):
+        """Return True if the file supports random access.
+
+        Files of :class:`~django.core.files.storage.FileSystemStorage` are
+        seekable: they are not opened to tell it. Other files are opened, and
+        asked.
+
+        """
+        if getattr(self, "_file", None) is None and isinstance(
+            self.storage, FileSystemStorage
+        ):
+            return True
+        return self.file.seekable()
+
     def open(self, mode="rb"):
         """Retrieves the specified file from storage and return open() result.
 
@@ -67,6 +323,7 @@ class StorageFile(File):
         beginning.
 
         """
+        self.invalidate()
         return self.storage.save(self.name, content)
 
     @property
@@ -87,24 +344,62 @@ class StorageFile(File):
         Proxy to self.storage.delete(self.name).
 
         """
+        self.invalidate()
         return self.storage.delete(self.name)
 
+    def stat(self):
+        """Return metadata of the file, as a :class:`FileStat`-like object.
+
+        Metadata are fetched on first call only: from :attr:`metadata_cache`
+        if set, else from storage (see :func:`storage_stat`). Raises
+        ``FileNotFoundError`` if file does not exist and storage can tell it in
+        a single call.
+
+        """
+        if self._stat is None:
+            if self.metadata_cache is not None:
+                self._stat = self.metadata_cache.get(self.storage, self.name)
+                self._stat_is_cached = self._stat is not None
+            if self._stat is None:
+                self._stat = storage_stat(self.storage, self.name)
+                if self.metadata_cache is not None:
+                    self.metadata_cache.set(self.storage, self.name, self._stat)
+        return self._stat
+
+    def invalidate(self):
+        """Discard metadata of the file, in wrapper and in
+        :attr:`metadata_cache`."""
+        self._stat = None
+        self._stat_is_cached = False
+        if self.metadata_cache is not None:
+            self.metadata_cache.delete(self.storage, self.name)
+
     def exists(self):
         """Return True if file already exists in the storage system.
 
         If False, then the name is available for a new file.
 
         """
-        return self.storage.exists(self.name)
+        try:
+            return self.stat().exists
+        except FileNotFoundError:
+            return False
 
-    @property
-    def size(self):
+    def _get_size(self):
         """Return the total size, in bytes, of the file.
 
-        Proxy to self.storage.size(self.name).
+        Read from :meth:`stat`, unless it has been set explicitly.
 
         """
-        return self.storage.size(self.name)
+        try:
+            return self._size
+        except AttributeError:
+            return self.stat().size
+
+    def _set_size(self, value):
+        self._size = value
+
+    size = property(_get_size, _set_size)
 
     @property
     def url(self):
@@ -115,41 +410,235 @@ class StorageFile(File):
         """
         return self.storage.url(self.name)
 
+    def _get_time(self, kind):
+        """Return ``kind`` time from :meth:`stat`, or from storage if
+        :attr:`metadata_cache` did not store it."""
+        value = getattr(self.stat(), f"{kind}_time", None)
+        if value is None and self._stat_is_cached:
+            value = getattr(storage_stat(self.storage, self.name), f"{kind}_time")
+        return value
+
     @property
     def accessed_time(self):
         """Return the last accessed time (as datetime object) of the file.
 
-        Proxy to self.storage.accessed_time(self.name).
+        Read from :meth:`stat`, else from storage.
 
         """
-        try:
-            return self.storage.get_accessed_time(self.name)
-        except AttributeError:
-            return self.storage.accessed_time(self.name)
+        return self._get_time("accessed")
 
     @property
     def created_time(self):
         """Return the creation time (as datetime object) of the file.
 
-        Proxy to self.storage.created_time(self.name).
+        Read from :meth:`stat`, else from storage.
 
         """
-        try:
-            return self.storage.get_created_time(self.name)
-        except AttributeError:
-            return self.storage.created_time(self.name)
+        return self._get_time("created")
 
     @property
     def modified_time(self):
         """Return the last modification time (as datetime object) of the file.
 
-        Proxy to self.storage.modified_time(self.name).
+        Read from :meth:`stat`.
 
         """
-        try:
-            return self.storage.get_modified_time(self.name)
-        except AttributeError:
-            return self.storage.modified_time(self.name)
+        return self.stat().modified_time
+
+
+class PathFile(File):
+    """A file on local filesystem, given its path.
+
+    Unlike ``File(open(path))``, the file is opened lazily, i.e. only when its
+    content is read. Metadata such as size or modification time are read from
+    the filesystem without opening the file.
+
+    """
+
+    #: Files are always opened in binary mode.
+    mode = "rb"
+
+    def __init__(self, path, metadata_cache=None, open_file_cache=None):
+        """Constructor.
+
+        path:
+          Absolute filename of the file on local filesystem.
+
+        metadata_cache:
+          Optional :class:`~django_downloadview.metadata.MetadataCache`-like
+          instance, to share metadata between file wrappers.
+
+        open_file_cache:
+          Optional :class:`~django_downloadview.open_files.OpenFileCache`
+          instance, to share file descriptors between file wrappers.
+
+        """
+        self.name = path
+        self.metadata_cache = metadata_cache
+        self.open_file_cache = open_file_cache
+        self._file = None
+        self._stat = None
+
+    def _get_file(self):
+        """Getter for :py:attr:``file`` property."""
+        if self._file is None:
+            if self.open_file_cache is not None:
+                self._file = self.open_file_cache.open(self.name, self.stat())
+            else:
+                self._file = open(self.name, self.mode)
+        return self._file
+
+    def _set_file(self, file):
+        """Setter for :py:attr:``file`` property."""
+        self._file = file
+
+    def _del_file(self):
+        """Deleter for :py:attr:``file`` property."""
+        self._file = None
+
+    #: Required by django.core.files.utils.FileProxy.
+    file = property(_get_file, _set_file, _del_file)
+
+    @property
+    def closed(self):
+        """Return True unless the file has been opened and not closed yet."""
+        return self._file is None or self._file.closed
+
+    def close(self):
+        """Close the file if it has been opened."""
+        if self._file is not None:
+            self._file.close()
+
+    def seekable(self):
+        """Return True: files on local filesystem support random access."""
+        return True
+
+    def stat(self):
+        """Return :class:`FileStat` of the file.
+
+        The filesystem is queried with a single :func:`os.stat` call, on first
+        call only, unless :attr:`metadata_cache` holds metadata of the file.
+        Only regular files are stored in :attr:`metadata_cache`.
+
+        """
+        if self._stat is None:
+            if self.metadata_cache is not None:
+                self._stat = self.metadata_cache.get(None, self.name)
+            if self._stat is None:
+                self._stat = FileStat.from_os_stat(os.stat(self.name))
+                if self.metadata_cache is not None and self._stat.is_file:
+                    self.metadata_cache.set(None, self.name, self._stat)
+        return self._stat
+
+    @property
+    def size(self):
+        """Return the total size, in bytes, of the file."""
+        return self.stat().size
+
+    @property
+    def modified_time(self):
+        """Return the last modification time (as datetime object) of the file."""
+        return self.stat().modified_time
+
+
+class MappedFile(PathFile):
+    """A file on local filesystem, read through a memory map.
+
+    Content is generated as :class:`memoryview` slices of the map, so that no
+    ``read()`` call is needed per chunk, and byte ranges are mere slices.
+    Pages stay in the page cache, shared by all processes which serve the
+    file.
+
+    Responses copy slices to :class:`bytes` before they are sent, unless
+    :attr:`~django_downloadview.response.DownloadResponse.buffer_chunks` is
+    set. Whole files are usually not read through the map at all: they are
+    handed to the server's ``wsgi.file_wrapper``, which may use
+    ``sendfile(2)``. The map mostly serves byte ranges, compressed content
+    and servers without ``wsgi.file_wrapper``.
+
+    If :attr:`file` is replaced, e.g. by content read from a content cache,
+    chunks are slices of its content instead.
+
+    .. warning::
+
+       Reading a mapped file which is truncated by another process crashes
+       the reading process (``SIGBUS``). Only use this wrapper for files
+       which are replaced atomically (e.g. renamed over), never rewritten in
+       place.
+
+    """
+
+    def __init__(self, path, metadata_cache=None, open_file_cache=None):
+        super().__init__(
+            path, metadata_cache=metadata_cache, open_file_cache=open_file_cache
+        )
+        self._mmap = None
+        self._replaced = False
+
+    def _set_file(self, file):
+        """Setter for :py:attr:``file`` property."""
+        super()._set_file(file)
+        self._replaced = file is not None
+
+    def _del_file(self):
+        """Deleter for :py:attr:``file`` property."""
+        super()._del_file()
+        self._replaced = False
+
+    file = property(PathFile._get_file, _set_file, _del_file)
+
+    @property
+    def mmap(self):
+        """Read-only memory map of the whole file, or ``None`` if the file
+        is empty (empty files cannot be mapped).
+
+        The map does not need a file descriptor: the file is opened only
+        while it is mapped.
+
+        """
+        if self._mmap is None and self.size:
+            with open(self.name, "rb") as file:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def get_buffer(self):
+        """Return content to slice: memory map of the file, or whole content
+        of :attr:`file` if it was replaced. ``None`` if there is no content."""
+        if self._replaced:
+            self.file.seek(0)
+            return self.file.read() or None
+        return self.mmap
+
+    def chunks(self, chunk_size=None):
+        """Generate whole content as :class:`memoryview` slices of at most
+        ``chunk_size`` bytes."""
+        return self.range_chunks(0, None, chunk_size)
+
+    def range_chunks(self, start, stop, chunk_size=None):
+        """Generate content between ``start`` and ``stop`` offsets, as
+        :class:`memoryview` slices of at most ``chunk_size`` bytes.
+
+        ``stop`` defaults to the end of file.
+
+        """
+        chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+        buffer = self.get_buffer()
+        if buffer is None:
+            return
+        view = memoryview(buffer)
+        stop = len(view) if stop is None else min(stop, len(view))
+        for offset in range(start, stop, chunk_size):
+            yield view[offset : min(offset + chunk_size, stop)]
+
+    def close(self):
+        """Unmap and close the file if it has been opened."""
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # Slices are still referenced: unmapped when collected.
+            self._mmap = None
+        super().close()
 
 
 class VirtualFile(File):
@@ -188,6 +677,8 @@ class VirtualFile(File):
 
     size = property(_get_size, _set_size)
 
+    read1 = property(lambda self: self.file.read1)
+
     def __iter__(self):
         """Same as ``File.__iter__()`` but using ``force_bytes()``.
 
@@ -215,6 +706,164 @@ class VirtualFile(File):
             yield buffer_
 
 
+class SpooledFile(File):
+    """Wrapper for generated content, spooled in memory, then on disk.
+
+    Content of the wrapped file is read once, when the wrapper's content or
+    size is first accessed. It is kept in memory up to ``max_size`` bytes,
+    then written to a temporary file on local filesystem. Spooled content has
+    a size and is seekable, so responses send "Content-Length" and serve byte
+    ranges.
+
+    Content written to disk has a :attr:`path`, which is also the wrapper's
+    ``name``, and a file descriptor that servers may stream with
+    ``sendfile(2)``. Unlike :class:`tempfile.SpooledTemporaryFile`, which
+    rolls over to an anonymous file, the file is named after the wrapper's
+    basename, in a new directory inside ``dir``: reverse proxies may serve it.
+
+    """
+
+    #: Spooled content is always read in binary mode.
+    mode = "rb"
+
+    def __init__(
+        self,
+        file,
+        name="",
+        max_size=1024 * 1024,
+        dir=None,
+        delete=True,
+        charset=None,
+    ):
+        """Constructor.
+
+        file:
+          File object with a ``read()`` method, such as
+          :class:`~django_downloadview.io.BytesIteratorIO`, or iterable of
+          chunks. Text is encoded with ``charset``.
+
+        name:
+          File basename.
+
+        max_size:
+          Maximum size, in bytes, of content kept in memory.
+
+        dir:
+          Directory where bigger content is written. If ``None``, the default
+          temporary directory is used.
+
+        delete:
+          Whether to delete content written to disk when the wrapper is
+          closed. Set it to ``False`` if a reverse proxy serves the file: the
+          file must then outlive the response, and old files have to be
+          removed from ``dir`` by other means. Files deleted on close are
+          never handed to reverse proxies.
+
+        charset:
+          Encoding of text content, i.e. charset of the response. Defaults
+          to ``settings.DEFAULT_CHARSET``, as responses do.
+
+        """
+        if charset is None:
+            charset = settings.DEFAULT_CHARSET
+        #: Encoding of text content.
+        self.charset = charset
+        if not hasattr(file, "read"):
+            file = BytesIteratorIO(file, charset)
+        #: Wrapped file, whose content is spooled.
+        self.source = file
+        self.basename = name
+        self.max_size = max_size
+        self.dir = dir
+        self.delete = delete
+
+        #: Path of content written to disk, or ``None``.
+        self.path = None
+
+        self._file = None
+        self._size = None
+
+    def spool(self):
+        """Read content of wrapped file, if not done yet."""
+        if self._size is not None:
+            return
+        buffer = BytesIO()
+        size = 0
+        for data in encode_chunks(self.read_source(), self.charset):
+            if self.path is None and size + len(data) > self.max_size:
+                directory = tempfile.mkdtemp(dir=self.dir)
+                self.path = os.path.join(
+                    directory, os.path.basename(self.basename) or "content"
+                )
+                file = open(self.path, "w+b")
+                file.write(buffer.getbuffer())
+                buffer = file
+            buffer.write(data)
+            size += len(data)
+        buffer.seek(0)
+        self._file = buffer
+        self._size = size
+        if hasattr(self.source, "close"):
+            self.source.close()
+
+    def read_source(self):
+        """Generate content of wrapped file, as read."""
+        while True:
+            data = self.source.read(self.DEFAULT_CHUNK_SIZE)
+            if not data:
+                break
+            yield data
+
+    def _get_file(self):
+        """Getter for :py:attr:``file`` property."""
+        self.spool()
+        return self._file
+
+    def _set_file(self, file):
+        """Setter for :py:attr:``file`` property."""
+        self._file = file
+
+    def _del_file(self):
+        """Deleter for :py:attr:``file`` property."""
+        self._file = None
+
+    #: Required by django.core.files.utils.FileProxy.
+    file = property(_get_file, _set_file, _del_file)
+
+    @property
+    def name(self):
+        """Return :attr:`path` if content was written to disk, else
+        basename."""
+        return self.path or self.basename
+
+    @property
+    def size(self):
+        """Return the total size, in bytes, of the content."""
+        self.spool()
+        return self._size
+
+    @property
+    def closed(self):
+        """Return True unless content has been spooled and not closed yet."""
+        return self._file is None or self._file.closed
+
+    def close(self):
+        """Close spooled content, and delete it from disk if :attr:`delete`
+        is set."""
+        if self._file is not None:
+            self._file.close()
+        if self.delete and self.path is not None:
+            try:
+                os.remove(self.path)
+                os.rmdir(os.path.dirname(self.path))
+            except FileNotFoundError:
+                pass
+
+    def seekable(self):
+        """Return True: spooled content supports random access."""
+        return True
+
+
 class HTTPFile(File):
     """Wrapper for files that live on remote HTTP servers.
 
@@ -1,143 +1,265 @@
 """Low-level IO operations, for use with file wrappers."""
 
+import codecs
 import io
+import time
 
+from django.core.files.base import File
 from django.utils.encoding import force_bytes, force_str
 
 
-class TextIteratorIO(io.TextIOBase):
-    """A dynamically generated TextIO-like object.
+def encode_chunks(chunks, encoding="utf-8", chunk_size=None, errors="strict"):
+    """Generate ``chunks`` as bytes, encoding text with an incremental encoder.
+
+    Consecutive text chunks are joined until they reach ``chunk_size``
+    characters (defaults to ``File.DEFAULT_CHUNK_SIZE``), then encoded at
+    once. The encoder keeps its state between blocks, so that byte order marks
+    are emitted once. Other chunks are passed through unchanged.
+
+    >>> from django_downloadview.io import encode_chunks
+    >>> list(encode_chunks(["Hello ", "world", b"!", "?"]))
+    [b'Hello world', b'!', b'?']
+
+    """
+    if chunk_size is None:
+        chunk_size = File.DEFAULT_CHUNK_SIZE
+    encoder = codecs.getincrementalencoder(encoding)(errors)
+    pending = []
+    pending_size = 0
+    for chunk in chunks:
+        if not isinstance(chunk, str):
+            if pending:
+                yield encoder.encode("".join(pending))
+                pending = []
+                pending_size = 0
+            yield chunk
+            continue
+        if not chunk:
+            continue
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size >= chunk_size:
+            yield encoder.encode("".join(pending))
+            pending = []
+            pending_size = 0
+    if pending:
+        yield encoder.encode("".join(pending), final=True)
+
+
+def coalesce_chunks(chunks, block_size, max_latency=None):
+    """Generate ``chunks`` joined in blocks of at least ``block_size`` bytes.
+
+    A chunk which fills a block on its own is passed through without copy.
+
+    If ``max_latency`` is set, pending content is also sent when a chunk
+    arrives ``max_latency`` seconds or more after the previous block was
+    sent, so that slow generators deliver content progressively. The delay
+    is checked when chunks arrive: content is never sent while ``chunks``
+    is blocked: see :func:`~django_downloadview.response.coalesce_in_thread`
+    for a real deadline.
+
+    >>> from django_downloadview.io import coalesce_chunks
+    >>> list(coalesce_chunks([b"a", b"b", b"cde", b"f"], 2))
+    [b'ab', b'cde', b'f']
+
+    """
+    pending = []
+    pending_size = 0
+    sent_time = time.monotonic()
+    for chunk in chunks:
+        if not chunk:
+            continue
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size < block_size:
+            if max_latency is None:
+                continue
+            if time.monotonic() - sent_time < max_latency:
+                continue
+        yield pending[0] if len(pending) == 1 else b"".join(pending)
+        pending = []
+        pending_size = 0
+        sent_time = time.monotonic()
+    if pending:
+        yield pending[0] if len(pending) == 1 else b"".join(pending)
+
+
+class IteratorIOMixin(object):
+    """Read buffer over chunks generated by an iterator.
 
-    Original code by Matt Joiner <anacrolix@gmail.com> from:
+    The buffer is the current chunk and an offset in it: chunks are only
+    sliced to return data, so reading ``n`` bytes or characters costs
+    ``O(n)`` whatever the size of chunks.
+
+    Original idea by Matt Joiner <anacrolix@gmail.com> from:
 
     * http://stackoverflow.com/questions/12593576/
     * https://gist.github.com/anacrolix/3788413
 
     """
 
+    #: Empty chunk.
+    empty = None
+
     def __init__(self, iterator):
         #: Iterator/generator for content.
         self._iter = iterator
 
-        #: Internal buffer.
-        self._left = ""
+        #: Current chunk.
+        self._chunk = self.empty
+
+        #: Position of unread content in current chunk.
+        self._offset = 0
+
+    def convert(self, chunk):
+        """Return ``chunk`` converted to the type of :attr:`empty`."""
+        raise NotImplementedError()
 
     def readable(self):
         return True
 
-    def _read1(self, n=None):
-        while not self._left:
+    def seekable(self):
+        return False
+
+    def _fill(self):
+        """Make sure current chunk has unread content, return False at end of
+        content."""
+        while self._offset >= len(self._chunk):
             try:
-                self._left = next(self._iter)
+                chunk = next(self._iter)
             except StopIteration:
-                break
-            else:
-                # Make sure we handle text.
-                self._left = force_str(self._left)
-        ret = self._left[:n]
-        self._left = self._left[len(ret) :]
-        return ret
-
-    def read(self, n=None):
-        """Return content up to ``n`` length."""
+                self._chunk = self.empty
+                self._offset = 0
+                return False
+            self._chunk = self.convert(chunk)
+            self._offset = 0
+        return True
+
+    def _read_chunk(self, n=-1):
+        """Return up to ``n`` items from current chunk (all if ``n`` is
+        negative or ``None``), or empty content at end of content."""
+        if not self._fill():
+            return self.empty
+        start = self._offset
+        stop = len(self._chunk)
+        if n is not None and 0 <= n < stop - start:
+            stop = start + n
+        self._offset = stop
+        if start == 0 and stop == len(self._chunk):
+            return self._chunk
+        return self._chunk[start:stop]
+
+    def read1(self, n=-1):
+        """Return content up to ``n`` length, from a single chunk: does not
+        wait for the iterator to generate more."""
+        return self._read_chunk(n)
+
+    def read(self, n=-1):
+        """Return content up to ``n`` length, all of it if ``n`` is negative
+        or ``None``."""
         chunks = []
         if n is None or n < 0:
             while True:
-                m = self._read1()
-                if not m:
+                data = self._read_chunk()
+                if not data:
                     break
-                chunks.append(m)
+                chunks.append(data)
         else:
             while n > 0:
-                m = self._read1(n)
-                if not m:
+                data = self._read_chunk(n)
+                if not data:
                     break
-                n -= len(m)
-                chunks.append(m)
-        return "".join(chunks)
+                n -= len(data)
+                chunks.append(data)
+        if len(chunks) == 1:
+            return chunks[0]
+        return self.empty.join(chunks)
 
-    def readline(self):
+    def readline(self, size=-1):
+        """Return content up to next newline (included), or up to ``size``
+        length."""
+        newline = self.convert("\n")
         chunks = []
-        while True:
-            i = self._left.find("\n")
-            if i == -1:
-                chunks.append(self._left)
-                try:
-                    self._left = next(self._iter)
-                except StopIteration:
-                    self._left = ""
-                    break
-            else:
-                chunks.append(self._left[: i + 1])
-                self._left = self._left[i + 1 :]
+        remaining = -1 if size is None else size
+        while remaining and self._fill():
+            stop = self._chunk.find(newline, self._offset) + 1
+            if stop == 0:
+                stop = len(self._chunk)
+            n = stop - self._offset
+            if remaining > 0:
+                n = min(n, remaining)
+                remaining -= n
+            chunks.append(self._read_chunk(n))
+            if chunks[-1].endswith(newline):
                 break
-        return "".join(chunks)
+        return self.empty.join(chunks)
 
+    def __iter__(self):
+        return self
 
-class BytesIteratorIO(io.BytesIO):
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+
+class TextIteratorIO(IteratorIOMixin, io.TextIOBase):
+    """A dynamically generated TextIO-like object.
+
+    Chunks generated as bytes are decoded as UTF-8.
+
+    """
+
+    empty = ""
+
+    def convert(self, chunk):
+        # Make sure we handle text.
+        return force_str(chunk)
+
+
+class BytesIteratorIO(IteratorIOMixin, io.BytesIO):
     """A dynamically generated BytesIO-like object.
 
-    Original code by Matt Joiner <anacrolix@gmail.com> from:
+    Chunks generated as text are encoded with ``encoding`` (defaults to
+    UTF-8) as they arrive, with an incremental encoder: see
+    :func:`encode_chunks`. They are not batched, so that :meth:`read1` does
+    not wait for the iterator: responses join small chunks themselves.
 
-    * http://stackoverflow.com/questions/12593576/
-    * https://gist.github.com/anacrolix/3788413
+    In addition to ``read()``, content may be read into pre-allocated buffers
+    with :meth:`readinto` or :meth:`readinto1`, e.g. by
+    :class:`io.BufferedReader`.
 
     """
 
-    def __init__(self, iterator):
-        #: Iterator/generator for content.
-        self._iter = iterator
+    empty = b""
 
-        #: Internal buffer.
-        self._left = b""
+    def __init__(self, iterator, encoding="utf-8"):
+        super().__init__(encode_chunks(iterator, encoding, chunk_size=1))
 
-    def readable(self):
-        return True
+    def convert(self, chunk):
+        # Make sure we handle bytes.
+        return force_bytes(chunk)
 
-    def _read1(self, n=None):
-        while not self._left:
-            try:
-                self._left = next(self._iter)
-            except StopIteration:
-                break
-            else:
-                # Make sure we handle text.
-                self._left = force_bytes(self._left)
-        ret = self._left[:n]
-        self._left = self._left[len(ret) :]
-        return ret
-
-    def read(self, n=None):
-        """Return content up to ``n`` length."""
-        chunks = []
-        if n is None or n < 0:
-            while True:
-                m = self._read1()
-                if not m:
-                    break
-                chunks.append(m)
-        else:
-            while n > 0:
-                m = self._read1(n)
-                if not m:
-                    break
-                n -= len(m)
-                chunks.append(m)
-        return b"".join(chunks)
+    def readinto(self, buffer):
+        """Read bytes into ``buffer``, until it is full or content is
+        exhausted. Return number of bytes read."""
+        return self._readinto(buffer, single_chunk=False)
 
-    def readline(self):
-        chunks = []
-        while True:
-            i = self._left.find(b"\n")
-            if i == -1:
-                chunks.append(self._left)
-                try:
-                    self._left = next(self._iter)
-                except StopIteration:
-                    self._left = b""
-                    break
-            else:
-                chunks.append(self._left[: i + 1])
-                self._left = self._left[i + 1 :]
+    def readinto1(self, buffer):
+        """Read bytes into ``buffer`` from a single chunk. Return number of
+        bytes read."""
+        return self._readinto(buffer, single_chunk=True)
+
+    def _readinto(self, buffer, single_chunk):
+        view = memoryview(buffer).cast("B")
+        total = 0
+        while total < len(view) and self._fill():
+            n = min(len(view) - total, len(self._chunk) - self._offset)
+            chunk = memoryview(self._chunk)
+            view[total : total + n] = chunk[self._offset : self._offset + n]
+            self._offset += n
+            total += n
+            if single_chunk:
                 break
-        return b"".join(chunks)
+        return total
@@ -29,8 +29,8 @@ class XSendfileMiddleware(ProxiedDownloadMiddleware):
             return response
         return XSendfileResponse(
             file_path=redirect_url,
-            content_type=response["Content-Type"],
+            content_type=self.get_content_type(response),
             basename=response.basename,
             attachment=response.attachment,
-            headers=response.headers,
+            headers=self.get_headers(response),
         )
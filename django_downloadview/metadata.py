@@ -0,0 +1,421 @@
+"""Caches of file metadata, shared between requests."""
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+
+from django.core.cache import caches
+from django.db.models import FileField
+from django.db.models.signals import post_delete, post_save
+
+from django_downloadview.files import FileStat, StorageStat, get_storage_id
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+#: Key of empty slots in :class:`MappedMetadataCache`.
+EMPTY_KEY = b"\0" * 16
+
+EPOCH = datetime(1970, 1, 1)
+UTC_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+class MetadataCache(object):
+    """Cache of file metadata, backed by Django's cache framework.
+
+    Maps ``(storage, name)`` to a :class:`~django_downloadview.files.FileStat`
+    with size, modification time, ETag and MIME type of the file. Entries
+    expire after ``timeout`` seconds, and are invalidated when files are saved
+    or deleted via :class:`~django_downloadview.files.StorageFile`.
+
+    Files modified by other means are served with stale metadata until entries
+    expire: choose ``timeout`` accordingly. Files of models' ``FileField``
+    may be invalidated when instances are saved or deleted, see
+    :func:`invalidate_field_files`.
+
+    """
+
+    #: Prefix of cache keys.
+    key_prefix = "django_downloadview.stat"
+
+    def __init__(self, cache_alias="default", timeout=300):
+        """Constructor.
+
+        cache_alias:
+          Name of cache in ``settings.CACHES``.
+
+        timeout:
+          Lifetime of entries in seconds.
+
+        """
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        """Django cache instance."""
+        return caches[self.cache_alias]
+
+    def get_key(self, storage, name):
+        """Return cache key for file ``name`` in ``storage``."""
+        identity = f"{get_storage_id(storage)}\0{name}"
+        digest = hashlib.sha256(identity.encode("utf-8")).hexdigest()
+        return f"{self.key_prefix}.{digest}"
+
+    def get(self, storage, name):
+        """Return :class:`~django_downloadview.files.FileStat` of file ``name``
+        in ``storage``, or ``None``."""
+        return self.cache.get(self.get_key(storage, name))
+
+    def set(self, storage, name, stat):
+        """Store metadata ``stat`` of file ``name`` in ``storage``.
+
+        All :class:`~django_downloadview.files.FileStat` fields are stored,
+        except access and creation times of
+        :class:`~django_downloadview.files.StorageStat`, which would cost
+        storage calls: :class:`~django_downloadview.files.StorageFile` asks
+        the storage for them when needed.
+
+        """
+        value = FileStat(
+            size=stat.size,
+            modified_time=stat.modified_time,
+            etag=stat.etag,
+            mime_type=stat.mime_type,
+            inode=stat.inode,
+            is_file=getattr(stat, "is_file", True),
+            modified_time_ns=getattr(stat, "modified_time_ns", None),
+        )
+        if not isinstance(stat, StorageStat):
+            value.accessed_time = getattr(stat, "accessed_time", None)
+            value.created_time = getattr(stat, "created_time", None)
+        self.cache.set(self.get_key(storage, name), value, self.timeout)
+
+    def delete(self, storage, name):
+        """Invalidate metadata of file ``name`` in ``storage``."""
+        self.cache.delete(self.get_key(storage, name))
+
+
+def invalidate_field_files(metadata_cache, model=None):
+    """Invalidate metadata of ``model``'s files in ``metadata_cache`` when
+    instances are saved or deleted.
+
+    ``FieldFile.save()`` and ``FieldFile.delete()`` call the storage
+    directly, not :class:`~django_downloadview.files.StorageFile`, so that
+    their changes are otherwise only seen when entries expire. This connects
+    a receiver to ``post_save`` and ``post_delete`` signals of ``model`` (of
+    all models if ``None``), which invalidates files of its ``FileField``.
+    Call it once, e.g. in ``AppConfig.ready()``. Returns the receiver.
+
+    Files saved with ``save=False`` are invalidated when the instance is
+    saved.
+
+    """
+
+    def receiver(sender, instance, **kwargs):
+        for field in instance._meta.concrete_fields:
+            if not isinstance(field, FileField):
+                continue
+            field_file = getattr(instance, field.attname)
+            if field_file:
+                metadata_cache.delete(field_file.storage, field_file.name)
+
+    post_save.connect(receiver, sender=model, weak=False)
+    post_delete.connect(receiver, sender=model, weak=False)
+    return receiver
+
+
+class MappedMetadataCache(object):
+    """Cache of file metadata in a memory-mapped file, shared by processes.
+
+    All worker processes of a host which use the same ``path`` share the
+    cache, so that a file is stat'ed once per host rather than once per
+    worker. Same interface as :class:`MetadataCache`, to be used as
+    ``metadata_cache`` of download views and file wrappers.
+
+    The cache is a fixed-size hash table of ``slots`` entries, holding size,
+    modification time, inode, ETag and MIME type of files. Each key may live
+    in any of ``probe_length`` consecutive slots: when they are all used, the
+    oldest entry is evicted. Entries expire after ``timeout`` seconds.
+
+    Reads are lock-free: each slot has a sequence number, which writers make
+    odd while they update the slot. Readers which see an odd or changing
+    sequence number treat the entry as missing. Writers are serialized with
+    an advisory lock on the file (where :mod:`fcntl` is available).
+
+    All processes must use the same ``slots`` for a given ``path``.
+
+    """
+
+    #: Identifies files created by this class, and their layout version.
+    magic = b"DDVSTAT1"
+
+    #: Header: magic, number of slots.
+    header = struct.Struct("<8sQ")
+
+    #: Size of header, in bytes.
+    header_size = 64
+
+    #: Slot: sequence number, key, storage time, size, modification time (in
+    #: microseconds since epoch), timezone flag, inode, ETag, MIME type.
+    slot = struct.Struct("<Q16sdqqBQB95sB95s")
+
+    #: Size of slots, in bytes. Multiple of 8 so that sequence numbers are
+    #: aligned.
+    slot_size = 256
+
+    #: Values of timezone flag.
+    NO_TIME, NAIVE_TIME, UTC_TIME = 0, 1, 2
+
+    def __init__(self, path, slots=4096, timeout=5, probe_length=8):
+        """Constructor.
+
+        path:
+          Path of the file backing the cache. Created if missing, e.g. in
+          ``/dev/shm`` to keep it in memory.
+
+        slots:
+          Maximum number of entries.
+
+        timeout:
+          Lifetime of entries in seconds. Files modified by other means than
+          :class:`~django_downloadview.files.StorageFile` are served with
+          stale metadata until entries expire.
+
+        probe_length:
+          Number of slots where an entry may live.
+
+        """
+        self.path = path
+        self.slots = slots
+        self.timeout = timeout
+        self.probe_length = min(probe_length, slots)
+        self._mmap = None
+        self._fd = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        """Size of the backing file, in bytes."""
+        return self.header_size + self.slots * self.slot_size
+
+    def _open(self):
+        """Return memory map of backing file, created on first call.
+
+        The file is opened again in forked processes, since file locks are
+        shared by processes which share a file descriptor.
+
+        """
+        if self._mmap is not None and self._pid == os.getpid():
+            return self._mmap
+        with self._lock:
+            if self._mmap is None or self._pid != os.getpid():
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+                try:
+                    with self._file_lock(fd):
+                        self._initialize(fd)
+                    self._mmap = mmap.mmap(fd, self.size)
+                except BaseException:
+                    os.close(fd)
+                    raise
+                self._fd = fd
+                self._pid = os.getpid()
+        return self._mmap
+
+    def _initialize(self, fd):
+        """Write header of backing file ``fd`` if it is new, else check it."""
+        header = os.pread(fd, self.header.size, 0)
+        if header == b"" or header == b"\0" * self.header.size:
+            os.ftruncate(fd, self.size)
+            os.pwrite(fd, self.header.pack(self.magic, self.slots), 0)
+            return
+        if header != self.header.pack(self.magic, self.slots):
+            raise ValueError(
+                f'"{self.path}" is not a metadata cache with {self.slots} slots'
+            )
+
+    @contextmanager
+    def _file_lock(self, fd):
+        """Hold exclusive lock on backing file ``fd``."""
+        if fcntl is None:  # pragma: no cover
+            yield
+            return
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _write_lock(self):
+        """Hold lock to update slots, against threads and processes."""
+        mapping = self._open()
+        with self._lock, self._file_lock(self._fd):
+            yield mapping
+
+    def close(self):
+        """Unmap and close backing file."""
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                os.close(self._fd)
+                self._mmap = self._fd = None
+
+    def get_key(self, storage, name):
+        """Return 16-bytes key for file ``name`` in ``storage``.
+
+        ``storage`` is ``None`` for files on local filesystem.
+
+        """
+        storage_id = "path" if storage is None else get_storage_id(storage)
+        identity = f"{storage_id}\0{name}"
+        return hashlib.blake2b(identity.encode("utf-8"), digest_size=16).digest()
+
+    def _offsets(self, key):
+        """Yield offsets of slots where ``key`` may live."""
+        start = int.from_bytes(key[:8], "little") % self.slots
+        for index in range(self.probe_length):
+            slot = (start + index) % self.slots
+            yield self.header_size + slot * self.slot_size
+
+    def _read(self, mapping, offset):
+        """Return fields of slot at ``offset``, or ``None`` if it is being
+        written."""
+        data = mapping[offset : offset + self.slot.size]
+        fields = self.slot.unpack(data)
+        sequence = fields[0]
+        if sequence % 2 or struct.unpack_from("<Q", mapping, offset)[0] != sequence:
+            return None
+        return fields
+
+    def _write(self, mapping, offset, *fields):
+        """Write ``fields`` to slot at ``offset``. Caller holds write lock."""
+        sequence = struct.unpack_from("<Q", mapping, offset)[0]
+        if sequence % 2:  # Writer died in the middle of an update.
+            sequence += 1
+        struct.pack_into("<Q", mapping, offset, sequence + 1)
+        self.slot.pack_into(mapping, offset, sequence + 1, *fields)
+        struct.pack_into("<Q", mapping, offset, sequence + 2)
+
+    def get(self, storage, name):
+        """Return :class:`~django_downloadview.files.FileStat` of file ``name``
+        in ``storage``, or ``None``."""
+        key = self.get_key(storage, name)
+        mapping = self._open()
+        for offset in self._offsets(key):
+            fields = self._read(mapping, offset)
+            if fields is None or fields[1] != key:
+                continue
+            if time.time() - fields[2] > self.timeout:
+                return None
+            return self._decode(fields)
+        return None
+
+    def set(self, storage, name, stat):
+        """Store metadata ``stat`` of file ``name`` in ``storage``.
+
+        Only size, modification time, ETag, MIME type and inode are stored:
+        :class:`~django_downloadview.files.StorageFile` asks the storage for
+        access and creation times when needed. Metadata which do not fit in a
+        slot (ETags or MIME types longer than 95 bytes) are not stored.
+
+        """
+        fields = self._encode(stat)
+        if fields is None:
+            return
+        key = self.get_key(storage, name)
+        now = time.time()
+        with self._write_lock() as mapping:
+            target = None
+            oldest = None
+            for offset in self._offsets(key):
+                current = self.slot.unpack_from(mapping, offset)
+                if current[1] == key:
+                    target = offset
+                    break
+                if target is None and current[1] == EMPTY_KEY:
+                    target = offset
+                elif oldest is None or current[2] < oldest[0]:
+                    oldest = (current[2], offset)
+            if target is None:
+                target = oldest[1]
+            self._write(mapping, target, key, now, *fields)
+
+    def delete(self, storage, name):
+        """Invalidate metadata of file ``name`` in ``storage``."""
+        key = self.get_key(storage, name)
+        with self._write_lock() as mapping:
+            for offset in self._offsets(key):
+                if self.slot.unpack_from(mapping, offset)[1] == key:
+                    self._write(mapping, offset, *self._empty_fields())
+
+    def clear(self):
+        """Remove all entries."""
+        with self._write_lock() as mapping:
+            for index in range(self.slots):
+                offset = self.header_size + index * self.slot_size
+                self._write(mapping, offset, *self._empty_fields())
+
+    def _empty_fields(self):
+        """Return fields of an empty slot, except sequence number."""
+        return (EMPTY_KEY, 0.0, -1, 0, self.NO_TIME, 0, 0, b"", 0, b"")
+
+    def _encode(self, stat):
+        """Return slot fields for ``stat``, from size to MIME type, or
+        ``None`` if they do not fit."""
+        size = -1 if stat.size is None else int(stat.size)
+        modified_time = stat.modified_time
+        if modified_time is None:
+            timestamp, time_flag = 0, self.NO_TIME
+        elif modified_time.tzinfo is None:
+            timestamp = (modified_time - EPOCH) // MICROSECOND
+            time_flag = self.NAIVE_TIME
+        else:
+            timestamp = (modified_time - UTC_EPOCH) // MICROSECOND
+            time_flag = self.UTC_TIME
+        inode = stat.inode or 0
+        texts = []
+        for text in (stat.etag, stat.mime_type):
+            data = (text or "").encode("utf-8")
+            if len(data) > 95:
+                return None
+            texts.extend([len(data), data])
+        return (size, timestamp, time_flag, inode, *texts)
+
+    def _decode(self, fields):
+        """Return :class:`~django_downloadview.files.FileStat` from slot
+        ``fields``."""
+        (
+            _,
+            _,
+            _,
+            size,
+            timestamp,
+            time_flag,
+            inode,
+            etag_length,
+            etag,
+            mime_type_length,
+            mime_type,
+        ) = fields
+        modified_time = None
+        if time_flag == self.NAIVE_TIME:
+            modified_time = EPOCH + timestamp * MICROSECOND
+        elif time_flag == self.UTC_TIME:
+            modified_time = UTC_EPOCH + timestamp * MICROSECOND
+        return FileStat(
+            size=None if size < 0 else size,
+            modified_time=modified_time,
+            etag=etag[:etag_length].decode("utf-8") or None,
+            mime_type=mime_type[:mime_type_length].decode("utf-8") or None,
+            inode=inode or None,
+        )
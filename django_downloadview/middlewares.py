@@ -11,7 +11,9 @@ import os
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
+from django.http.response import ResponseHeaders
 
+from django_downloadview.files import SpooledFile
 from django_downloadview.response import DownloadResponse
 from django_downloadview.utils import import_member
 
@@ -190,6 +192,67 @@ class ProxiedDownloadMiddleware(RealDownloadMiddleware):
         self.source_url = source_url
         self.destination_url = destination_url
 
+    def is_download_response(self, response):
+        """Return True for responses the reverse proxy can serve.
+
+        Files deleted when the response is closed, such as
+        :class:`~django_downloadview.files.SpooledFile` with ``delete=True``,
+        could be gone before the reverse proxy reads them: Django streams
+        them.
+
+        """
+        file_instance = getattr(response, "file", None)
+        if isinstance(file_instance, SpooledFile) and file_instance.delete:
+            return False
+        return super().is_download_response(response)
+
+    def process_response(self, request, response):
+        """Replace download ``response``, if any, by a proxied response.
+
+        The replaced response is never closed by Django: its resources, such
+        as its file wrapper, are released when the proxied response is
+        closed.
+
+        """
+        proxied_response = super().process_response(request, response)
+        if proxied_response is not response:
+            proxied_response._resource_closers.extend(response._resource_closers)
+            response._resource_closers = []
+        return proxied_response
+
+    def get_headers(self, response):
+        """Return headers of ``response`` to carry over the proxied response.
+
+        Headers related to byte ranges are dropped: the reverse proxy handles
+        "Range" requests on its own, against the whole file.
+
+        Headers related to compression while streaming are dropped too: the
+        reverse proxy serves the file as is.
+
+        """
+        headers = ResponseHeaders(dict(response.headers.items()))
+        if "Content-Range" in headers:
+            headers.pop("Content-Range")
+            headers.pop("Content-Length", None)
+        if getattr(response, "boundary", None):
+            # multipart/byteranges content.
+            headers.pop("Content-Type", None)
+            headers.pop("Content-Length", None)
+        if getattr(response, "compression", None):
+            headers.pop("Content-Encoding", None)
+            headers.pop("ETag", None)
+        return headers
+
+    def get_content_type(self, response):
+        """Return "Content-Type" of the file wrapped into ``response``.
+
+        For ``multipart/byteranges`` responses, it is the type of each part.
+
+        """
+        if getattr(response, "boundary", None):
+            return response.part_content_type
+        return response["Content-Type"]
+
     def get_redirect_url(self, response):
         """Return redirect URL for file wrapped into response."""
         url = None
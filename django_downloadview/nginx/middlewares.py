@@ -79,13 +79,13 @@ class XAccelRedirectMiddleware(ProxiedDownloadMiddleware):
                 expires = None
         return XAccelRedirectResponse(
             redirect_url=redirect_url,
-            content_type=response["Content-Type"],
+            content_type=self.get_content_type(response),
             basename=response.basename,
             expires=expires,
             with_buffering=self.with_buffering,
             limit_rate=self.limit_rate,
             attachment=response.attachment,
-            headers=response.headers,
+            headers=self.get_headers(response),
         )
 
 
@@ -0,0 +1,245 @@
+"""Cache of open file descriptors, shared by requests.
+
+Equivalent of Nginx's ``open_file_cache``: hot files are opened once, and
+their descriptor is shared by concurrent downloads, which read it with
+:func:`os.pread` so that they never move its offset.
+
+"""
+
+import collections
+from datetime import timezone
+import io
+import os
+import threading
+import time
+
+from django_downloadview.files import FileStat
+
+
+class OpenFile(object):
+    """Open descriptor of a file, with metadata it was opened with."""
+
+    def __init__(self, path, fd, stat):
+        #: Path of the file.
+        self.path = path
+
+        #: File descriptor.
+        self.fd = fd
+
+        #: :class:`~django_downloadview.files.FileStat` from :func:`os.fstat`.
+        self.stat = stat
+
+        #: Number of :class:`SharedFile` instances using the descriptor.
+        self.users = 0
+
+        #: Whether the entry left the cache. Descriptor is closed once it has
+        #: no users.
+        self.evicted = False
+
+        #: Last time the descriptor was handed out, for expiration.
+        self.used_time = time.monotonic()
+
+    def matches(self, stat):
+        """Return True if ``stat`` describes the opened file, i.e. file was
+        neither replaced (inode) nor modified (size, modification time).
+
+        Modification times are compared as integer nanoseconds if ``stat``
+        has them, i.e. if it comes from :func:`os.stat`. Else, e.g. for
+        metadata read from a
+        :class:`~django_downloadview.metadata.MappedMetadataCache`, they are
+        compared as datetimes, with microsecond precision.
+
+        """
+        if stat.inode is not None and stat.inode != self.stat.inode:
+            return False
+        if stat.size != self.stat.size:
+            return False
+        modified_time_ns = getattr(stat, "modified_time_ns", None)
+        if modified_time_ns is not None:
+            return modified_time_ns == self.stat.modified_time_ns
+        modified_time = stat.modified_time
+        if modified_time is None:
+            return False
+        # Naive datetimes are in local time, as from datetime.fromtimestamp().
+        return modified_time.astimezone(timezone.utc) == self.stat.modified_time
+
+
+class SharedFile(io.RawIOBase):
+    """Read-only, seekable file object around a shared descriptor.
+
+    Each instance has its own position: content is read with
+    :func:`os.pread` or :func:`os.preadv`, which do not move the descriptor's
+    offset. The offset thus stays at 0.
+
+    The descriptor is exposed via ``fileno()``, so that servers stream whole
+    files with ``sendfile(2)``. They must send it from explicit offsets, as
+    :func:`os.sendfile` does, never with ``read()``, which would move the
+    offset of all users. As an example, gunicorn sends from the current
+    offset and restores it afterwards.
+
+    """
+
+    mode = "rb"
+
+    def __init__(self, cache, entry):
+        super().__init__()
+        self.cache = cache
+        self.entry = entry
+        self.name = entry.path
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def fileno(self):
+        """Return the shared descriptor. Do not move its offset."""
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        return self.entry.fd
+
+    def read(self, size=-1):
+        """Read at most ``size`` bytes, or until end of file."""
+        if size is None or size < 0:
+            size = max(self.entry.stat.size - self.position, 0)
+        data = os.pread(self.entry.fd, size, self.position)
+        self.position += len(data)
+        return data
+
+    def readinto(self, buffer):
+        """Read bytes into pre-allocated ``buffer``, return their number.
+
+        Bytes are read in place with :func:`os.preadv` where available.
+
+        """
+        if hasattr(os, "preadv"):
+            count = os.preadv(self.entry.fd, [buffer], self.position)
+        else:
+            data = os.pread(self.entry.fd, len(buffer), self.position)
+            count = len(data)
+            buffer[:count] = data
+        self.position += count
+        return count
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.entry.stat.size
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self.position = offset
+        return self.position
+
+    def tell(self):
+        return self.position
+
+    def close(self):
+        """Release the shared descriptor."""
+        if not self.closed:
+            self.cache.release(self.entry)
+        super().close()
+
+
+class OpenFileCache(object):
+    """Bounded cache of open file descriptors.
+
+    At most ``maxsize`` descriptors are kept open. Least recently used ones
+    are evicted first, and descriptors unused for ``timeout`` seconds are
+    closed. Descriptors still in use are closed when their last user is.
+
+    Entries are validated against metadata of files (inode, size and
+    modification time), so that replaced or modified files are opened again.
+
+    """
+
+    def __init__(self, maxsize=256, timeout=60):
+        """Constructor.
+
+        maxsize:
+          Maximum number of cached descriptors.
+
+        timeout:
+          Time in seconds after which unused descriptors are closed.
+
+        """
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def open(self, path, stat=None):
+        """Return :class:`SharedFile` reading file at ``path``.
+
+        ``stat`` is current :class:`~django_downloadview.files.FileStat` of
+        the file, as known by caller. If ``None``, the file is stat'ed.
+
+        """
+        if stat is None:
+            stat = FileStat.from_os_stat(os.stat(path))
+        with self._lock:
+            self._prune()
+            entry = self._entries.get(path)
+            if entry is not None and not entry.matches(stat):
+                self._evict(path)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(path)
+                entry.users += 1
+                entry.used_time = time.monotonic()
+                return SharedFile(self, entry)
+        fd = os.open(path, os.O_RDONLY)
+        entry = OpenFile(path, fd, FileStat.from_os_stat(os.fstat(fd)))
+        entry.users = 1
+        with self._lock:
+            if path in self._entries:  # Opened concurrently.
+                self._evict(path)
+            if entry.matches(stat):
+                self._entries[path] = entry
+                while len(self._entries) > self.maxsize:
+                    self._evict(next(iter(self._entries)))
+            else:  # File changed since stat: do not share descriptor.
+                entry.evicted = True
+        return SharedFile(self, entry)
+
+    def release(self, entry):
+        """Release ``entry`` used by a :class:`SharedFile`."""
+        with self._lock:
+            entry.users -= 1
+            if entry.evicted and entry.users <= 0:
+                os.close(entry.fd)
+
+    def clear(self):
+        """Evict all entries."""
+        with self._lock:
+            for path in list(self._entries):
+                self._evict(path)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self, path):
+        """Remove entry for ``path``. Caller holds the lock."""
+        entry = self._entries.pop(path)
+        entry.evicted = True
+        if entry.users <= 0:
+            os.close(entry.fd)
+
+    def _prune(self):
+        """Evict entries unused for :attr:`timeout`. Caller holds the lock.
+
+        Entries are sorted by last use, so that only expired ones and the
+        first recent one are visited.
+
+        """
+        deadline = time.monotonic() - self.timeout
+        expired = []
+        for path, entry in self._entries.items():
+            if entry.used_time >= deadline:
+                break
+            if entry.users <= 0:
+                expired.append(path)
+        for path in expired:
+            self._evict(path)
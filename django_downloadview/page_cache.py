@@ -0,0 +1,104 @@
+"""Page cache hints for files streamed from local filesystem.
+
+Hints are given with :func:`os.posix_fadvise`. They are ignored on platforms
+which do not support it.
+
+"""
+
+import os
+
+#: Whether :func:`os.posix_fadvise` is available.
+HAS_FADVISE = hasattr(os, "posix_fadvise")
+
+
+class PageCachePolicy(object):
+    """Policy of page cache usage while streaming a file.
+
+    >>> from django_downloadview.page_cache import PageCachePolicy
+    >>> policy = PageCachePolicy(drop_behind_size=100 * 1024 * 1024)
+    >>> policy.drops_behind(1024)
+    False
+    >>> policy.drops_behind(1024 * 1024 * 1024)
+    True
+
+    """
+
+    def __init__(
+        self,
+        sequential=True,
+        willneed=False,
+        drop_behind_size=None,
+        drop_behind_window=8 * 1024 * 1024,
+    ):
+        """Constructor.
+
+        sequential:
+          Whether to advise ``POSIX_FADV_SEQUENTIAL`` when streaming starts,
+          i.e. aggressive read-ahead.
+
+        willneed:
+          Whether to advise ``POSIX_FADV_WILLNEED`` when streaming starts,
+          i.e. read the whole file in page cache in background. Better kept
+          for small or medium files.
+
+        drop_behind_size:
+          Minimum size of files, in bytes, whose pages are dropped from page
+          cache (``POSIX_FADV_DONTNEED``) once streamed. ``None`` (the
+          default) keeps pages of all files.
+
+        drop_behind_window:
+          Number of streamed bytes between two drops.
+
+        """
+        self.sequential = sequential
+        self.willneed = willneed
+        self.drop_behind_size = drop_behind_size
+        self.drop_behind_window = drop_behind_window
+
+    def advise(self, fd, offset, length, advice):
+        """Call :func:`os.posix_fadvise`, ignoring errors and unsupported
+        platforms."""
+        if not HAS_FADVISE:  # pragma: no cover
+            return
+        try:
+            os.posix_fadvise(fd, offset, length, advice)
+        except OSError:
+            pass
+
+    def drops_behind(self, size):
+        """Return True if pages of a file of ``size`` bytes are dropped once
+        streamed."""
+        return (
+            self.drop_behind_size is not None
+            and size is not None
+            and size >= self.drop_behind_size
+        )
+
+    def start(self, fd):
+        """Give hints about descriptor ``fd``, which is about to be streamed."""
+        if not HAS_FADVISE:  # pragma: no cover
+            return
+        if self.sequential:
+            self.advise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        if self.willneed:
+            self.advise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+
+    def stream(self, fd, size, chunks):
+        """Generate ``chunks`` read sequentially from descriptor ``fd``,
+        dropping pages behind them if :meth:`drops_behind` ``size``."""
+        if not HAS_FADVISE or not self.drops_behind(size):
+            yield from chunks
+            return
+        offset = dropped = 0
+        for chunk in chunks:
+            yield chunk
+            offset += len(chunk)
+            if offset - dropped >= self.drop_behind_window:
+                self.advise(fd, dropped, offset - dropped, os.POSIX_FADV_DONTNEED)
+                dropped = offset
+
+    def finish(self, fd, size):
+        """Give hints about descriptor ``fd`` once streaming is over, i.e.
+        drop all pages if :meth:`drops_behind` ``size``."""
+        if HAS_FADVISE and self.drops_behind(size):
+            self.advise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
@@ -1,15 +1,28 @@
 """:py:class:`django.http.HttpResponse` subclasses."""
 
+import asyncio
+import functools
+import io
 import mimetypes
 import os
+import queue
 import re
+import threading
+import time
 import unicodedata
 from urllib.parse import quote
+import uuid
 
 from django.conf import settings
+from django.core.files.base import File
 from django.http import HttpResponse, StreamingHttpResponse
 from django.utils.encoding import force_str
 
+from django_downloadview.compression import compress_chunks
+from django_downloadview.digest import digest_headers
+from django_downloadview.io import coalesce_chunks, encode_chunks
+from django_downloadview.utils import is_binary_file
+
 
 def encode_basename_ascii(value):
     """Return US-ASCII encoded ``value`` for Content-Disposition header.
@@ -53,6 +66,41 @@ def encode_basename_utf8(value):
     return quote(force_str(value))
 
 
+@functools.lru_cache(maxsize=1024)
+def guess_type_by_suffixes(suffixes):
+    """Return ``(mime_type, encoding)`` for file name ``suffixes``.
+
+    Results of :func:`mimetypes.guess_type` are cached, so that only the first
+    download of each kind of file pays for the lookup.
+
+    >>> guess_type_by_suffixes('.tar.gz')
+    ('application/x-tar', 'gzip')
+
+    """
+    return mimetypes.guess_type(f"file{suffixes}")
+
+
+def guess_type(basename):
+    """Return ``(mime_type, encoding)`` of ``basename``.
+
+    Same as :func:`mimetypes.guess_type`, but results are cached by file
+    extension (see :func:`guess_type_by_suffixes`). Only the two last
+    suffixes are relevant, as in ``.tar.gz``.
+
+    >>> guess_type('hello-world.txt')
+    ('text/plain', None)
+    >>> guess_type('some.archive.tar.gz')
+    ('application/x-tar', 'gzip')
+    >>> guess_type('README')
+    (None, None)
+
+    """
+    root, last_suffix = os.path.splitext(basename)
+    root, suffix = os.path.splitext(root)
+    return guess_type_by_suffixes(suffix + last_suffix)
+
+
+@functools.lru_cache(maxsize=1024)
 def content_disposition(filename):
     """Return value of ``Content-Disposition`` header with 'attachment'.
 
@@ -70,6 +118,9 @@ def content_disposition(filename):
     >>> print(content_disposition(u'é.txt'))
     attachment; filename="e.txt"; filename*=UTF-8''%C3%A9.txt
 
+    Results are cached: normalization and quoting only run on the first
+    download of each filename.
+
     """
     if not filename:
         return "attachment"
@@ -90,6 +141,278 @@ def content_disposition(filename):
         )
 
 
+#: Default maximum number of ranges accepted in a "Range" header.
+MAX_RANGES = 16
+
+
+def parse_range_header(header, size, max_ranges=MAX_RANGES):
+    """Return list of ``(start, stop)`` byte ranges requested by ``header``.
+
+    ``header`` is the value of a ``Range`` request header, ``size`` is the
+    total size of the file in bytes. Ranges are returned as half-open
+    intervals, i.e. ``stop`` is excluded, and are clipped to ``size``.
+
+    >>> parse_range_header('bytes=0-9', 100)
+    [(0, 10)]
+    >>> parse_range_header('bytes=90-', 100)
+    [(90, 100)]
+    >>> parse_range_header('bytes=-5', 100)
+    [(95, 100)]
+    >>> parse_range_header('bytes=50-1000', 100)
+    [(50, 100)]
+    >>> parse_range_header('bytes=0-0, 10-19', 100)
+    [(0, 1), (10, 20)]
+
+    Overlapping and adjacent ranges are merged, in ascending order, so that
+    content is sent once.
+
+    >>> parse_range_header('bytes=50-59, 0-9, 5-19, 20-29', 100)
+    [(0, 30), (50, 60)]
+    >>> parse_range_header('bytes=0-, 0-, 0-', 100)
+    [(0, 100)]
+
+    Unsatisfiable ranges are skipped, so an empty list means the whole
+    header is unsatisfiable.
+
+    >>> parse_range_header('bytes=100-', 100)
+    []
+
+    ``None`` is returned if header is malformed or uses an unknown unit: in
+    that case, the header is to be ignored.
+
+    >>> parse_range_header('bytes=9-0', 100) is None
+    True
+    >>> parse_range_header('items=0-9', 100) is None
+    True
+
+    ``None`` is also returned if header lists more than ``max_ranges``
+    ranges, so that small requests cannot ask for huge responses.
+
+    >>> parse_range_header('bytes=0-0, 2-2, 4-4', 100, max_ranges=2) is None
+    True
+
+    """
+    unit, _, ranges_specifier = header.partition("=")
+    if unit.strip().lower() != "bytes" or not ranges_specifier:
+        return None
+    specifiers = ranges_specifier.split(",")
+    if max_ranges is not None and len(specifiers) > max_ranges:
+        return None
+    ranges = []
+    for specifier in specifiers:
+        first, dash, last = specifier.strip().partition("-")
+        if not dash:
+            return None
+        try:
+            if first:
+                start = int(first)
+                stop = int(last) + 1 if last else size
+                if start < 0 or (last and stop <= start):
+                    return None
+            else:
+                suffix_length = int(last)
+                if suffix_length < 0:
+                    return None
+                start = max(size - suffix_length, 0)
+                stop = size if suffix_length else 0
+        except ValueError:
+            return None
+        stop = min(stop, size)
+        if start < stop:
+            ranges.append((start, stop))
+    merged = []
+    for start, stop in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+        else:
+            merged.append((start, stop))
+    return merged
+
+
+def content_range(start, stop, size):
+    """Return value of ``Content-Range`` header for ``(start, stop)`` range.
+
+    >>> print(content_range(0, 10, 100))
+    bytes 0-9/100
+
+    """
+    return f"bytes {start}-{stop - 1}/{size}"
+
+
+async def iterate_in_thread(iterator, read_ahead=1):
+    """Asynchronously iterate over synchronous ``iterator``.
+
+    ``iterator`` is consumed in a worker thread, up to ``read_ahead`` items
+    ahead of the consumer: blocking reads overlap with sends to the client.
+    Each item is handed to the event loop on its own, so items should be
+    blocks rather than small fragments.
+
+    >>> async def consume():
+    ...     return [item async for item in iterate_in_thread(iter("abc"))]
+    >>> asyncio.run(consume())
+    ['a', 'b', 'c']
+
+    """
+    loop = asyncio.get_running_loop()
+    items = asyncio.Queue(maxsize=max(read_ahead, 1))
+    stopped = threading.Event()
+    end = object()
+
+    def put(item):
+        asyncio.run_coroutine_threadsafe(items.put(item), loop).result()
+
+    def produce():
+        try:
+            for item in iterator:
+                put((item, None))
+                if stopped.is_set():
+                    return
+        except Exception as exception:
+            if not stopped.is_set():
+                put((end, exception))
+        else:
+            if not stopped.is_set():
+                put((end, None))
+
+    producer = loop.run_in_executor(None, produce)
+    try:
+        while True:
+            item, exception = await items.get()
+            if exception is not None:
+                raise exception
+            if item is end:
+                break
+            yield item
+    finally:
+        # Unblock the producer, then wait for it: the iterator must not be
+        # consumed while the response closes the file.
+        stopped.set()
+        while not items.empty():
+            items.get_nowait()
+        await producer
+
+
+class ReadAheadThread(object):
+    """Worker thread which consumes ``iterator`` up to ``read_ahead`` items
+    ahead of the consumer, in a bounded queue.
+
+    Call :meth:`stop` when done, even if ``iterator`` is not exhausted.
+
+    """
+
+    #: Item returned by :meth:`get` once ``iterator`` is exhausted.
+    end = object()
+
+    def __init__(self, iterator, read_ahead=1):
+        self.iterator = iterator
+        self.items = queue.Queue(maxsize=max(read_ahead, 1))
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.produce, daemon=True)
+        self.thread.start()
+
+    def produce(self):
+        try:
+            for item in self.iterator:
+                self.items.put((item, None))
+                if self.stopped.is_set():
+                    return
+        except Exception as exception:
+            if not self.stopped.is_set():
+                self.items.put((self.end, exception))
+        else:
+            if not self.stopped.is_set():
+                self.items.put((self.end, None))
+
+    def get(self, timeout=None):
+        """Return next item, or :attr:`end`.
+
+        Raises :class:`queue.Empty` if no item comes within ``timeout``
+        seconds, and errors raised by ``iterator``.
+
+        """
+        item, exception = self.items.get(timeout=timeout)
+        if exception is not None:
+            raise exception
+        return item
+
+    def stop(self):
+        """Unblock the worker thread, then wait for it: the iterator must not
+        be consumed while the response closes the file."""
+        self.stopped.set()
+        while not self.items.empty():
+            self.items.get_nowait()
+        self.thread.join()
+
+
+def read_ahead_in_thread(iterator, read_ahead=1):
+    """Iterate over synchronous ``iterator``, consumed in a worker thread.
+
+    The worker thread keeps up to ``read_ahead`` items ahead of the consumer
+    in a bounded queue: blocking reads, e.g. from remote storages, overlap
+    with sends to the client. See :class:`ReadAheadThread`.
+
+    >>> list(read_ahead_in_thread(iter("abc")))
+    ['a', 'b', 'c']
+
+    """
+    reader = ReadAheadThread(iterator, read_ahead)
+    try:
+        while True:
+            item = reader.get()
+            if item is reader.end:
+                break
+            yield item
+    finally:
+        reader.stop()
+
+
+def coalesce_in_thread(chunks, block_size, max_latency, read_ahead=1):
+    """Generate ``chunks`` joined in blocks of at least ``block_size`` bytes,
+    holding content at most ``max_latency`` seconds.
+
+    Unlike :func:`~django_downloadview.io.coalesce_chunks`, the delay is
+    enforced while ``chunks`` is blocked: ``chunks`` is consumed in a worker
+    thread (see :class:`ReadAheadThread`), and pending content is sent once
+    ``max_latency`` seconds elapsed since its first byte was generated.
+
+    >>> list(coalesce_in_thread(iter([b"a", b"b", b"cde"]), 2, max_latency=60))
+    [b'ab', b'cde']
+
+    """
+    reader = ReadAheadThread(chunks, read_ahead)
+    pending = []
+    pending_size = 0
+    deadline = None
+    try:
+        while True:
+            timeout = None
+            if deadline is not None:
+                timeout = max(deadline - time.monotonic(), 0)
+            try:
+                chunk = reader.get(timeout)
+            except queue.Empty:
+                pass  # Deadline of pending content.
+            else:
+                if chunk is reader.end:
+                    break
+                if not chunk:
+                    continue
+                pending.append(chunk)
+                pending_size += len(chunk)
+                if deadline is None:
+                    deadline = time.monotonic() + max_latency
+                if pending_size < block_size and time.monotonic() < deadline:
+                    continue
+            yield pending[0] if len(pending) == 1 else b"".join(pending)
+            pending = []
+            pending_size = 0
+            deadline = None
+        if pending:
+            yield pending[0] if len(pending) == 1 else b"".join(pending)
+    finally:
+        reader.stop()
+
+
 class DownloadResponse(StreamingHttpResponse):
     """File download response (Django serves file, client downloads it).
 
@@ -118,12 +441,36 @@ class DownloadResponse(StreamingHttpResponse):
       :attr:`~django.http.StreamingHttpResponse.streaming_content`.
 
     * In :class:`DownloadResponse` and subclasses, :attr:`streaming_content`
-      is a :doc:`file wrapper </files>`. File wrapper is itself an iterator
-      over actual file content, and it also encapsulates access to file
-      attributes (size, name, ...).
+      iterates over a :doc:`file wrapper </files>` in blocks of
+      :attr:`chunk_size` bytes. File wrapper encapsulates access to actual
+      file content and to file attributes (size, name, ...).
+
+    * As :class:`django.http.FileResponse` does, :class:`DownloadResponse`
+      exposes :attr:`file_to_stream` to Django WSGI handler, which passes it
+      to the server's ``wsgi.file_wrapper``: servers such as gunicorn or
+      uWSGI then stream files from local filesystem with ``sendfile(2)``.
+
+    * Under ASGI, Django handler iterates over the response asynchronously:
+      see :meth:`__aiter__`.
 
     """
 
+    #: Size of blocks, in bytes, read from file wrapper and written to client.
+    chunk_size = File.DEFAULT_CHUNK_SIZE
+
+    #: Number of blocks read ahead of the client when the response is served
+    #: asynchronously (ASGI).
+    read_ahead = 4
+
+    #: Whether blocks are also read ahead in a worker thread when the
+    #: response is served synchronously (WSGI). See :meth:`__iter__`.
+    sync_read_ahead = False
+
+    #: Whether :class:`memoryview` chunks, such as slices generated by
+    #: :class:`~django_downloadview.files.MappedFile`, are sent as is instead
+    #: of being copied to :class:`bytes`. See :meth:`make_bytes`.
+    buffer_chunks = False
+
     def __init__(
         self,
         file_instance,
@@ -133,6 +480,13 @@ class DownloadResponse(StreamingHttpResponse):
         content_type=None,
         file_mimetype=None,
         file_encoding=None,
+        ranges=None,
+        chunk_size=None,
+        compression=None,
+        digest=None,
+        page_cache_policy=None,
+        max_latency=None,
+        read_ahead=None,
     ):
         """Constructor.
 
@@ -141,13 +495,104 @@ class DownloadResponse(StreamingHttpResponse):
                              populated by the response (default implementation
                              uses :mod:`mimetypes`, based on file name).
 
+        :param ranges: List of ``(start, stop)`` byte ranges to serve, as
+                       returned by :func:`parse_range_header`. If set, the
+                       response is a ``206 Partial Content`` one, with a
+                       ``multipart/byteranges`` body if there are several
+                       ranges. The file wrapper must be seekable.
+
+        :param chunk_size: Size of blocks, in bytes, read from file wrapper.
+                           If ``None``, :attr:`chunk_size` class attribute is
+                           used.
+
+        :param compression: Content-coding, such as ``"gzip"``, to compress
+                            content with while it is streamed. See
+                            :mod:`django_downloadview.compression`. Ignored
+                            if ``ranges`` are set.
+
+        :param digest: SHA-256 hexadecimal digest of the whole file, sent as
+                       "Repr-Digest" and "Digest" headers. Ignored if
+                       content is compressed on the fly.
+
+        :param page_cache_policy: Page cache policy to apply to file wrappers
+                                  backed by an OS file descriptor, when the
+                                  whole file is streamed. See
+                                  :mod:`django_downloadview.page_cache`.
+
+        :param max_latency: Maximum time, in seconds, content generated by
+                            file wrapper is held to fill a block. If set,
+                            content is read as it is generated, with file
+                            wrapper's ``read1()`` if available, in a worker
+                            thread. See :func:`coalesce_in_thread`.
+
+        :param read_ahead: Number of blocks read ahead of the client in a
+                           worker thread, whether the response is served
+                           synchronously or asynchronously. Up to
+                           ``read_ahead`` blocks of :attr:`chunk_size` bytes
+                           are held in memory. If ``None``, only asynchronous
+                           responses read ahead, with :attr:`read_ahead`
+                           class attribute. ``0`` disables synchronous
+                           read-ahead.
+
         """
         #: A :doc:`file wrapper instance </files>`, such as
         #: :class:`~django.core.files.base.File`.
         self.file = file_instance
+
+        if chunk_size is not None:
+            self.chunk_size = chunk_size
+
+        #: Maximum time, in seconds, content is held to fill a block, or
+        #: ``None``.
+        self.max_latency = max_latency
+
+        if read_ahead is not None:
+            self.read_ahead = read_ahead
+            self.sync_read_ahead = read_ahead > 0
+
+        #: List of ``(start, stop)`` byte ranges to serve, or ``None`` to
+        #: serve the whole file.
+        self.ranges = ranges
+
+        #: Boundary between parts of ``multipart/byteranges`` content.
+        #: ``None`` unless several ranges are served.
+        self.boundary = None
+
+        #: Content-coding content is compressed with while streamed, or
+        #: ``None``.
+        self.compression = None if self.ranges else compression
+
+        #: SHA-256 hexadecimal digest of file content, or ``None``.
+        self.digest = None if self.compression else digest
+
+        #: Page cache policy applied while the whole file is streamed, or
+        #: ``None``.
+        self.page_cache_policy = None if self.ranges else page_cache_policy
+        if self.ranges:
+            status = 206
+            if len(self.ranges) > 1:
+                self.boundary = uuid.uuid4().hex
+                streaming_content = self.iter_byteranges()
+            else:
+                streaming_content = self.iter_range(*self.ranges[0])
+        elif self.compression:
+            streaming_content = compress_chunks(
+                map(self.make_bytes, self.iter_chunks()), self.compression
+            )
+        else:
+            streaming_content = self.iter_chunks()
         super().__init__(
-            streaming_content=self.file, status=status, content_type=content_type
+            streaming_content=streaming_content,
+            status=status,
+            content_type=content_type,
         )
+        # Keep track of file content, in case middlewares replace it.
+        self._file_iterator = self._iterator
+        if self.page_cache_policy is not None:
+            self._resource_closers.append(self.finish_page_cache)
+        if hasattr(self.file, "close"):
+            # Generator doesn't close the file wrapper: let Django do it.
+            self._resource_closers.append(self.file.close)
 
         #: Client-side name of the file to stream.
         #: Only used if ``attachment`` is ``True``.
@@ -157,7 +602,7 @@ class DownloadResponse(StreamingHttpResponse):
         #: Whether to return the file as attachment or not.
         #: Affects ``Content-Disposition`` header.
         self.attachment = attachment
-        if not content_type:
+        if not content_type or self.boundary:
             del self["Content-Type"]  # Will be set later.
 
         #: Value for file's mimetype.
@@ -170,6 +615,12 @@ class DownloadResponse(StreamingHttpResponse):
         #: :meth:`get_encoding`.
         self.file_encoding = file_encoding
 
+        #: Value for ``Content-Type`` header of each part in
+        #: ``multipart/byteranges`` content.
+        self.part_content_type = None
+        if self.boundary:
+            self.part_content_type = content_type or self.get_content_type()
+
         # Apply default headers.
         for header, value in self.default_headers.items():
             if header not in self:
@@ -192,16 +643,288 @@ class DownloadResponse(StreamingHttpResponse):
         except AttributeError:
             headers = {}
             headers["Content-Type"] = self.get_content_type()
-            try:
-                headers["Content-Length"] = self.file.size
-            except (AttributeError, NotImplementedError):
-                pass  # Generated files.
+            if self.boundary:
+                headers["Content-Type"] = (
+                    f"multipart/byteranges; boundary={self.boundary}"
+                )
+                headers["Content-Length"] = self.get_byteranges_length()
+            elif self.ranges:
+                start, stop = self.ranges[0]
+                headers["Content-Range"] = content_range(start, stop, self.file.size)
+                headers["Content-Length"] = stop - start
+            elif self.compression:
+                # Size of compressed content is unknown until it is streamed.
+                headers["Content-Encoding"] = self.compression
+            else:
+                try:
+                    headers["Content-Length"] = self.file.size
+                except (AttributeError, NotImplementedError):
+                    pass  # Generated files.
+            # Precompressed files are served with their content-coding.
+            content_encoding = getattr(self.file, "content_encoding", None)
+            if content_encoding and not self.compression:
+                headers["Content-Encoding"] = content_encoding
+            if self.digest:
+                headers.update(digest_headers(self.digest))
             if self.attachment:
                 basename = self.get_basename()
                 headers["Content-Disposition"] = content_disposition(basename)
             self._default_headers = headers
             return self._default_headers
 
+    def __iter__(self):
+        """Iterate over content, for WSGI servers.
+
+        If :attr:`sync_read_ahead` is set, content is read in a worker thread,
+        up to :attr:`read_ahead` blocks ahead of the client (see
+        :func:`read_ahead_in_thread`). The worker thread is stopped before
+        the file wrapper is closed.
+
+        """
+        parts = super().__iter__()
+        if not self.sync_read_ahead or self.is_async:
+            return parts
+        parts = read_ahead_in_thread(parts, self.read_ahead)
+        self._resource_closers.insert(0, parts.close)
+        return parts
+
+    async def __aiter__(self):
+        """Asynchronously iterate over content, for ASGI servers.
+
+        If file wrapper has an ``achunks(chunk_size)`` asynchronous generator
+        method, it is used to read the whole file natively.
+
+        Else, :attr:`streaming_content` is consumed in a worker thread, with
+        :attr:`read_ahead` blocks of read-ahead (see
+        :func:`iterate_in_thread`). Django's default implementation would read
+        the whole content in memory before sending it.
+
+        """
+        if self.is_async:
+            async for part in self.streaming_content:
+                yield part
+        elif (
+            not self.ranges
+            and not self.compression
+            and self._iterator is self._file_iterator
+            and hasattr(self.file, "achunks")
+        ):
+            async for chunk in self.file.achunks(self.chunk_size):
+                yield self.make_bytes(chunk)
+        else:
+            parts = iterate_in_thread(self.streaming_content, self.read_ahead)
+            try:
+                async for part in parts:
+                    yield part
+            finally:
+                await parts.aclose()
+
+    def make_bytes(self, value):
+        """Turn ``value`` into a bytestring, as Django does, unless
+        :attr:`buffer_chunks` is set and ``value`` is a :class:`memoryview`.
+
+        PEP 3333 and the ASGI specification require bytestrings: Django's
+        development server (``wsgiref``) and gunicorn reject other types.
+        Only set :attr:`buffer_chunks` with servers which write any
+        bytes-like object as is, such as uvicorn, whose protocols write
+        bodies to asyncio transports.
+
+        """
+        if self.buffer_chunks and isinstance(value, memoryview):
+            return value
+        return super().make_bytes(value)
+
+    @property
+    def block_size(self):
+        """Size of blocks read by the server's ``wsgi.file_wrapper``.
+
+        Same as :attr:`chunk_size`.
+
+        """
+        return self.chunk_size
+
+    @property
+    def file_to_stream(self):
+        """Return file wrapper to pass to ``wsgi.file_wrapper``, or ``None``.
+
+        Only file wrappers in binary mode, backed by an actual OS file
+        descriptor, can be streamed by the server, and only when the whole
+        file is served as is, i.e. neither partially nor compressed.
+        Otherwise, ``None`` is returned and the server iterates over
+        :attr:`streaming_content`.
+
+        The file descriptor is checked lazily, i.e. when the server asks for
+        it, so that responses replaced by middlewares do not open files.
+
+        ``None`` is also returned if :attr:`streaming_content` was replaced,
+        e.g. to compute a digest while content is streamed.
+
+        """
+        if self.ranges or self.compression:
+            return None
+        if self._iterator is not self._file_iterator:
+            return None
+        try:
+            if not is_binary_file(self.file):
+                return None
+        except (AttributeError, ValueError):
+            return None
+        fd = self.get_file_descriptor()
+        if fd is None:
+            return None
+        if self.page_cache_policy is not None:
+            self.page_cache_policy.start(fd)
+        return self.file
+
+    def get_file_descriptor(self):
+        """Return OS file descriptor of file wrapper, or ``None``.
+
+        Opens the file wrapper if needed.
+
+        """
+        try:
+            return self.file.fileno()
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            return None
+
+    def finish_page_cache(self):
+        """Apply :attr:`page_cache_policy` once the file has been streamed.
+
+        Does nothing if the file wrapper was not opened.
+
+        """
+        try:
+            if self.file.closed:
+                return
+        except (AttributeError, ValueError):
+            return
+        fd = self.get_file_descriptor()
+        if fd is not None:
+            self.page_cache_policy.finish(fd, self.file.size)
+
+    def iter_chunks(self):
+        """Generate file content in blocks of :attr:`chunk_size` bytes.
+
+        Uses file wrapper's ``chunks()`` if available, else ``read()``.
+        Unlike iterating over file wrapper, which splits content on newlines,
+        blocks have a fixed size (except the last one).
+
+        If :attr:`page_cache_policy` is set and file wrapper has a file
+        descriptor, the policy is applied while blocks are read.
+
+        """
+        if self.page_cache_policy is not None:
+            fd = self.get_file_descriptor()
+            if fd is not None:
+                self.page_cache_policy.start(fd)
+                yield from self.page_cache_policy.stream(
+                    fd, self.file.size, self.iter_file_chunks()
+                )
+                return
+        yield from self.iter_file_chunks()
+
+    def iter_file_chunks(self):
+        """Generate file content in blocks of :attr:`chunk_size` bytes,
+        without page cache policy.
+
+        Text content is encoded with response's charset, in blocks of
+        :attr:`chunk_size` characters: see
+        :func:`~django_downloadview.io.encode_chunks`. Smaller blocks, e.g.
+        fragments generated by file wrapper's ``chunks()``, are joined: see
+        :func:`~django_downloadview.io.coalesce_chunks`.
+
+        If :attr:`max_latency` is set, file wrapper is read in a worker thread,
+        so that pending content is sent in time even if file wrapper blocks:
+        see :func:`coalesce_in_thread`.
+
+        """
+        if self.max_latency is None:
+            chunks = encode_chunks(
+                self.read_file_chunks(), self.charset, self.chunk_size
+            )
+            return coalesce_chunks(chunks, self.chunk_size)
+        # Do not hold text fragments longer than max_latency either.
+        chunks = encode_chunks(self.read_file_chunks(), self.charset, 1)
+        return coalesce_in_thread(chunks, self.chunk_size, self.max_latency)
+
+    def read_file_chunks(self):
+        """Generate file content as read from file wrapper.
+
+        If :attr:`max_latency` is set and file wrapper has a ``read1()``
+        method, content is read as it is generated.
+
+        """
+        if self.max_latency is not None and hasattr(self.file, "read1"):
+            while True:
+                data = self.file.read1(self.chunk_size)
+                if not data:
+                    break
+                yield data
+            return
+        if hasattr(self.file, "chunks"):
+            yield from self.file.chunks(self.chunk_size)
+            return
+        while True:
+            data = self.file.read(self.chunk_size)
+            if not data:
+                break
+            yield data
+
+    def iter_range(self, start, stop):
+        """Generate file content between ``start`` and ``stop`` offsets.
+
+        Uses file wrapper's ``range_chunks()`` if available (see
+        :class:`~django_downloadview.files.MappedFile`). Else, seeks the file
+        wrapper, so that bytes before ``start`` are never read.
+
+        """
+        if hasattr(self.file, "range_chunks"):
+            yield from self.file.range_chunks(start, stop, self.chunk_size)
+            return
+        self.file.seek(start)
+        remaining = stop - start
+        while remaining > 0:
+            data = self.file.read(min(self.chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+    def get_part_header(self, start, stop):
+        """Return header of ``multipart/byteranges`` part, as bytes."""
+        return (
+            f"\r\n--{self.boundary}\r\n"
+            f"Content-Type: {self.part_content_type}\r\n"
+            f"Content-Range: {content_range(start, stop, self.file.size)}\r\n"
+            "\r\n"
+        ).encode("ascii")
+
+    def get_byteranges_footer(self):
+        """Return closing delimiter of ``multipart/byteranges`` content."""
+        return f"\r\n--{self.boundary}--\r\n".encode("ascii")
+
+    def get_byteranges_length(self):
+        """Return length of ``multipart/byteranges`` content.
+
+        Computed from :attr:`ranges`, without reading the file.
+
+        """
+        length = len(self.get_byteranges_footer())
+        for start, stop in self.ranges:
+            length += len(self.get_part_header(start, stop)) + stop - start
+        return length
+
+    def iter_byteranges(self):
+        """Generate ``multipart/byteranges`` content, one part per range.
+
+        Parts are built lazily, by seeking the file wrapper.
+
+        """
+        for start, stop in self.ranges:
+            yield self.get_part_header(start, stop)
+            yield from self.iter_range(start, stop)
+        yield self.get_byteranges_footer()
+
     def get_basename(self):
         """Return basename."""
         if self.basename:
@@ -217,12 +940,28 @@ class DownloadResponse(StreamingHttpResponse):
             return f"{self.get_mime_type()}; charset={self.get_charset()}"
 
     def get_mime_type(self):
-        """Return mime-type of the file."""
+        """Return mime-type of the file.
+
+        Uses :attr:`file_mimetype` if set, then MIME type reported by storage
+        in file wrapper's ``stat()``, then guesses it from basename.
+
+        The MIME type reported by storage is ignored for precompressed files,
+        since it is the one of the compressed file.
+
+        """
         if self.file_mimetype is not None:
             return self.file_mimetype
+        mime_type = None
+        if not getattr(self.file, "content_encoding", None):
+            try:
+                mime_type = self.file.stat().mime_type
+            except (AttributeError, NotImplementedError, OSError):
+                pass
+        if mime_type:
+            return mime_type
         default_mime_type = "application/octet-stream"
         basename = self.get_basename()
-        mime_type, encoding = mimetypes.guess_type(basename)
+        mime_type, encoding = guess_type(basename)
         return mime_type or default_mime_type
 
     def get_encoding(self):
@@ -230,7 +969,7 @@ class DownloadResponse(StreamingHttpResponse):
         if self.file_encoding is not None:
             return self.file_encoding
         basename = self.get_basename()
-        mime_type, encoding = mimetypes.guess_type(basename)
+        mime_type, encoding = guess_type(basename)
         return encoding
 
     def get_charset(self):
@@ -1,6 +1,10 @@
 """Utility functions that may be implemented in external packages."""
 
+import collections
+import io
 import re
+import threading
+import time
 
 charset_pattern = re.compile(r"charset=(?P<charset>.+)$", re.I | re.U)
 
@@ -32,6 +36,27 @@ def url_basename(url, content_type):
     return url.split("/")[-1]
 
 
+def is_binary_file(file_instance):
+    """Return True if content of file wrapper ``file_instance`` is bytes.
+
+    Wrappers which declare their ``mode``, such as
+    :class:`~django_downloadview.files.PathFile`, are not opened to tell it.
+
+    >>> import io
+    >>> from django.core.files.base import File
+    >>> from django_downloadview.utils import is_binary_file
+    >>> is_binary_file(File(io.BytesIO(b"Hello")))
+    True
+    >>> is_binary_file(File(io.StringIO("Hello")))
+    False
+
+    """
+    mode = getattr(file_instance, "mode", None)
+    if mode is not None:
+        return "b" in mode
+    return not isinstance(file_instance.file, io.TextIOBase)
+
+
 def import_member(import_string):
     """Import one member of Python module by path.
 
@@ -44,3 +69,111 @@ def import_member(import_string):
     module_name, factory_name = str(import_string).rsplit(".", 1)
     module = __import__(module_name, globals(), locals(), [factory_name], 0)
     return getattr(module, factory_name)
+
+
+def parse_accept_encoding(header):
+    """Return dictionary of content-codings and quality values in ``header``.
+
+    ``header`` is the value of an "Accept-Encoding" request header.
+
+    >>> from django_downloadview.utils import parse_accept_encoding
+    >>> parse_accept_encoding('gzip, br;q=0.5, zstd;q=0') == {
+    ...     'gzip': 1.0, 'br': 0.5, 'zstd': 0.0}
+    True
+
+    Malformed quality values are considered as ``0``.
+
+    >>> parse_accept_encoding('gzip;q=high')
+    {'gzip': 0.0}
+
+    """
+    codings = {}
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        name, _, value = params.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        codings[coding] = quality
+    return codings
+
+
+def accepts_encoding(codings, encoding):
+    """Return True if ``encoding`` is acceptable according to ``codings``.
+
+    ``codings`` is a dictionary, as returned by :func:`parse_accept_encoding`.
+
+    >>> from django_downloadview.utils import accepts_encoding
+    >>> accepts_encoding({'gzip': 1.0}, 'gzip')
+    True
+    >>> accepts_encoding({'gzip': 1.0}, 'br')
+    False
+    >>> accepts_encoding({'*': 1.0, 'br': 0.0}, 'br')
+    False
+    >>> accepts_encoding({'*': 0.5}, 'br')
+    True
+
+    """
+    return codings.get(encoding, codings.get("*", 0.0)) > 0
+
+
+class TimedLRUCache:
+    """Thread-safe mapping of at most ``maxsize`` items, which expire after
+    ``timeout`` seconds.
+
+    Least recently used items are evicted first.
+
+    >>> from django_downloadview.utils import TimedLRUCache
+    >>> cache = TimedLRUCache(maxsize=2, timeout=60)
+    >>> cache.set('a', 1)
+    >>> cache.set('b', 2)
+    >>> cache.get('a')
+    1
+    >>> cache.set('c', 3)  # Evicts 'b', the least recently used.
+    >>> cache.get('b') is None
+    True
+
+    """
+
+    def __init__(self, maxsize=1024, timeout=60):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return value for ``key``, or ``default`` if missing or expired."""
+        with self._lock:
+            try:
+                value, expires = self._items[key]
+            except KeyError:
+                return default
+            if expires < time.monotonic():
+                del self._items[key]
+                return default
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store ``value`` for ``key``, evicting least recently used items."""
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + self.timeout)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        """Remove ``key``, if present."""
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        """Remove all items."""
+        with self._lock:
+            self._items.clear()
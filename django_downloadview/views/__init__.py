@@ -1,9 +1,22 @@
 """Views to stream files."""
 
 # API shortcuts.
-from django_downloadview.views.base import BaseDownloadView, DownloadMixin  # NoQA
-from django_downloadview.views.http import HTTPDownloadView  # NoQA
-from django_downloadview.views.object import ObjectDownloadView  # NoQA
+from django_downloadview.views.base import (  # NoQA
+    AsyncBaseDownloadView,
+    BaseDownloadView,
+    DownloadMixin,
+)
+from django_downloadview.views.http import (  # NoQA
+    AsyncHTTPDownloadView,
+    HTTPDownloadView,
+)
+from django_downloadview.views.object import (  # NoQA
+    AsyncObjectDownloadView,
+    ObjectDownloadView,
+)
 from django_downloadview.views.path import PathDownloadView  # NoQA
-from django_downloadview.views.storage import StorageDownloadView  # NoQA
+from django_downloadview.views.storage import (  # NoQA
+    AsyncStorageDownloadView,
+    StorageDownloadView,
+)
 from django_downloadview.views.virtual import VirtualDownloadView  # NoQA
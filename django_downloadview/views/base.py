@@ -1,14 +1,35 @@
-"""Base material for download views: :class:`DownloadMixin` and
-:class:`BaseDownloadView`"""
+"""Base material for download views: :class:`DownloadMixin`,
+:class:`BaseDownloadView` and :class:`AsyncBaseDownloadView`"""
 
 import calendar
-
-from django.http import Http404, HttpResponseNotModified
+import io
+import os
+import re
+import time
+
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
 from django.views.generic.base import View
 from django.views.static import was_modified_since
 
 from django_downloadview import exceptions
-from django_downloadview.response import DownloadResponse
+from django_downloadview.compression import COMPRESSORS
+from django_downloadview.files import get_storage_id
+from django_downloadview.response import (
+    MAX_RANGES,
+    DownloadResponse,
+    parse_range_header,
+)
+from django_downloadview.utils import (
+    accepts_encoding,
+    is_binary_file,
+    parse_accept_encoding,
+)
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
 
 
 class DownloadMixin(object):
@@ -61,6 +82,80 @@ class DownloadMixin(object):
     #: :mod:`mimetypes`.
     encoding = None
 
+    #: Whether to serve byte ranges or not.
+    #:
+    #: When ``True`` (the default), "Range" request headers are honoured for
+    #: seekable file wrappers (see :meth:`is_seekable`): the view returns
+    #: "206 Partial Content" responses.
+    #:
+    #: When ``False``, "Range" request headers are ignored and the whole file
+    #: is always returned.
+    accept_ranges = True
+
+    #: Maximum number of ranges accepted in a "Range" header. Headers with
+    #: more ranges are ignored, i.e. the whole file is served.
+    max_ranges = MAX_RANGES
+
+    #: Size of blocks, in bytes, read from file and written to client.
+    #: If ``None`` (the default), then the :attr:`response's chunk size
+    #: <django_downloadview.response.DownloadResponse.chunk_size>` is used.
+    chunk_size = None
+
+    #: Maximum time, in seconds, generated content is held to fill a block
+    #: of :attr:`chunk_size` bytes. If ``None`` (the default), blocks are
+    #: full. See :func:`~django_downloadview.response.coalesce_in_thread`.
+    max_latency = None
+
+    #: Number of blocks of :attr:`chunk_size` bytes read ahead of the client
+    #: in a worker thread, so that slow reads, e.g. from remote storages,
+    #: overlap with sends. If ``None`` (the default), only responses served
+    #: asynchronously read ahead. See
+    #: :meth:`~django_downloadview.response.DownloadResponse.__iter__`.
+    read_ahead = None
+
+    #: Content-codings to compress content with while it is streamed, by
+    #: order of preference, such as ``("br", "gzip")``.
+    #:
+    #: Codings the client does not accept, or which are not available (see
+    #: :mod:`django_downloadview.compression`), are skipped.
+    #: Empty (the default) disables compression. Meant for generated content:
+    #: files stored on disk are better served precompressed.
+    compress_encodings = ()
+
+    #: Optional :class:`~django_downloadview.compression.CompressedCache`
+    #: instance, to store compressed content. Used only for files
+    #: :meth:`get_compressed_cache_key` returns a key for.
+    compressed_cache = None
+
+    #: Optional :class:`~django_downloadview.cache_control.CachePolicy`
+    #: instance, which sets "Cache-Control" and "Expires" headers of
+    #: responses. ``None`` (the default) sends no such headers.
+    cache_policy = None
+
+    #: Sequence of ``(pattern, policy)`` pairs, to apply specific cache
+    #: policies to some files. The first regular expression ``pattern`` found
+    #: in file's name selects ``policy``. Else :attr:`cache_policy` is used.
+    #:
+    #: As an example, ``[(r"\.[0-9a-f]{12}\.\w+$", CachePolicy(max_age=31536000,
+    #: public=True, immutable=True))]`` lets clients cache content-hashed
+    #: files forever.
+    cache_rules = ()
+
+    #: Optional :class:`~django_downloadview.digest.ChecksumIndex` instance,
+    #: to send "Repr-Digest" headers for files which have no ``sha256``
+    #: attribute. The index is filled the first time files are streamed.
+    checksum_index = None
+
+    #: Optional :class:`~django_downloadview.content_cache.ContentCache`
+    #: instance, to keep content of small files in memory. Cached files are
+    #: served without opening them. See :meth:`get_content_cache_key`.
+    content_cache = None
+
+    #: Optional :class:`~django_downloadview.page_cache.PageCachePolicy`
+    #: instance, to control page cache usage while files with an OS file
+    #: descriptor are streamed.
+    page_cache_policy = None
+
     def get_file(self):
         """Return a file wrapper instance.
 
@@ -123,46 +218,546 @@ class DownloadMixin(object):
             else:
                 return was_modified_since(since, modification_time)
 
+    def get_etag(self, file_instance):
+        """Return value of "ETag" header for ``file_instance``, or ``None``.
+
+        Uses file wrapper's ``etag`` attribute if available, typically a strong
+        ETag computed from a stored digest of file content (see
+        :attr:`~django_downloadview.views.object.ObjectDownloadView.etag_field`),
+        or the ETag reported by storage in file wrapper's ``stat()``.
+
+        Else, fallbacks to a weak ETag computed from file wrapper's ``size`` and
+        ``modified_time`` attributes. If file wrapper does not support these
+        attributes (``AttributeError`` or ``NotImplementedError`` is raised),
+        then ``None`` is returned.
+
+        Override this method if you need a custom ETag, or return ``None`` to
+        disable ETags.
+
+        """
+        try:
+            etag = file_instance.etag
+        except (AttributeError, NotImplementedError):
+            etag = None
+        if not etag:
+            try:
+                etag = file_instance.stat().etag
+            except (AttributeError, NotImplementedError, OSError):
+                etag = None
+        if etag:
+            return quote_etag(str(etag))
+        try:
+            size = int(file_instance.size)
+            modified_time = file_instance.modified_time
+            timestamp = calendar.timegm(modified_time.utctimetuple())
+        except (AttributeError, NotImplementedError, TypeError, ValueError):
+            return None
+        timestamp = timestamp * 1000000 + modified_time.microsecond
+        return f'W/"{timestamp:x}-{size:x}"'
+
+    def get_compressed_etag(self, etag, encoding):
+        """Return ETag of content with ``etag``, compressed with ``encoding``
+        while it is streamed.
+
+        Compressed content has its own, weak, ETag: compressed bytes may vary
+        from a response to another, and ranges of uncompressed content must
+        not be requested with it ("If-Range").
+
+        """
+        if etag.startswith("W/"):
+            etag = etag[2:]
+        return f'W/"{etag.strip(chr(34))}-{encoding}"'
+
+    def get_last_modified(self, file_instance):
+        """Return value of "Last-Modified" header for ``file_instance``.
+
+        Uses file wrapper's ``modified_time`` attribute. If file wrapper does
+        not support this attribute (``AttributeError`` or
+        ``NotImplementedError`` is raised), then ``None`` is returned.
+
+        """
+        try:
+            modified_time = file_instance.modified_time
+            return http_date(calendar.timegm(modified_time.utctimetuple()))
+        except (AttributeError, NotImplementedError, TypeError, ValueError):
+            return None
+
+    def last_modified_matches(self, file_instance, header):
+        """Return True if date in ``header`` is a strong validator for
+        ``file_instance``, as "If-Range" requires.
+
+        The date must be exactly the "Last-Modified" date of the file, and the
+        file must have been modified at least one second before now: else it
+        may have been modified again within the same second (see
+        :rfc:`9110#section-8.8.2.2`).
+
+        """
+        date = parse_http_date_safe(header)
+        if date is None:
+            return False
+        try:
+            modified_time = file_instance.modified_time
+            timestamp = calendar.timegm(modified_time.utctimetuple())
+        except (AttributeError, NotImplementedError, TypeError, ValueError):
+            return False
+        return date == timestamp and timestamp < int(time.time())
+
+    def etag_matches(self, etag, header, weak=True):
+        """Return True if ``etag`` matches one of ETags listed in ``header``.
+
+        ``header`` is the value of an "If-None-Match" or "If-Range" header.
+        Uses weak comparison by default, as required by "If-None-Match". With
+        ``weak=False``, only strong ETags can match, as required by "If-Range".
+
+        """
+        if etag is None:
+            return False
+        etags = parse_etags(header)
+        if not weak:
+            return not etag.startswith("W/") and etag in etags
+        if "*" in etags:
+            return True
+        opaque_tags = [tag[2:] if tag.startswith("W/") else tag for tag in etags]
+        return (etag[2:] if etag.startswith("W/") else etag) in opaque_tags
+
+    def get_cache_policy(self, file_instance):
+        """Return :class:`~django_downloadview.cache_control.CachePolicy` for
+        ``file_instance``, or ``None``.
+
+        Uses :attr:`cache_rules`, then :attr:`cache_policy`.
+
+        """
+        name = getattr(file_instance, "name", None)
+        if name:
+            for pattern, policy in self.cache_rules:
+                if re.search(pattern, str(name)):
+                    return policy
+        return self.cache_policy
+
+    def patch_cache_headers(self, response, file_instance):
+        """Add headers of :meth:`get_cache_policy` to ``response``."""
+        policy = self.get_cache_policy(file_instance)
+        if policy is not None:
+            policy.patch_response(response)
+        return response
+
     def not_modified_response(self, *response_args, **response_kwargs):
-        """Return :class:`django.http.HttpResponseNotModified` instance."""
-        return HttpResponseNotModified(*response_args, **response_kwargs)
+        """Return :class:`django.http.HttpResponseNotModified` instance.
+
+        As required by :rfc:`9110#section-15.4.5`, it carries the cache
+        headers a full response would have, see :meth:`patch_cache_headers`.
+
+        """
+        response = HttpResponseNotModified(*response_args, **response_kwargs)
+        file_instance = getattr(self, "file_instance", None)
+        return self.patch_cache_headers(response, file_instance)
+
+    def is_seekable(self, file_instance):
+        """Return True if byte ranges can be read from ``file_instance``.
+
+        File wrapper must be seekable, in binary mode, and have a known size.
+        Files generated on the fly, such as
+        :class:`~django_downloadview.io.BytesIteratorIO`, are not seekable.
+
+        Wrappers which declare their ``mode``, such as
+        :class:`~django_downloadview.files.PathFile` or
+        :class:`~django_downloadview.files.StorageFile`, are not opened to
+        tell it. Neither are unopened files of
+        :class:`~django.core.files.storage.FileSystemStorage`, such as
+        :class:`~django.db.models.fields.files.FieldFile`, which storages open
+        in binary mode.
+
+        """
+        try:
+            if getattr(file_instance, "_file", False) is None and isinstance(
+                getattr(file_instance, "storage", None), FileSystemStorage
+            ):
+                return file_instance.size is not None
+            if not is_binary_file(file_instance):
+                return False
+            return bool(file_instance.seekable()) and file_instance.size is not None
+        except (AttributeError, NotImplementedError, ValueError):
+            return False
+
+    def get_ranges(self, file_instance):
+        """Return list of byte ranges requested for ``file_instance``.
+
+        Returns ``None`` if the whole file is to be served, i.e. if there is
+        no "Range" header, if it is malformed or lists more than
+        :attr:`max_ranges` ranges, if it is outdated according to
+        "If-Range" header, or if ranges are not supported for ``file_instance``
+        (see :attr:`accept_ranges` and :meth:`is_seekable`).
+
+        Returns an empty list if requested ranges cannot be satisfied.
+
+        """
+        header = self.request.headers.get("range", None)
+        if header is None or not self.accept_ranges:
+            return None
+        if_range = self.request.headers.get("if-range", None)
+        if if_range is not None:
+            if if_range.startswith(('"', "W/")):
+                etag = self.get_etag(file_instance)
+                if not self.etag_matches(etag, if_range, weak=False):
+                    return None
+            elif not self.last_modified_matches(file_instance, if_range):
+                return None
+        if not self.is_seekable(file_instance):
+            return None
+        return parse_range_header(
+            header, int(file_instance.size), max_ranges=self.max_ranges
+        )
+
+    def range_not_satisfiable_response(self, file_instance):
+        """Return "416 Range Not Satisfiable" response for ``file_instance``."""
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{file_instance.size}"
+        return response
+
+    def get_compression(self, file_instance):
+        """Return content-coding to compress ``file_instance`` with, or
+        ``None``.
+
+        Picks the first of :attr:`compress_encodings` which is available and
+        accepted by the client, according to "Accept-Encoding" header. Files
+        which already have a ``content_encoding`` are not compressed.
+
+        """
+        if not self.compress_encodings:
+            return None
+        if getattr(file_instance, "content_encoding", None):
+            return None
+        header = self.request.headers.get("accept-encoding", "")
+        codings = parse_accept_encoding(header)
+        for encoding in self.compress_encodings:
+            if encoding in COMPRESSORS and accepts_encoding(codings, encoding):
+                return encoding
+        return None
+
+    def get_compressed_cache_key(self, file_instance):
+        """Return key identifying content of ``file_instance`` in
+        :attr:`compressed_cache`, or ``None``.
+
+        Default implementation returns ``None``, i.e. compressed content is
+        not cached. Override this method for deterministic content, e.g. to
+        return a name and a version of generated content.
+
+        """
+        return None
+
+    def get_content_cache_key(self, file_instance):
+        """Return key identifying ``file_instance`` in :attr:`content_cache`,
+        or ``None`` if it should not be cached.
+
+        Files are cached if they have a name and a known size up to
+        ``content_cache.max_file_size``. Entries are validated with
+        :meth:`get_etag`, i.e. by size and modification time by default.
+
+        """
+        if self.content_cache is None:
+            return None
+        name = getattr(file_instance, "name", None)
+        if not name:
+            return None
+        try:
+            size = int(file_instance.size)
+        except (AttributeError, NotImplementedError, OSError, TypeError):
+            return None
+        if size > self.content_cache.max_file_size:
+            return None
+        storage = getattr(file_instance, "storage", None)
+        storage_id = "path" if storage is None else get_storage_id(storage)
+        return (storage_id, str(name))
+
+    def get_digest(self, file_instance):
+        """Return SHA-256 hexadecimal digest of ``file_instance``, or ``None``.
+
+        Uses file wrapper's ``sha256`` attribute if any, then
+        :meth:`get_sidecar_digest`, then :attr:`checksum_index`.
+
+        """
+        digest = getattr(file_instance, "sha256", None)
+        if digest:
+            return digest
+        digest = self.get_sidecar_digest(file_instance)
+        if digest:
+            return digest
+        if self.checksum_index is not None:
+            return self.checksum_index.get(file_instance)
+        return None
+
+    def get_sidecar_digest(self, file_instance):
+        """Return SHA-256 hexadecimal digest read from a sidecar file of
+        ``file_instance``, such as "file.txt.sha256", or ``None``.
+
+        Default implementation returns ``None``: views which know where files
+        live override it.
+
+        """
+        return None
 
     def download_response(self, *response_args, **response_kwargs):
-        """Return :class:`~django_downloadview.response.DownloadResponse`."""
+        """Return :class:`~django_downloadview.response.DownloadResponse`.
+
+        Content is compressed if :meth:`get_compression` returns an encoding,
+        unless byte ranges are served. See :meth:`compressed_response`.
+
+        Cache headers are set with :meth:`patch_cache_headers`.
+
+        Digest headers are set with :meth:`get_digest`. If digest is unknown,
+        it is computed while the whole file is streamed, and stored in
+        :attr:`checksum_index`.
+
+        Content of small files is read from :attr:`content_cache` if
+        possible, else stored there while the whole file is streamed.
+
+        """
         response_kwargs.setdefault("file_instance", self.file_instance)
         response_kwargs.setdefault("attachment", self.attachment)
         response_kwargs.setdefault("basename", self.get_basename())
         response_kwargs.setdefault("file_mimetype", self.get_mimetype())
         response_kwargs.setdefault("file_encoding", self.get_encoding())
+        if self.chunk_size is not None:
+            response_kwargs.setdefault("chunk_size", self.chunk_size)
+        if self.max_latency is not None:
+            response_kwargs.setdefault("max_latency", self.max_latency)
+        if self.read_ahead is not None:
+            response_kwargs.setdefault("read_ahead", self.read_ahead)
+        if self.page_cache_policy is not None:
+            response_kwargs.setdefault("page_cache_policy", self.page_cache_policy)
+        file_instance = response_kwargs["file_instance"]
+        content_key = self.get_content_cache_key(file_instance)
+        validator = None
+        if content_key is not None:
+            validator = self.get_etag(file_instance)
+            content = None
+            if validator is not None:
+                content = self.content_cache.get(content_key, validator)
+            if content is not None:
+                file_instance.file = io.BytesIO(content)
+                content_key = None  # Nothing to store.
+        encoding = None
+        if not response_kwargs.get("ranges"):
+            encoding = self.get_compression(file_instance)
+        if encoding is not None:
+            response = self.compressed_response(
+                encoding, *response_args, **response_kwargs
+            )
+            return self.patch_cache_headers(response, file_instance)
+        digest = self.get_digest(file_instance)
+        if digest is not None:
+            response_kwargs.setdefault("digest", digest)
+        response = self.response_class(*response_args, **response_kwargs)
+        if (
+            digest is None
+            and self.checksum_index is not None
+            and not response_kwargs.get("ranges")
+            and self.checksum_index.get_key(file_instance) is not None
+        ):
+            response.streaming_content = self.checksum_index.tee(
+                file_instance, response.streaming_content
+            )
+        if (
+            content_key is not None
+            and validator is not None
+            and not response_kwargs.get("ranges")
+        ):
+            response.streaming_content = self.content_cache.tee(
+                content_key, validator, response.streaming_content
+            )
+        return self.patch_cache_headers(response, file_instance)
+
+    def compressed_response(self, encoding, *response_args, **response_kwargs):
+        """Return response with content compressed with ``encoding``.
+
+        If :attr:`compressed_cache` is set and
+        :meth:`get_compressed_cache_key` returns a key, cached content is
+        served if any, i.e. the file is neither generated nor compressed.
+        Else, compressed content is stored in cache while it is streamed.
+
+        """
+        file_instance = response_kwargs["file_instance"]
+        key = None
+        if self.compressed_cache is not None:
+            key = self.get_compressed_cache_key(file_instance)
+        if key is not None:
+            cached_entry = self.compressed_cache.get(key, encoding)
+            if cached_entry is not None:
+                cached_file = File(cached_entry, name=cached_entry.name)
+                cached_file.content_encoding = encoding
+                response_kwargs["file_instance"] = cached_file
+                if not response_kwargs["basename"]:
+                    response_kwargs["basename"] = os.path.basename(file_instance.name)
+                return self.response_class(*response_args, **response_kwargs)
+        response_kwargs["compression"] = encoding
         response = self.response_class(*response_args, **response_kwargs)
+        if key is not None:
+            response.streaming_content = self.compressed_cache.tee(
+                key, encoding, response.streaming_content
+            )
+        return response
+
+    def head_response(self, *response_args, **response_kwargs):
+        """Return response to HEAD request, i.e. headers without content.
+
+        Headers are the ones of :meth:`download_response`, which are computed
+        from file wrapper's metadata: the file is neither opened nor read.
+
+        File wrapper is closed in case computing headers opened it. The
+        download response itself is not closed, since closing responses
+        sends the ``request_finished`` signal.
+
+        """
+        download_response = self.download_response(*response_args, **response_kwargs)
+        response = HttpResponse(status=download_response.status_code)
+        for header, value in download_response.items():
+            response[header] = value
+        file_instance = getattr(download_response, "file", None)
+        if hasattr(file_instance, "close"):
+            file_instance.close()
         return response
 
     def file_not_found_response(self):
         """Raise Http404."""
         raise Http404()
 
+    def get_vary_headers(self):
+        """Return list of request headers the response depends on, for the
+        "Vary" response header.
+
+        Responses vary on "Accept-Encoding" if :attr:`compress_encodings` is
+        set.
+
+        """
+        if self.compress_encodings:
+            return ["Accept-Encoding"]
+        return []
+
     def render_to_response(self, *response_args, **response_kwargs):
         """Return "download" response (if everything is ok).
 
         Return :meth:`file_not_found_response` if file does not exist.
 
-        Respects the "HTTP_IF_MODIFIED_SINCE" header if any. In that case, uses
-        :py:meth:`was_modified_since` and :py:meth:`not_modified_response`.
-
-        Else, uses :py:meth:`download_response` to return a download response.
+        Else, uses :py:meth:`get_file` to assign :attr:`file_instance`, then
+        returns :py:meth:`conditional_response`, with "Vary" header from
+        :py:meth:`get_vary_headers`.
 
         """
         try:
             self.file_instance = self.get_file()
         except exceptions.FileNotFound:
             return self.file_not_found_response()
-        # Respect the If-Modified-Since header.
+        response = self.conditional_response(*response_args, **response_kwargs)
+        vary_headers = self.get_vary_headers()
+        if vary_headers:
+            patch_vary_headers(response, vary_headers)
+        return response
+
+    async def aget_file(self):
+        """Asynchronous version of :meth:`get_file`.
+
+        If :meth:`get_file` is a coroutine function, i.e. ``async def
+        get_file()``, it is awaited. Else it is run in a thread, via
+        :func:`asgiref.sync.sync_to_async`, so that it can use the ORM.
+
+        """
+        if iscoroutinefunction(self.get_file):
+            return await self.get_file()
+        return await sync_to_async(self.get_file)()
+
+    async def arender_to_response(self, *response_args, **response_kwargs):
+        """Asynchronous version of :meth:`render_to_response`.
+
+        Uses :py:meth:`aget_file` to assign :attr:`file_instance`.
+
+        File wrappers' metadata, such as size or modification time, are read
+        from storages synchronously. So :py:meth:`conditional_response` runs in
+        a single call to a worker thread, outside of Django's thread-sensitive
+        executor.
+
+        """
+        try:
+            self.file_instance = await self.aget_file()
+        except exceptions.FileNotFound:
+            return self.file_not_found_response()
+        response = await sync_to_async(
+            self.conditional_response, thread_sensitive=False
+        )(*response_args, **response_kwargs)
+        vary_headers = self.get_vary_headers()
+        if vary_headers:
+            patch_vary_headers(response, vary_headers)
+        return response
+
+    def conditional_response(self, *response_args, **response_kwargs):
+        """Return response for :attr:`file_instance`.
+
+        Respects the "HTTP_IF_NONE_MATCH" header if any. In that case, uses
+        :py:meth:`get_etag`, :py:meth:`etag_matches` and
+        :py:meth:`not_modified_response`, before the download response is
+        prepared.
+
+        Else, respects the "HTTP_IF_MODIFIED_SINCE" header if any. In that case,
+        uses :py:meth:`was_modified_since` and :py:meth:`not_modified_response`.
+
+        Respects the "HTTP_RANGE" header if any. In that case, uses
+        :py:meth:`get_ranges` to pass ``ranges`` to :py:meth:`download_response`
+        or to return :py:meth:`range_not_satisfiable_response`.
+
+        Else, uses :py:meth:`download_response` to return a download response,
+        or :py:meth:`head_response` for HEAD requests.
+
+        Content compressed while it is streamed (see :meth:`get_compression`)
+        has its own ETag, see :meth:`get_compressed_etag`, and is not
+        advertised with "Accept-Ranges".
+
+        """
+        etag = self.get_etag(self.file_instance)
+        encoding = self.get_compression(self.file_instance)
+        compressed_etag = etag
+        if etag is not None and encoding is not None:
+            compressed_etag = self.get_compressed_etag(etag, encoding)
+        last_modified = self.get_last_modified(self.file_instance)
+        # Respect the If-None-Match header, which takes precedence over the
+        # If-Modified-Since header.
+        if_none_match = self.request.headers.get("if-none-match", None)
         since = self.request.headers.get("if-modified-since", None)
-        if since is not None:
+        if if_none_match is not None:
+            if self.etag_matches(compressed_etag, if_none_match):
+                response = self.not_modified_response(**response_kwargs)
+                if compressed_etag is not None:
+                    response["ETag"] = compressed_etag
+                return response
+        # Respect the If-Modified-Since header.
+        elif since is not None:
             if not self.was_modified_since(self.file_instance, since):
                 return self.not_modified_response(**response_kwargs)
-        # Return download response.
-        return self.download_response(*response_args, **response_kwargs)
+        # Answer HEAD requests from file metadata.
+        ranges = None
+        if self.request.method == "HEAD":
+            # Before head_response() closes the file, in case it opens it.
+            seekable = self.is_seekable(self.file_instance)
+            response = self.head_response(*response_args, **response_kwargs)
+        else:
+            # Respect the Range header.
+            ranges = self.get_ranges(self.file_instance)
+            if ranges is not None:
+                if not ranges:
+                    return self.range_not_satisfiable_response(self.file_instance)
+                response_kwargs.setdefault("ranges", ranges)
+            # Return download response.
+            response = self.download_response(*response_args, **response_kwargs)
+            seekable = self.is_seekable(self.file_instance)
+        # Byte ranges are served uncompressed.
+        compressed = encoding is not None and not ranges
+        if compressed:
+            etag = compressed_etag
+        elif self.accept_ranges and seekable:
+            response["Accept-Ranges"] = "bytes"
+        if etag is not None:
+            response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = last_modified
+        return response
 
 
 class BaseDownloadView(DownloadMixin, View):
@@ -171,3 +766,16 @@ class BaseDownloadView(DownloadMixin, View):
     def get(self, request, *args, **kwargs):
         """Handle GET requests: stream a file."""
         return self.render_to_response()
+
+
+class AsyncBaseDownloadView(DownloadMixin, View):
+    """A base :class:`DownloadMixin` that implements asynchronous :meth:`get`.
+
+    Use it under ASGI: :meth:`~DownloadMixin.get_file` may be a coroutine
+    function, and the response is streamed asynchronously.
+
+    """
+
+    async def get(self, request, *args, **kwargs):
+        """Handle GET requests: stream a file."""
+        return await self.arender_to_response()
@@ -1,7 +1,9 @@
 """Stream files given an URL, i.e. files you want to proxy."""
 
+import functools
+
 from django_downloadview.files import HTTPFile
-from django_downloadview.views.base import BaseDownloadView
+from django_downloadview.views.base import AsyncBaseDownloadView, BaseDownloadView
 
 import requests
 
@@ -18,9 +20,13 @@ class HTTPDownloadView(BaseDownloadView):
     def get_request_factory(self):
         """Return request factory to perform actual HTTP request.
 
-        Default implementation returns :func:`requests.get` callable.
+        Default implementation returns :func:`requests.get` callable, or
+        :func:`requests.head` for HEAD requests, so that remote file's metadata
+        is fetched without streaming its content.
 
         """
+        if self.request.method == "HEAD":
+            return functools.partial(requests.head, allow_redirects=True)
         return requests.get
 
     def get_request_kwargs(self):
@@ -47,3 +53,13 @@ class HTTPDownloadView(BaseDownloadView):
             url=self.get_url(),
             **self.get_request_kwargs(),
         )
+
+
+class AsyncHTTPDownloadView(AsyncBaseDownloadView, HTTPDownloadView):
+    """Proxy files that live on remote servers, asynchronously.
+
+    The remote request is performed in a worker thread, and remote content is
+    streamed with read-ahead (see
+    :meth:`~django_downloadview.response.DownloadResponse.__aiter__`).
+
+    """
@@ -1,9 +1,12 @@
 """Stream files that live in models."""
 
+from django.http import Http404
+from django.utils.translation import gettext as _
 from django.views.generic.detail import SingleObjectMixin
 
 from django_downloadview.exceptions import FileNotFound
-from django_downloadview.views.base import BaseDownloadView
+from django_downloadview.files import StorageFile
+from django_downloadview.views.base import AsyncBaseDownloadView, BaseDownloadView
 
 
 class ObjectDownloadView(SingleObjectMixin, BaseDownloadView):
@@ -22,7 +25,9 @@ class ObjectDownloadView(SingleObjectMixin, BaseDownloadView):
     * :attr:`mime_type_field`;
     * :attr:`charset_field`;
     * :attr:`modification_time_field`;
-    * :attr:`size_field`.
+    * :attr:`size_field`;
+    * :attr:`etag_field`;
+    * :attr:`sha256_field`.
 
     :attr:`file_field` is the main one. Other arguments are provided for
     convenience, in case your model holds some (deserialized) metadata about
@@ -55,6 +60,19 @@ class ObjectDownloadView(SingleObjectMixin, BaseDownloadView):
     #: Optional name of the model's attribute which contains the size.
     size_field = None
 
+    #: Optional name of the model's attribute which contains the ETag, such as
+    #: a digest of file content. Used as strong ETag.
+    etag_field = None
+
+    #: Optional name of the model's attribute which contains the SHA-256
+    #: hexadecimal digest of file content. Sent as "Repr-Digest" header.
+    sha256_field = None
+
+    #: Optional :class:`~django_downloadview.metadata.MetadataCache` instance,
+    #: to share metadata of files between requests. Useful with remote
+    #: storages, where each metadata lookup is a network round-trip.
+    metadata_cache = None
+
     def get_file(self):
         """Return :class:`~django.db.models.fields.files.FieldFile` instance.
 
@@ -66,8 +84,11 @@ class ObjectDownloadView(SingleObjectMixin, BaseDownloadView):
         instance's field is empty.
 
         Additional attributes are set on the file wrapper if :attr:`encoding`,
-        :attr:`mime_type`, :attr:`charset`, :attr:`modification_time` or
-        :attr:`size` are configured.
+        :attr:`mime_type`, :attr:`charset`, :attr:`modification_time`,
+        :attr:`size`, :attr:`etag` or :attr:`sha256` are configured.
+
+        If :attr:`metadata_cache` is set, the field file is wrapped in a
+        :class:`~django_downloadview.files.StorageFile` using this cache.
 
         """
         file_instance = getattr(self.object, self.file_field)
@@ -75,7 +96,21 @@ class ObjectDownloadView(SingleObjectMixin, BaseDownloadView):
             raise FileNotFound(
                 f'Field="{self.file_field}" on object="{self.object}" is empty'
             )
-        for field in ("encoding", "mime_type", "charset", "modification_time", "size"):
+        if self.metadata_cache is not None:
+            file_instance = StorageFile(
+                file_instance.storage,
+                file_instance.name,
+                metadata_cache=self.metadata_cache,
+            )
+        for field in (
+            "encoding",
+            "mime_type",
+            "charset",
+            "modification_time",
+            "size",
+            "etag",
+            "sha256",
+        ):
             model_field = getattr(self, "%s_field" % field, False)
             if model_field:
                 value = getattr(self.object, model_field)
@@ -95,3 +130,41 @@ class ObjectDownloadView(SingleObjectMixin, BaseDownloadView):
     def get(self, request, *args, **kwargs):
         self.object = self.get_object()
         return super().get(request, *args, **kwargs)
+
+
+class AsyncObjectDownloadView(AsyncBaseDownloadView, ObjectDownloadView):
+    """Serve file fields from models, asynchronously.
+
+    Same as :class:`ObjectDownloadView`, but the instance is retrieved with
+    asynchronous ORM queries: see :meth:`aget_object`.
+
+    """
+
+    async def aget_object(self, queryset=None):
+        """Asynchronous version of
+        :meth:`~django.views.generic.detail.SingleObjectMixin.get_object`."""
+        if queryset is None:
+            queryset = self.get_queryset()
+        pk = self.kwargs.get(self.pk_url_kwarg)
+        slug = self.kwargs.get(self.slug_url_kwarg)
+        if pk is not None:
+            queryset = queryset.filter(pk=pk)
+        if slug is not None and (pk is None or self.query_pk_and_slug):
+            slug_field = self.get_slug_field()
+            queryset = queryset.filter(**{slug_field: slug})
+        if pk is None and slug is None:
+            raise AttributeError(
+                f"Generic detail view {self.__class__.__name__} must be called "
+                "with either an object pk or a slug in the URLconf."
+            )
+        try:
+            return await queryset.aget()
+        except queryset.model.DoesNotExist:
+            raise Http404(
+                _("No %(verbose_name)s found matching the query")
+                % {"verbose_name": queryset.model._meta.verbose_name}
+            )
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        return await super().get(request, *args, **kwargs)
@@ -2,11 +2,23 @@
 
 import os
 
-from django.core.files import File
-
+from django_downloadview.digest import parse_sidecar
 from django_downloadview.exceptions import FileNotFound
+from django_downloadview.files import PathFile
+from django_downloadview.utils import (
+    TimedLRUCache,
+    accepts_encoding,
+    parse_accept_encoding,
+)
 from django_downloadview.views.base import BaseDownloadView
 
+#: Filename suffixes of precompressed files, by content-coding.
+PRECOMPRESSED_SUFFIXES = {
+    "br": ".br",
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+
 
 class PathDownloadView(BaseDownloadView):
     """Serve a file using filename."""
@@ -20,6 +32,42 @@ class PathDownloadView(BaseDownloadView):
     #: Name of the URL argument that contains path.
     path_url_kwarg = "path"
 
+    #: Class of file wrappers, such as
+    #: :class:`~django_downloadview.files.MappedFile` to read files through
+    #: memory maps.
+    file_class = PathFile
+
+    #: Content-codings of precompressed siblings to look for, by order of
+    #: preference.
+    #:
+    #: As an example, with ``("br", "gzip")``, a request for "file.css" which
+    #: accepts Brotli is served "file.css.br" if it exists, with
+    #: "Content-Encoding: br" header. Supported codings are the keys of
+    #: :data:`PRECOMPRESSED_SUFFIXES`.
+    #: Empty (the default) disables the lookup.
+    precompressed_encodings = ()
+
+    #: Cache of precompressed siblings existence, shared by view instances.
+    precompressed_cache = TimedLRUCache(maxsize=1024, timeout=60)
+
+    #: Optional suffix of sidecar files which contain SHA-256 digests of
+    #: files, such as ``".sha256"`` for "file.txt.sha256" files written by
+    #: ``sha256sum``. Digests are sent as "Repr-Digest" headers.
+    digest_sidecar_suffix = None
+
+    #: Cache of digests read from sidecar files, by file and ETag, shared by
+    #: view instances.
+    sidecar_cache = TimedLRUCache(maxsize=1024, timeout=60)
+
+    #: Optional :class:`~django_downloadview.metadata.MetadataCache` or
+    #: :class:`~django_downloadview.metadata.MappedMetadataCache` instance, to
+    #: share file metadata between requests (and processes).
+    metadata_cache = None
+
+    #: Optional :class:`~django_downloadview.open_files.OpenFileCache`
+    #: instance, to share descriptors of hot files between requests.
+    open_file_cache = None
+
     def get_path(self):
         """Return actual path of the file to serve.
 
@@ -33,8 +81,167 @@ class PathDownloadView(BaseDownloadView):
         return self.kwargs.get(self.path_url_kwarg, self.path)
 
     def get_file(self):
-        """Use path to return wrapper around file to serve."""
+        """Use path to return wrapper around file to serve.
+
+        Returns :attr:`file_class` instance, by default
+        :class:`~django_downloadview.files.PathFile`, which opens the file only
+        when its content is read.
+
+        If a precompressed sibling is acceptable, it is served instead, see
+        :py:meth:`get_precompressed_file`.
+
+        Existence of the file is checked with its wrapper's ``stat()``, which
+        is memoized: the file is stat'ed once per request (or not at all if
+        :attr:`metadata_cache` knows it), and never opened here.
+
+        """
         filename = self.get_path()
-        if not os.path.isfile(filename):
+        file_instance = self.file_class(
+            filename,
+            metadata_cache=self.metadata_cache,
+            open_file_cache=self.open_file_cache,
+        )
+        try:
+            is_file = file_instance.stat().is_file
+        except OSError:
+            is_file = False
+        if not is_file:
             raise FileNotFound(f'File "{filename}" does not exists')
-        return File(open(filename, "rb"))
+        return self.get_precompressed_file(filename, file_instance) or file_instance
+
+    def get_precompressed_candidates(self, name):
+        """Yield ``(encoding, sibling name)`` of precompressed variants of
+        ``name`` that the client accepts, by order of preference."""
+        if not self.precompressed_encodings:
+            return
+        header = self.request.headers.get("accept-encoding", "")
+        codings = parse_accept_encoding(header)
+        for encoding in self.precompressed_encodings:
+            if accepts_encoding(codings, encoding):
+                yield encoding, name + PRECOMPRESSED_SUFFIXES[encoding]
+
+    def get_precompressed_cache_key(self, name):
+        """Return key of precompressed sibling ``name`` in
+        :attr:`precompressed_cache`."""
+        return name
+
+    def precompressed_file_exists(self, name):
+        """Return True if precompressed sibling ``name`` exists.
+
+        Results are cached in :attr:`precompressed_cache`, so that lookups do
+        not cost a ``stat`` call per request.
+
+        """
+        key = self.get_precompressed_cache_key(name)
+        exists = self.precompressed_cache.get(key)
+        if exists is None:
+            exists = os.path.isfile(name)
+            self.precompressed_cache.set(key, exists)
+        return exists
+
+    def get_precompressed_wrapper(self, name):
+        """Return wrapper around precompressed sibling ``name``."""
+        return self.file_class(
+            name,
+            metadata_cache=self.metadata_cache,
+            open_file_cache=self.open_file_cache,
+        )
+
+    def is_precompressed_file_fresh(self, file_instance, original=None):
+        """Return True if precompressed ``file_instance`` may be served
+        instead of ``original``.
+
+        Existence in :attr:`precompressed_cache` may be outdated: the sibling
+        is stat'ed, and forgotten from the cache if it is gone. Siblings older
+        than ``original`` are stale, they are skipped.
+
+        """
+        try:
+            modified_time = file_instance.stat().modified_time
+        except OSError:
+            key = self.get_precompressed_cache_key(file_instance.name)
+            self.precompressed_cache.delete(key)
+            return False
+        except NotImplementedError:
+            return True
+        if original is None:
+            return True
+        try:
+            original_time = original.stat().modified_time
+        except (OSError, NotImplementedError):
+            return True
+        if modified_time is None or original_time is None:
+            return True
+        return modified_time >= original_time
+
+    def get_precompressed_file(self, filename, original=None):
+        """Return wrapper around acceptable precompressed sibling of
+        ``filename``, or ``None``.
+
+        The wrapper has a ``content_encoding`` attribute, which the response
+        uses as "Content-Encoding" header. Siblings which are missing or older
+        than ``original`` wrapper are skipped, see
+        :py:meth:`is_precompressed_file_fresh`.
+
+        """
+        for encoding, sibling in self.get_precompressed_candidates(filename):
+            if not self.precompressed_file_exists(sibling):
+                continue
+            file_instance = self.get_precompressed_wrapper(sibling)
+            if not self.is_precompressed_file_fresh(file_instance, original):
+                continue
+            file_instance.content_encoding = encoding
+            return file_instance
+        return None
+
+    def get_sidecar_digest(self, file_instance):
+        """Return SHA-256 digest read from sidecar file, if
+        :attr:`digest_sidecar_suffix` is set and sidecar file exists.
+
+        Results, including missing sidecars, are cached in
+        :attr:`sidecar_cache` by file and ETag, so that sidecar files are not
+        read on every request, and are read again when the file changes. See
+        :py:meth:`read_sidecar_digest`.
+
+        """
+        if not self.digest_sidecar_suffix:
+            return None
+        etag = self.get_etag(file_instance)
+        if etag is None:
+            return self.read_sidecar_digest(file_instance)
+        storage = getattr(file_instance, "storage", None)
+        key = (storage, file_instance.name, self.digest_sidecar_suffix, etag)
+        digest = self.sidecar_cache.get(key)
+        if digest is None:
+            digest = self.read_sidecar_digest(file_instance) or ""
+            self.sidecar_cache.set(key, digest)
+        return digest or None
+
+    def read_sidecar_digest(self, file_instance):
+        """Return SHA-256 digest read from sidecar file of ``file_instance``,
+        or ``None`` if sidecar file does not exist."""
+        try:
+            with open(file_instance.name + self.digest_sidecar_suffix, "rb") as f:
+                return parse_sidecar(f.read(1024))
+        except OSError:
+            return None
+
+    def get_basename(self):
+        """Return :attr:`basename`, or the uncompressed file's basename if a
+        precompressed sibling is served."""
+        basename = super().get_basename()
+        file_instance = getattr(self, "file_instance", None)
+        if basename is None and getattr(file_instance, "content_encoding", None):
+            basename = os.path.basename(self.get_path())
+        return basename
+
+    def get_vary_headers(self):
+        """Return list of request headers the response depends on.
+
+        Adds "Accept-Encoding" if precompressed siblings are negotiated.
+
+        """
+        vary_headers = super().get_vary_headers()
+        if self.precompressed_encodings and "Accept-Encoding" not in vary_headers:
+            vary_headers = vary_headers + ["Accept-Encoding"]
+        return vary_headers
@@ -2,7 +2,9 @@
 
 from django.core.files.storage import DefaultStorage
 
+from django_downloadview.digest import parse_sidecar
 from django_downloadview.files import StorageFile
+from django_downloadview.views.base import AsyncBaseDownloadView
 from django_downloadview.views.path import PathDownloadView
 
 
@@ -16,5 +18,66 @@ class StorageDownloadView(PathDownloadView):
     path = None  # Override docstring.
 
     def get_file(self):
-        """Return :class:`~django_downloadview.files.StorageFile` instance."""
-        return StorageFile(self.storage, self.get_path())
+        """Return :class:`~django_downloadview.files.StorageFile` instance.
+
+        If a precompressed sibling is acceptable, it is served instead, see
+        :py:meth:`get_precompressed_file`.
+
+        """
+        name = self.get_path()
+        file_instance = StorageFile(
+            self.storage,
+            name,
+            metadata_cache=self.metadata_cache,
+            open_file_cache=self.open_file_cache,
+        )
+        return self.get_precompressed_file(name, file_instance) or file_instance
+
+    def get_precompressed_cache_key(self, name):
+        """Return key of precompressed sibling ``name`` in
+        :attr:`precompressed_cache`, which is shared by storages."""
+        return (self.storage, name)
+
+    def precompressed_file_exists(self, name):
+        """Return True if precompressed sibling ``name`` exists in storage.
+
+        Results are cached in :attr:`precompressed_cache`.
+
+        """
+        key = self.get_precompressed_cache_key(name)
+        exists = self.precompressed_cache.get(key)
+        if exists is None:
+            exists = self.storage.exists(name)
+            self.precompressed_cache.set(key, exists)
+        return exists
+
+    def read_sidecar_digest(self, file_instance):
+        """Return SHA-256 digest read from sidecar file in storage, or
+        ``None`` if sidecar file does not exist.
+
+        Existence is checked with ``storage.exists()``, since storages report
+        missing files with exceptions of their own.
+
+        """
+        name = file_instance.name + self.digest_sidecar_suffix
+        try:
+            if not self.storage.exists(name):
+                return None
+            with self.storage.open(name, "rb") as sidecar:
+                return parse_sidecar(sidecar.read(1024))
+        except OSError:
+            return None
+
+    def get_precompressed_wrapper(self, name):
+        """Return :class:`~django_downloadview.files.StorageFile` around
+        precompressed sibling ``name``."""
+        return StorageFile(
+            self.storage,
+            name,
+            metadata_cache=self.metadata_cache,
+            open_file_cache=self.open_file_cache,
+        )
+
+
+class AsyncStorageDownloadView(AsyncBaseDownloadView, StorageDownloadView):
+    """Serve a file using storage and filename, asynchronously."""
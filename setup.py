@@ -62,6 +62,8 @@ setup(
         # END requirements
     ],
     extras_require={
+        "brotli": ["brotli"],
         "test": ["tox"],
+        "zstd": ["zstandard"],
     },
 )
@@ -43,10 +43,17 @@ class APITestCase(unittest.TestCase):
             "VirtualDownloadView",
             "BaseDownloadView",
             "DownloadMixin",
+            "AsyncObjectDownloadView",
+            "AsyncStorageDownloadView",
+            "AsyncHTTPDownloadView",
+            "AsyncBaseDownloadView",
             # File wrappers:
             "StorageFile",
+            "PathFile",
+            "MappedFile",
             "HTTPFile",
             "VirtualFile",
+            "SpooledFile",
             # Responses:
             "DownloadResponse",
             "ProxiedDownloadResponse",
@@ -60,6 +67,14 @@ class APITestCase(unittest.TestCase):
             "temporary_media_root",
             # Utilities:
             "StringIteratorIO",
+            "CompressedCache",
+            "ContentCache",
+            "CachePolicy",
+            "ChecksumIndex",
+            "MetadataCache",
+            "MappedMetadataCache",
+            "OpenFileCache",
+            "PageCachePolicy",
             "sendfile",
         ]
         self.assert_module_attributes("django_downloadview", api)
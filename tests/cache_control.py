@@ -0,0 +1,40 @@
+"""Tests around :mod:`django_downloadview.cache_control`."""
+
+import unittest
+
+from django.http import HttpResponse
+
+from django_downloadview.cache_control import CachePolicy
+
+
+class CachePolicyTestCase(unittest.TestCase):
+    """Tests around :class:`~django_downloadview.cache_control.CachePolicy`."""
+
+    def test_public_and_private(self):
+        """CachePolicy cannot be both public and private."""
+        with self.assertRaises(ValueError):
+            CachePolicy(public=True, private=True)
+
+    def test_patch_response(self):
+        """CachePolicy.patch_response() sets Cache-Control and Expires."""
+        response = HttpResponse()
+        policy = CachePolicy(max_age=60, s_maxage=3600, public=True)
+        policy.patch_response(response)
+        self.assertEqual(response["Cache-Control"], "public, max-age=60, s-maxage=3600")
+        self.assertTrue(response.has_header("Expires"))
+
+    def test_patch_response_keeps_headers(self):
+        """CachePolicy.patch_response() updates existing headers."""
+        response = HttpResponse()
+        response["Cache-Control"] = "no-transform"
+        response["Expires"] = "Thu, 01 Jan 1970 00:00:00 GMT"
+        CachePolicy(max_age=60).patch_response(response)
+        self.assertEqual(response["Cache-Control"], "no-transform, max-age=60")
+        self.assertEqual(response["Expires"], "Thu, 01 Jan 1970 00:00:00 GMT")
+
+    def test_no_max_age(self):
+        """No Expires header is computed without max-age."""
+        response = HttpResponse()
+        CachePolicy(no_cache=True).patch_response(response)
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        self.assertFalse(response.has_header("Expires"))
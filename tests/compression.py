@@ -0,0 +1,64 @@
+"""Tests around :mod:`django_downloadview.compression`."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from django_downloadview.compression import CompressedCache
+
+
+class CompressedCacheTestCase(unittest.TestCase):
+    """Tests around :class:`~django_downloadview.compression.CompressedCache`."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = CompressedCache(os.path.join(directory.name, "cache"))
+
+    def test_miss(self):
+        """CompressedCache.get() returns ``None`` for unknown keys."""
+        self.assertIsNone(self.cache.get("key", "gzip"))
+
+    def test_tee(self):
+        """CompressedCache.tee() stores content it generates."""
+        chunks = list(self.cache.tee("key", "gzip", iter([b"ab", b"cd"])))
+        self.assertEqual(chunks, [b"ab", b"cd"])
+        with self.cache.get("key", "gzip") as cached:
+            self.assertEqual(cached.read(), b"abcd")
+        self.assertIsNone(self.cache.get("key", "br"))
+
+    def test_tee_incomplete(self):
+        """CompressedCache.tee() does not store partially consumed content."""
+        chunks = self.cache.tee("key", "gzip", iter([b"ab", b"cd"]))
+        next(chunks)
+        chunks.close()
+        self.assertIsNone(self.cache.get("key", "gzip"))
+        self.assertEqual(os.listdir(self.cache.directory), [])
+
+    def test_prune(self):
+        """Least recently used entries are removed beyond ``max_size``."""
+        self.cache.max_size = 5
+        list(self.cache.tee("old", "gzip", iter([b"abc"])))
+        os.utime(self.cache.get_path("old", "gzip"), (0, 0))
+        list(self.cache.tee("new", "gzip", iter([b"def"])))
+        self.assertFalse(os.path.exists(self.cache.get_path("old", "gzip")))
+        self.assertTrue(os.path.exists(self.cache.get_path("new", "gzip")))
+
+    def test_prune_threshold(self):
+        """Entries are not pruned on every store."""
+        self.cache.max_size = 100
+        with mock.patch.object(self.cache, "prune") as prune:
+            list(self.cache.tee("small", "gzip", iter([b"abc"])))
+            self.assertFalse(prune.called)
+            list(self.cache.tee("big", "gzip", iter([b"0" * 10])))
+            self.assertEqual(prune.call_count, 1)
+
+    def test_get_open(self):
+        """Entries returned by CompressedCache.get() survive pruning."""
+        list(self.cache.tee("key", "gzip", iter([b"abcd"])))
+        with self.cache.get("key", "gzip") as cached:
+            self.cache.max_size = 0
+            self.cache.prune()
+            self.assertFalse(os.path.exists(self.cache.get_path("key", "gzip")))
+            self.assertEqual(cached.read(), b"abcd")
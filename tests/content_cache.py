@@ -0,0 +1,47 @@
+"""Tests around :mod:`django_downloadview.content_cache`."""
+
+import unittest
+
+from django_downloadview.content_cache import ContentCache
+
+
+class ContentCacheTestCase(unittest.TestCase):
+    """Tests around :class:`~django_downloadview.content_cache.ContentCache`."""
+
+    def test_byte_budget(self):
+        """Least recently used entries are evicted when total size exceeds
+        ``max_size``."""
+        cache = ContentCache(max_size=10, max_file_size=10)
+        cache.set("a", "v", b"1234")
+        cache.set("b", "v", b"1234")
+        cache.get("a", "v")
+        cache.set("c", "v", b"1234")
+        self.assertIsNone(cache.get("b", "v"))
+        self.assertEqual(cache.get("a", "v"), b"1234")
+        self.assertEqual(cache.get("c", "v"), b"1234")
+        self.assertEqual(cache.size, 8)
+
+    def test_replace(self):
+        """Replaced and invalidated entries are not counted."""
+        cache = ContentCache(max_size=10)
+        cache.set("a", "v1", b"1234")
+        cache.set("a", "v2", b"12")
+        self.assertEqual(cache.size, 2)
+        self.assertIsNone(cache.get("a", "v1"))
+        self.assertEqual(cache.size, 0)
+
+    def test_tee(self):
+        """tee() stores content once chunks are consumed."""
+        cache = ContentCache()
+        chunks = cache.tee("a", "v", iter([b"Hello ", b"world!"]))
+        self.assertEqual(next(chunks), b"Hello ")
+        self.assertIsNone(cache.get("a", "v"))
+        self.assertEqual(list(chunks), [b"world!"])
+        self.assertEqual(cache.get("a", "v"), b"Hello world!")
+
+    def test_tee_big_content(self):
+        """tee() does not store content bigger than ``max_file_size``."""
+        cache = ContentCache(max_file_size=8)
+        chunks = list(cache.tee("a", "v", [b"Hello ", b"world!"]))
+        self.assertEqual(chunks, [b"Hello ", b"world!"])
+        self.assertIsNone(cache.get("a", "v"))
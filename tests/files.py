@@ -0,0 +1,264 @@
+"""Tests around :mod:`django_downloadview.files`."""
+
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, Storage
+from django.utils.deconstruct import deconstructible
+
+from django_downloadview.files import (
+    FileStat,
+    MappedFile,
+    PathFile,
+    SpooledFile,
+    StorageFile,
+    get_storage_id,
+)
+from django_downloadview.io import BytesIteratorIO
+from django_downloadview.metadata import MetadataCache
+
+
+@deconstructible
+class BucketStorage(Storage):
+    """Storage of a remote bucket, without ``location``."""
+
+    def __init__(self, bucket_name, endpoint=None):
+        self.bucket_name = bucket_name
+        self.endpoint = endpoint
+
+
+class GetStorageIdTestCase(unittest.TestCase):
+    """Tests around :func:`~django_downloadview.files.get_storage_id`."""
+
+    def test_same_configuration(self):
+        """Storages with the same configuration have the same id."""
+        self.assertEqual(
+            get_storage_id(BucketStorage("media")),
+            get_storage_id(BucketStorage("media")),
+        )
+
+    def test_distinct_buckets(self):
+        """Storages of the same class with distinct buckets or endpoints do
+        not share cache entries."""
+        storages = [
+            BucketStorage("media"),
+            BucketStorage("backups"),
+            BucketStorage("media", endpoint="https://eu.example.com"),
+        ]
+        self.assertEqual(len({get_storage_id(s) for s in storages}), 3)
+        metadata_cache = MetadataCache()
+        self.assertEqual(
+            len({metadata_cache.get_key(s, "hello.txt") for s in storages}), 3
+        )
+
+    def test_cache_id(self):
+        """Storages may set their identifier as ``cache_id`` attribute."""
+        storage = BucketStorage("media")
+        storage.cache_id = "media-bucket"
+        self.assertEqual(get_storage_id(storage), "media-bucket")
+
+
+class StorageFileStatTestCase(unittest.TestCase):
+    """Tests around :meth:`~django_downloadview.files.StorageFile.stat`."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = FileSystemStorage(location=directory.name)
+        self.storage.save("hello.txt", ContentFile(b"Hello world!"))
+
+    def test_filesystem_storage(self):
+        """FileSystemStorage metadata are read with a single os.stat()."""
+        file_instance = StorageFile(self.storage, "hello.txt")
+        modified_time = self.storage.get_modified_time("hello.txt")
+        with mock.patch("os.stat", wraps=os.stat) as stat:
+            self.assertEqual(file_instance.size, 12)
+            self.assertEqual(file_instance.modified_time, modified_time)
+            self.assertTrue(file_instance.exists())
+        self.assertEqual(stat.call_count, 1)
+
+    def test_missing_file(self):
+        """StorageFile.exists() returns False for missing files."""
+        file_instance = StorageFile(self.storage, "missing.txt")
+        self.assertFalse(file_instance.exists())
+        with self.assertRaises(FileNotFoundError):
+            file_instance.size
+
+    def test_save_resets_stat(self):
+        """StorageFile.save() discards memoized metadata."""
+        file_instance = StorageFile(self.storage, "new.txt")
+        self.assertFalse(file_instance.exists())
+        file_instance.save(ContentFile(b"new"))
+        self.assertTrue(file_instance.exists())
+
+    def test_lazy_open(self):
+        """StorageFile opens the file only when content is read."""
+        file_instance = StorageFile(self.storage, "hello.txt")
+        with mock.patch.object(self.storage, "open") as storage_open:
+            self.assertTrue(file_instance.seekable())
+            self.assertTrue(file_instance.closed)
+            file_instance.close()
+        self.assertFalse(storage_open.called)
+        self.assertEqual(file_instance.read(), b"Hello world!")
+        self.assertFalse(file_instance.closed)
+        file_instance.close()
+        self.assertTrue(file_instance.closed)
+
+    def test_stat_protocol(self):
+        """Storages may return all metadata in one call via ``stat()``."""
+        storage = mock.Mock(spec=["stat", "size"])
+        storage.stat.return_value = FileStat(size=42)
+        file_instance = StorageFile(storage, "remote.txt")
+        self.assertEqual(file_instance.size, 42)
+        self.assertEqual(file_instance.size, 42)
+        self.assertTrue(file_instance.exists())
+        storage.stat.assert_called_once_with("remote.txt")
+        self.assertFalse(storage.size.called)
+
+    def test_fallback(self):
+        """Other storages are called at most once per attribute."""
+        storage = mock.Mock(spec=Storage)
+        storage.size.return_value = 42
+        file_instance = StorageFile(storage, "remote.txt")
+        self.assertEqual(file_instance.size, 42)
+        self.assertEqual(file_instance.size, 42)
+        storage.size.assert_called_once_with("remote.txt")
+        self.assertFalse(storage.get_modified_time.called)
+
+
+class PathFileStatTestCase(unittest.TestCase):
+    """Tests around :meth:`~django_downloadview.files.PathFile.stat`."""
+
+    def test_single_stat(self):
+        """PathFile metadata are read with a single os.stat()."""
+        file_instance = PathFile(__file__)
+        size = os.path.getsize(__file__)
+        with mock.patch("os.stat", wraps=os.stat) as stat:
+            self.assertEqual(file_instance.size, size)
+            file_instance.modified_time
+        self.assertEqual(stat.call_count, 1)
+
+
+class MappedFileTestCase(unittest.TestCase):
+    """Tests around :class:`~django_downloadview.files.MappedFile`."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "digits.txt")
+        with open(self.path, "wb") as digits:
+            digits.write(b"0123456789")
+
+    def test_chunks(self):
+        """MappedFile.chunks() generates memoryview slices."""
+        file_instance = MappedFile(self.path)
+        chunks = list(file_instance.chunks(4))
+        self.assertTrue(all(isinstance(chunk, memoryview) for chunk in chunks))
+        self.assertEqual([bytes(chunk) for chunk in chunks], [b"0123", b"4567", b"89"])
+        del chunks
+        file_instance.close()
+        self.assertIsNone(file_instance._mmap)
+        self.assertTrue(file_instance.closed)
+
+    def test_range_chunks(self):
+        """MappedFile.range_chunks() slices the map."""
+        file_instance = MappedFile(self.path)
+        chunks = [bytes(chunk) for chunk in file_instance.range_chunks(3, 8, 4)]
+        self.assertEqual(chunks, [b"3456", b"7"])
+        file_instance.close()
+
+    def test_empty_file(self):
+        """Empty files, which cannot be mapped, have no chunks."""
+        open(self.path, "wb").close()
+        file_instance = MappedFile(self.path)
+        self.assertEqual(list(file_instance.chunks()), [])
+        file_instance.close()
+
+    def test_replaced_file(self):
+        """Content of replaced file is sliced instead of the map."""
+        file_instance = MappedFile(self.path)
+        file_instance.file = io.BytesIO(b"abcdefghij")
+        chunks = [bytes(chunk) for chunk in file_instance.chunks(4)]
+        self.assertEqual(chunks, [b"abcd", b"efgh", b"ij"])
+        chunks = [bytes(chunk) for chunk in file_instance.range_chunks(3, 8, 4)]
+        self.assertEqual(chunks, [b"defg", b"h"])
+        self.assertIsNone(file_instance._mmap)
+        file_instance.close()
+
+    def test_close_with_exported_slices(self):
+        """MappedFile.close() does not fail while slices are referenced."""
+        file_instance = MappedFile(self.path)
+        chunk = next(file_instance.chunks(4))
+        file_instance.close()
+        self.assertEqual(bytes(chunk), b"0123")
+
+
+class SpooledFileTestCase(unittest.TestCase):
+    """Tests around :class:`~django_downloadview.files.SpooledFile`."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+
+    def generate(self):
+        yield b"Hello "
+        yield "world!"
+
+    def test_lazy(self):
+        """Content is not read until content or size is accessed."""
+        source = BytesIteratorIO(self.generate())
+        source.read = mock.Mock(wraps=source.read)
+        file_instance = SpooledFile(source, name="hello.txt")
+        self.assertTrue(file_instance.closed)
+        self.assertTrue(file_instance.seekable())
+        self.assertFalse(source.read.called)
+        self.assertEqual(file_instance.size, 12)
+        self.assertTrue(source.read.called)
+
+    def test_memory(self):
+        """Small content is kept in memory."""
+        file_instance = SpooledFile(self.generate(), name="hello.txt", dir=self.dir)
+        self.assertEqual(file_instance.read(), b"Hello world!")
+        file_instance.seek(6)
+        self.assertEqual(file_instance.read(), b"world!")
+        self.assertIsNone(file_instance.path)
+        self.assertEqual(file_instance.name, "hello.txt")
+        self.assertEqual(os.listdir(self.dir), [])
+        file_instance.close()
+
+    def test_disk(self):
+        """Bigger content is written to a named file, deleted on close."""
+        file_instance = SpooledFile(
+            self.generate(), name="hello.txt", max_size=8, dir=self.dir
+        )
+        self.assertEqual(file_instance.size, 12)
+        self.assertEqual(file_instance.name, file_instance.path)
+        self.assertEqual(os.path.basename(file_instance.path), "hello.txt")
+        self.assertTrue(file_instance.path.startswith(self.dir))
+        self.assertEqual(os.fstat(file_instance.fileno()).st_size, 12)
+        self.assertEqual(file_instance.read(), b"Hello world!")
+        file_instance.close()
+        self.assertEqual(os.listdir(self.dir), [])
+
+    def test_charset(self):
+        """Text is encoded with ``charset``, as a whole."""
+        for source in (iter(["é", "è"]), io.StringIO("éè")):
+            file_instance = SpooledFile(source, name="hello.txt", charset="utf-16")
+            self.assertEqual(file_instance.read(), "éè".encode("utf-16"))
+            file_instance.close()
+
+    def test_keep(self):
+        """Content written to disk is kept if ``delete`` is False."""
+        file_instance = SpooledFile(
+            self.generate(), name="hello.txt", max_size=8, dir=self.dir, delete=False
+        )
+        file_instance.spool()
+        path = file_instance.path
+        file_instance.close()
+        with open(path, "rb") as spooled:
+            self.assertEqual(spooled.read(), b"Hello world!")
@@ -1,8 +1,11 @@
 """Tests around :mod:`django_downloadview.io`."""
 
+import io
 import unittest
+from unittest import mock
 
 from django_downloadview import BytesIteratorIO, TextIteratorIO
+from django_downloadview.io import coalesce_chunks, encode_chunks
 
 HELLO_TEXT = "Hello world!\né\n"
 HELLO_BYTES = b"Hello world!\n\xc3\xa9\n"
@@ -26,6 +29,49 @@ def generate_hello_bytes():
     yield b"\n"
 
 
+class EncodeChunksTestCase(unittest.TestCase):
+    """Tests around :func:`~django_downloadview.io.encode_chunks`."""
+
+    def test_batches(self):
+        """Small text chunks are encoded in blocks of ``chunk_size``."""
+        chunks = encode_chunks(generate_hello_text(), chunk_size=7)
+        self.assertEqual(list(chunks), [b"Hello world!", b"\n\xc3\xa9\n"])
+
+    def test_encoder_state(self):
+        """Encoder state is kept between blocks, e.g. for byte order marks."""
+        chunks = encode_chunks(generate_hello_text(), "utf-16", chunk_size=1)
+        self.assertEqual(b"".join(chunks), HELLO_TEXT.encode("utf-16"))
+
+    def test_bytes(self):
+        """Bytes are passed through, after pending text."""
+        chunks = encode_chunks(["a", "b", b"c", memoryview(b"d"), "e"])
+        self.assertEqual([bytes(chunk) for chunk in chunks], [b"ab", b"c", b"d", b"e"])
+
+
+class CoalesceChunksTestCase(unittest.TestCase):
+    """Tests around :func:`~django_downloadview.io.coalesce_chunks`."""
+
+    def test_blocks(self):
+        """Small chunks are joined, big ones are passed through."""
+        big = memoryview(b"x" * 8)
+        chunks = list(coalesce_chunks(iter([b"a", b"", b"b", big, b"c"]), 4))
+        self.assertEqual(chunks, [b"abxxxxxxxx", b"c"])
+        chunks = list(coalesce_chunks(iter([big, b"c"]), 4))
+        self.assertIs(chunks[0], big)
+
+    def test_max_latency(self):
+        """Pending content is sent when chunks arrive late."""
+
+        def generate():
+            for now, chunk in [(1.0, b"a"), (1.5, b"b"), (2.5, b"c"), (3.0, b"d")]:
+                monotonic.return_value = now
+                yield chunk
+
+        with mock.patch("time.monotonic", return_value=0.0) as monotonic:
+            chunks = list(coalesce_chunks(generate(), 100, max_latency=1))
+        self.assertEqual(chunks, [b"a", b"bc", b"d"])
+
+
 class TextIteratorIOTestCase(unittest.TestCase):
     """Tests around :class:`~django_downloadview.io.TextIteratorIO`."""
 
@@ -39,6 +85,21 @@ class TextIteratorIOTestCase(unittest.TestCase):
         file_obj = TextIteratorIO(generate_hello_bytes())
         self.assertEqual(file_obj.read(), HELLO_TEXT)
 
+    def test_read_small_sizes(self):
+        """TextIteratorIO reads parts of chunks, and across chunks."""
+        file_obj = TextIteratorIO(generate_hello_bytes())
+        self.assertEqual(file_obj.read(2), "He")
+        self.assertEqual(file_obj.read(6), "llo wo")
+        self.assertEqual(file_obj.read(6), "rld!\né")
+        self.assertEqual(file_obj.read(), "\n")
+
+    def test_readline(self):
+        """TextIteratorIO reads lines across chunks, converting them."""
+        file_obj = TextIteratorIO(generate_hello_bytes())
+        self.assertEqual(file_obj.readline(), "Hello world!\n")
+        self.assertEqual(file_obj.readline(), "é\n")
+        self.assertEqual(file_obj.readline(), "")
+
 
 class BytesIteratorIOTestCase(unittest.TestCase):
     """Tests around :class:`~django_downloadview.io.BytesIteratorIO`."""
@@ -52,3 +113,55 @@ class BytesIteratorIOTestCase(unittest.TestCase):
         """BytesIteratorIO converts text as bytes."""
         file_obj = BytesIteratorIO(generate_hello_text())
         self.assertEqual(file_obj.read(), HELLO_BYTES)
+
+    def test_encoding(self):
+        """BytesIteratorIO encodes text with ``encoding``."""
+        file_obj = BytesIteratorIO(generate_hello_text(), encoding="latin-1")
+        self.assertEqual(file_obj.read(), HELLO_TEXT.encode("latin-1"))
+
+    def test_read1_text(self):
+        """BytesIteratorIO encodes text chunks one by one, so read1() does not
+        wait for the iterator."""
+
+        def generate():
+            yield "Hello"
+            raise AssertionError("read1() waited for next chunk.")
+
+        file_obj = BytesIteratorIO(generate())
+        self.assertEqual(file_obj.read1(), b"Hello")
+
+    def test_read_small_sizes(self):
+        """BytesIteratorIO reads parts of chunks, and across chunks."""
+        file_obj = BytesIteratorIO(generate_hello_bytes())
+        self.assertEqual(file_obj.read(2), b"He")
+        self.assertEqual(file_obj.read(6), b"llo wo")
+        self.assertEqual(file_obj.read(0), b"")
+        self.assertEqual(file_obj.read1(100), b"rld!")
+        self.assertEqual(file_obj.read(100), b"\n\xc3\xa9\n")
+        self.assertEqual(file_obj.read(), b"")
+
+    def test_readline(self):
+        """BytesIteratorIO reads lines across chunks, converting them."""
+        file_obj = BytesIteratorIO(generate_hello_text())
+        self.assertEqual(file_obj.readline(3), b"Hel")
+        self.assertEqual(file_obj.readline(), b"lo world!\n")
+        self.assertEqual(list(file_obj), [b"\xc3\xa9\n"])
+
+    def test_readinto(self):
+        """BytesIteratorIO reads into pre-allocated buffers."""
+        file_obj = BytesIteratorIO(generate_hello_bytes())
+        buffer = bytearray(8)
+        self.assertEqual(file_obj.readinto1(buffer), 6)
+        self.assertEqual(buffer[:6], b"Hello ")
+        self.assertEqual(file_obj.readinto(buffer), 8)
+        self.assertEqual(buffer, b"world!\n\xc3")
+        self.assertEqual(file_obj.readinto(buffer), 2)
+        self.assertEqual(buffer[:2], b"\xa9\n")
+        self.assertEqual(file_obj.readinto(buffer), 0)
+
+    def test_buffered_reader(self):
+        """BytesIteratorIO may be wrapped in io.BufferedReader."""
+        file_obj = io.BufferedReader(
+            BytesIteratorIO(generate_hello_bytes()), buffer_size=4
+        )
+        self.assertEqual(file_obj.read(), HELLO_BYTES)
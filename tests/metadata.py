@@ -0,0 +1,251 @@
+"""Tests around :mod:`django_downloadview.metadata`."""
+
+from datetime import datetime, timezone
+import os
+import struct
+import tempfile
+import unittest
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db.models.signals import post_delete, post_save
+
+from django_downloadview.files import FileStat, PathFile, StorageFile
+from django_downloadview.metadata import (
+    MappedMetadataCache,
+    MetadataCache,
+    invalidate_field_files,
+)
+
+from demoproject.object.models import Document
+
+
+class MetadataCacheTestCase(unittest.TestCase):
+    """Tests around :class:`~django_downloadview.metadata.MetadataCache`."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = FileSystemStorage(location=directory.name)
+        self.storage.save("hello.txt", ContentFile(b"Hello world!"))
+        self.metadata_cache = MetadataCache()
+        caches["default"].clear()
+        self.addCleanup(caches["default"].clear)
+
+    def test_shared_between_wrappers(self):
+        """Metadata are fetched from storage once for all file wrappers."""
+        StorageFile(self.storage, "hello.txt", metadata_cache=self.metadata_cache).size
+        file_instance = StorageFile(
+            self.storage, "hello.txt", metadata_cache=self.metadata_cache
+        )
+        with mock.patch("django_downloadview.files.storage_stat") as storage_stat:
+            self.assertEqual(file_instance.size, 12)
+            self.assertTrue(file_instance.exists())
+            self.assertIsNotNone(file_instance.modified_time)
+        self.assertFalse(storage_stat.called)
+
+    def test_etag_and_mime_type(self):
+        """ETag and MIME type reported by storage are cached."""
+        storage = mock.Mock(spec=["stat"])
+        storage.stat.return_value = FileStat(
+            size=42, etag='"abc"', mime_type="text/plain"
+        )
+        self.metadata_cache.set(storage, "remote.txt", storage.stat("remote.txt"))
+        stat = self.metadata_cache.get(storage, "remote.txt")
+        self.assertEqual(stat.size, 42)
+        self.assertEqual(stat.etag, '"abc"')
+        self.assertEqual(stat.mime_type, "text/plain")
+
+    def test_save_invalidates(self):
+        """StorageFile.save() invalidates cached metadata."""
+        file_instance = StorageFile(
+            self.storage, "hello.txt", metadata_cache=self.metadata_cache
+        )
+        self.assertEqual(file_instance.size, 12)
+        self.storage.delete("hello.txt")
+        file_instance.save(ContentFile(b"Hello!"))
+        self.assertIsNone(self.metadata_cache.get(self.storage, "hello.txt"))
+        other_instance = StorageFile(
+            self.storage, "hello.txt", metadata_cache=self.metadata_cache
+        )
+        self.assertEqual(other_instance.size, 6)
+
+    def test_delete_invalidates(self):
+        """StorageFile.delete() invalidates cached metadata."""
+        file_instance = StorageFile(
+            self.storage, "hello.txt", metadata_cache=self.metadata_cache
+        )
+        self.assertTrue(file_instance.exists())
+        file_instance.delete()
+        other_instance = StorageFile(
+            self.storage, "hello.txt", metadata_cache=self.metadata_cache
+        )
+        self.assertFalse(other_instance.exists())
+
+    def test_times(self):
+        """Access and creation times are cached with other metadata."""
+        StorageFile(self.storage, "hello.txt", metadata_cache=self.metadata_cache).size
+        file_instance = StorageFile(
+            self.storage, "hello.txt", metadata_cache=self.metadata_cache
+        )
+        with mock.patch("django_downloadview.files.storage_stat") as storage_stat:
+            self.assertEqual(
+                file_instance.accessed_time, self.storage.get_accessed_time("hello.txt")
+            )
+            self.assertEqual(
+                file_instance.created_time, self.storage.get_created_time("hello.txt")
+            )
+        self.assertFalse(storage_stat.called)
+
+    def test_times_not_cached(self):
+        """Times missing from cache are read from storage."""
+        self.metadata_cache.set(self.storage, "hello.txt", FileStat(size=12))
+        file_instance = StorageFile(
+            self.storage, "hello.txt", metadata_cache=self.metadata_cache
+        )
+        self.assertEqual(file_instance.size, 12)
+        self.assertEqual(
+            file_instance.accessed_time, self.storage.get_accessed_time("hello.txt")
+        )
+        self.assertEqual(
+            file_instance.created_time, self.storage.get_created_time("hello.txt")
+        )
+
+    def test_field_files_invalidated(self):
+        """invalidate_field_files() invalidates files of saved or deleted
+        model instances."""
+        receiver = invalidate_field_files(self.metadata_cache, Document)
+        self.addCleanup(post_save.disconnect, receiver, sender=Document)
+        self.addCleanup(post_delete.disconnect, receiver, sender=Document)
+        document = Document(slug="hello", file="hello.txt")
+        document.file.storage = self.storage
+        for signal in (post_save, post_delete):
+            StorageFile(
+                self.storage, "hello.txt", metadata_cache=self.metadata_cache
+            ).size
+            self.assertIsNotNone(self.metadata_cache.get(self.storage, "hello.txt"))
+            signal.send(sender=Document, instance=document)
+            self.assertIsNone(self.metadata_cache.get(self.storage, "hello.txt"))
+
+    def test_keys_depend_on_storage(self):
+        """Files with same name in distinct storages have distinct entries."""
+        other_storage = FileSystemStorage(location=tempfile.gettempdir())
+        self.assertNotEqual(
+            self.metadata_cache.get_key(self.storage, "hello.txt"),
+            self.metadata_cache.get_key(other_storage, "hello.txt"),
+        )
+
+
+class MappedMetadataCacheTestCase(unittest.TestCase):
+    """Tests around
+    :class:`~django_downloadview.metadata.MappedMetadataCache`."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "stat.cache")
+        self.metadata_cache = self.make_cache()
+
+    def make_cache(self, **kwargs):
+        metadata_cache = MappedMetadataCache(self.path, **kwargs)
+        self.addCleanup(metadata_cache.close)
+        return metadata_cache
+
+    def test_roundtrip(self):
+        """Stored metadata are returned as FileStat."""
+        modified_time = datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)
+        self.metadata_cache.set(
+            None,
+            "/a.txt",
+            FileStat(
+                size=42,
+                modified_time=modified_time,
+                etag='"abc"',
+                mime_type="text/plain",
+                inode=1234,
+            ),
+        )
+        stat = self.metadata_cache.get(None, "/a.txt")
+        self.assertEqual(stat.size, 42)
+        self.assertEqual(stat.modified_time, modified_time)
+        self.assertEqual(stat.modified_time.tzinfo, timezone.utc)
+        self.assertEqual(stat.etag, '"abc"')
+        self.assertEqual(stat.mime_type, "text/plain")
+        self.assertEqual(stat.inode, 1234)
+        self.assertIsNone(self.metadata_cache.get(None, "/b.txt"))
+
+    def test_naive_time(self):
+        """Naive modification times are kept naive."""
+        modified_time = datetime(2024, 1, 2, 3, 4, 5)
+        self.metadata_cache.set(
+            None, "/a.txt", FileStat(size=1, modified_time=modified_time)
+        )
+        stat = self.metadata_cache.get(None, "/a.txt")
+        self.assertEqual(stat.modified_time, modified_time)
+        self.assertIsNone(stat.etag)
+
+    def test_shared(self):
+        """Instances using the same file share entries."""
+        self.metadata_cache.set(None, "/a.txt", FileStat(size=42))
+        other_cache = self.make_cache()
+        self.assertEqual(other_cache.get(None, "/a.txt").size, 42)
+        other_cache.delete(None, "/a.txt")
+        self.assertIsNone(self.metadata_cache.get(None, "/a.txt"))
+
+    def test_eviction(self):
+        """Oldest entries are evicted when slots are full."""
+        metadata_cache = MappedMetadataCache(
+            os.path.join(os.path.dirname(self.path), "small.cache"), slots=4
+        )
+        self.addCleanup(metadata_cache.close)
+        for index in range(5):
+            with mock.patch("time.time", return_value=1000.0 + index):
+                metadata_cache.set(None, f"/{index}", FileStat(size=index))
+        with mock.patch("time.time", return_value=1004.0):
+            self.assertIsNone(metadata_cache.get(None, "/0"))
+            for index in range(1, 5):
+                self.assertEqual(metadata_cache.get(None, f"/{index}").size, index)
+
+    def test_expiry(self):
+        """Entries expire after ``timeout`` seconds."""
+        with mock.patch("time.time", return_value=1000.0):
+            self.metadata_cache.set(None, "/a.txt", FileStat(size=42))
+        with mock.patch("time.time", return_value=1004.0):
+            self.assertIsNotNone(self.metadata_cache.get(None, "/a.txt"))
+        with mock.patch("time.time", return_value=1006.0):
+            self.assertIsNone(self.metadata_cache.get(None, "/a.txt"))
+
+    def test_write_in_progress(self):
+        """Slots being written (odd sequence number) are read as missing."""
+        self.metadata_cache.set(None, "/a.txt", FileStat(size=42))
+        mapping = self.metadata_cache._open()
+        key = self.metadata_cache.get_key(None, "/a.txt")
+        for offset in self.metadata_cache._offsets(key):
+            if mapping[offset + 8 : offset + 24] == key:
+                sequence = struct.unpack_from("<Q", mapping, offset)[0]
+                struct.pack_into("<Q", mapping, offset, sequence + 1)
+        self.assertIsNone(self.metadata_cache.get(None, "/a.txt"))
+        self.metadata_cache.set(None, "/a.txt", FileStat(size=43))
+        self.assertEqual(self.metadata_cache.get(None, "/a.txt").size, 43)
+
+    def test_too_long(self):
+        """Metadata which do not fit in a slot are not stored."""
+        self.metadata_cache.set(None, "/a.txt", FileStat(size=1, etag="x" * 200))
+        self.assertIsNone(self.metadata_cache.get(None, "/a.txt"))
+
+    def test_layout_mismatch(self):
+        """Using a file with another number of slots raises ValueError."""
+        self.metadata_cache.get(None, "/a.txt")
+        with self.assertRaises(ValueError):
+            self.make_cache(slots=8).get(None, "/a.txt")
+
+    def test_path_file(self):
+        """PathFile reads metadata from cache instead of filesystem."""
+        PathFile(__file__, metadata_cache=self.metadata_cache).size
+        file_instance = PathFile(__file__, metadata_cache=self.metadata_cache)
+        size = os.path.getsize(__file__)
+        with mock.patch("os.stat") as stat:
+            self.assertEqual(file_instance.size, size)
+        self.assertFalse(stat.called)
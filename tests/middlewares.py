@@ -0,0 +1,90 @@
+"""Tests around :mod:`django_downloadview.middlewares`."""
+
+import os
+import tempfile
+import unittest
+
+import django.test
+
+from django_downloadview import DownloadResponse, SpooledFile, views
+from django_downloadview.nginx import XAccelRedirectMiddleware
+from django_downloadview.test import setup_view
+from django_downloadview.utils import content_type_to_charset
+
+
+class ProxiedDownloadMiddlewareTestCase(unittest.TestCase):
+    """Tests around
+    :class:`~django_downloadview.middlewares.ProxiedDownloadMiddleware`."""
+
+    def setUp(self):
+        self.middleware = XAccelRedirectMiddleware(
+            None,
+            source_dir=os.path.dirname(__file__),
+            destination_url="/proxied/",
+        )
+
+    def get_response(self, **kwargs):
+        request = django.test.RequestFactory().get("/dummy-url", **kwargs)
+        view = views.PathDownloadView(path=__file__, compress_encodings=("gzip",))
+        response = setup_view(view, request).render_to_response()
+        self.addCleanup(response.file.close)
+        return request, response
+
+    def test_compressed(self):
+        """Proxied responses do not claim content is compressed."""
+        request, response = self.get_response(HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        proxied = self.middleware.process_download_response(request, response)
+        self.assertEqual(proxied["X-Accel-Redirect"], "/proxied/middlewares.py")
+        self.assertNotIn("Content-Encoding", proxied)
+        self.assertNotIn("ETag", proxied)
+
+    def test_multiple_ranges(self):
+        """Proxied responses carry type of the file, not multipart one."""
+        request, response = self.get_response(HTTP_RANGE="bytes=0-9,20-29")
+        self.assertTrue(response["Content-Type"].startswith("multipart/byteranges"))
+        proxied = self.middleware.process_download_response(request, response)
+        self.assertEqual(proxied["Content-Type"], response.part_content_type)
+        self.assertNotIn("Content-Length", proxied)
+        self.assertEqual(
+            proxied["X-Accel-Charset"],
+            content_type_to_charset(response.part_content_type),
+        )
+        self.assertNotEqual(proxied["X-Accel-Charset"], "None")
+
+    def test_closers(self):
+        """Resources of replaced responses are released with proxied ones."""
+        request, response = self.get_response()
+        proxied = self.middleware.process_response(request, response)
+        self.assertIn("X-Accel-Redirect", proxied)
+        self.assertIn(response.file.close, proxied._resource_closers)
+        self.assertEqual(response._resource_closers, [])
+
+    def test_spooled_file(self):
+        """Files deleted on close are not handed to the reverse proxy."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        middleware = XAccelRedirectMiddleware(
+            None, source_dir=directory.name, destination_url="/proxied/"
+        )
+        request = django.test.RequestFactory().get("/dummy-url")
+        for delete, proxied in [(True, False), (False, True)]:
+            file_instance = SpooledFile(
+                iter([b"data"]),
+                name="data.txt",
+                max_size=0,
+                dir=directory.name,
+                delete=delete,
+            )
+            file_instance.spool()
+            self.addCleanup(file_instance.close)
+            response = DownloadResponse(file_instance)
+            result = middleware.process_response(request, response)
+            self.assertEqual(result is not response, proxied)
+
+    def test_delete_method(self):
+        """Files with a ``delete()`` method, such as FieldFile, are proxied."""
+        request, response = self.get_response()
+        response.file.delete = lambda: None
+        proxied = self.middleware.process_response(request, response)
+        self.assertIn("X-Accel-Redirect", proxied)
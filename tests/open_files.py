@@ -0,0 +1,123 @@
+"""Tests around :mod:`django_downloadview.open_files`."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from django_downloadview.files import PathFile
+from django_downloadview.open_files import OpenFileCache
+
+
+class OpenFileCacheTestCase(unittest.TestCase):
+    """Tests around :class:`~django_downloadview.open_files.OpenFileCache`."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = self.write("digits.txt", b"0123456789")
+        self.cache = OpenFileCache(maxsize=2)
+        self.addCleanup(self.cache.clear)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as file:
+            file.write(content)
+        return path
+
+    def test_shared_descriptor(self):
+        """Concurrent readers share one descriptor, with own positions."""
+        with mock.patch("os.open", wraps=os.open) as os_open:
+            first = self.cache.open(self.path)
+            second = self.cache.open(self.path)
+        self.assertEqual(os_open.call_count, 1)
+        self.assertEqual(first.read(4), b"0123")
+        second.seek(6)
+        self.assertEqual(second.read(), b"6789")
+        self.assertEqual(first.read(2), b"45")
+        buffer = bytearray(3)
+        self.assertEqual(first.readinto(buffer), 3)
+        self.assertEqual(buffer, b"678")
+        first.close()
+        second.close()
+
+    def test_descriptor_kept_open(self):
+        """Released descriptors stay open for next readers."""
+        self.cache.open(self.path).close()
+        with mock.patch("os.open") as os_open:
+            shared_file = self.cache.open(self.path)
+            self.assertEqual(shared_file.read(), b"0123456789")
+            shared_file.close()
+        self.assertFalse(os_open.called)
+
+    def test_modified_file(self):
+        """Entries are invalidated when file is modified or replaced."""
+        self.cache.open(self.path).close()
+        os.utime(self.path, (0, 0))
+        shared_file = self.cache.open(self.path)
+        self.assertEqual(shared_file.read(), b"0123456789")
+        shared_file.close()
+        os.replace(self.write("new.txt", b"new content"), self.path)
+        shared_file = self.cache.open(self.path)
+        self.assertEqual(shared_file.read(), b"new content")
+        shared_file.close()
+
+    def test_eviction(self):
+        """Descriptors are closed on eviction, or on release if in use."""
+        in_use = self.cache.open(self.path)
+        for name in ("a", "b"):
+            self.cache.open(self.write(name, name.encode())).close()
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(in_use.read(), b"0123456789")
+        with mock.patch("os.close", wraps=os.close) as os_close:
+            in_use.close()
+        os_close.assert_called_once_with(in_use.entry.fd)
+
+    def test_timeout(self):
+        """Unused descriptors are closed after ``timeout`` seconds."""
+        self.cache.open(self.path).close()
+        with mock.patch("time.monotonic", return_value=10**9):
+            self.cache.open(self.write("a", b"a")).close()
+        self.assertEqual(len(self.cache), 1)
+
+    def test_fileno(self):
+        """Shared descriptors are exposed, and their offset never moves."""
+        shared_file = self.cache.open(self.path)
+        fd = shared_file.fileno()
+        self.assertEqual(fd, shared_file.entry.fd)
+        shared_file.read(4)
+        shared_file.readinto(bytearray(4))
+        self.assertEqual(os.lseek(fd, 0, os.SEEK_CUR), 0)
+        shared_file.close()
+        with self.assertRaises(ValueError):
+            shared_file.fileno()
+
+    @unittest.skipUnless(hasattr(os, "preadv"), "os.preadv() is not available")
+    def test_readinto_in_place(self):
+        """readinto() reads into the buffer, without intermediate bytes."""
+        shared_file = self.cache.open(self.path)
+        shared_file.seek(2)
+        buffer = bytearray(4)
+        with mock.patch("os.pread") as pread:
+            self.assertEqual(shared_file.readinto(memoryview(buffer)), 4)
+        self.assertFalse(pread.called)
+        self.assertEqual(buffer, b"2345")
+        self.assertEqual(shared_file.tell(), 6)
+        shared_file.close()
+
+    def test_modified_nanoseconds(self):
+        """Modification times are compared with nanosecond precision."""
+        os.utime(self.path, ns=(0, 1))
+        self.cache.open(self.path).close()
+        os.utime(self.path, ns=(0, 2))
+        with mock.patch("os.open", wraps=os.open) as os_open:
+            self.cache.open(self.path).close()
+        self.assertEqual(os_open.call_count, 1)
+
+    def test_path_file(self):
+        """PathFile reads content via the cache."""
+        file_instance = PathFile(self.path, open_file_cache=self.cache)
+        self.assertEqual(b"".join(file_instance.chunks(4)), b"0123456789")
+        file_instance.close()
+        self.assertEqual(len(self.cache), 1)
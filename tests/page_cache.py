@@ -0,0 +1,55 @@
+"""Tests around :mod:`django_downloadview.page_cache`."""
+
+import os
+import unittest
+from unittest import mock
+
+from django_downloadview.page_cache import PageCachePolicy
+
+
+@unittest.skipUnless(hasattr(os, "posix_fadvise"), "posix_fadvise is not available")
+class PageCachePolicyTestCase(unittest.TestCase):
+    """Tests around :class:`~django_downloadview.page_cache.PageCachePolicy`."""
+
+    def test_start(self):
+        """Sequential and "will need" hints are given when streaming starts."""
+        policy = PageCachePolicy(sequential=True, willneed=True)
+        with mock.patch("os.posix_fadvise") as fadvise:
+            policy.start(3)
+        self.assertEqual(
+            fadvise.call_args_list,
+            [
+                mock.call(3, 0, 0, os.POSIX_FADV_SEQUENTIAL),
+                mock.call(3, 0, 0, os.POSIX_FADV_WILLNEED),
+            ],
+        )
+
+    def test_drop_behind(self):
+        """Pages of big files are dropped behind streamed chunks."""
+        policy = PageCachePolicy(drop_behind_size=10, drop_behind_window=4)
+        with mock.patch("os.posix_fadvise") as fadvise:
+            chunks = list(policy.stream(3, 10, [b"123", b"456", b"7890"]))
+            policy.finish(3, 10)
+        self.assertEqual(chunks, [b"123", b"456", b"7890"])
+        self.assertEqual(
+            fadvise.call_args_list,
+            [
+                mock.call(3, 0, 6, os.POSIX_FADV_DONTNEED),
+                mock.call(3, 6, 4, os.POSIX_FADV_DONTNEED),
+                mock.call(3, 0, 0, os.POSIX_FADV_DONTNEED),
+            ],
+        )
+
+    def test_small_file(self):
+        """Pages of files smaller than ``drop_behind_size`` are kept."""
+        policy = PageCachePolicy(drop_behind_size=10, drop_behind_window=1)
+        with mock.patch("os.posix_fadvise") as fadvise:
+            list(policy.stream(3, 9, [b"123", b"456"]))
+            policy.finish(3, 9)
+        self.assertFalse(fadvise.called)
+
+    def test_errors_are_ignored(self):
+        """Hints are advisory: errors are ignored."""
+        policy = PageCachePolicy()
+        with mock.patch("os.posix_fadvise", side_effect=OSError):
+            policy.start(3)
@@ -1,8 +1,24 @@
 """Unit tests around responses."""
 
+import asyncio
+import gzip
+import io
+import mimetypes
+import os
+import threading
 import unittest
+from unittest import mock
 
-from django_downloadview.response import DownloadResponse
+from django.core.files.base import File
+
+from django_downloadview.files import MappedFile, PathFile, VirtualFile
+from django_downloadview.io import BytesIteratorIO
+from django_downloadview.page_cache import PageCachePolicy
+from django_downloadview.response import (
+    DownloadResponse,
+    guess_type,
+    guess_type_by_suffixes,
+)
 
 
 class DownloadResponseTestCase(unittest.TestCase):
@@ -30,3 +46,446 @@ class DownloadResponseTestCase(unittest.TestCase):
         self.assertIn(
             r'filename="\"malicious\\file.exe"', headers["Content-Disposition"]
         )
+
+
+class GuessTypeTestCase(unittest.TestCase):
+    """Tests around :func:`django_downloadview.response.guess_type`."""
+
+    def test_same_as_mimetypes(self):
+        """guess_type() returns the same as mimetypes.guess_type()."""
+        for basename in ["a.txt", "b.TXT", "c.tar.gz", "d.tgz", "e.x.json", "f"]:
+            self.assertEqual(guess_type(basename), mimetypes.guess_type(basename))
+
+    def test_cache_by_suffix(self):
+        """guess_type() results are cached by file extension."""
+        guess_type_by_suffixes.cache_clear()
+        guess_type("one.csv")
+        guess_type("two.csv")
+        cache_info = guess_type_by_suffixes.cache_info()
+        self.assertEqual((cache_info.hits, cache_info.misses), (1, 1))
+
+
+class DownloadResponseChunksTestCase(unittest.TestCase):
+    """Tests around blocks of :class:`DownloadResponse` content."""
+
+    def test_chunk_size(self):
+        """DownloadResponse iterates over file in fixed-size blocks."""
+        file_instance = File(io.BytesIO(b"a\nb\nc\nd\ne\n"), name="lines.txt")
+        response = DownloadResponse(file_instance, chunk_size=4)
+        self.assertEqual(
+            list(response.streaming_content), [b"a\nb\n", b"c\nd\n", b"e\n"]
+        )
+        self.assertEqual(response.block_size, 4)
+
+    def test_default_chunk_size(self):
+        """DownloadResponse iterates over file in 64 KiB blocks by default."""
+        file_instance = File(io.BytesIO(b"\n" * 100000), name="lines.txt")
+        response = DownloadResponse(file_instance)
+        self.assertEqual(
+            [len(chunk) for chunk in response.streaming_content], [65536, 34464]
+        )
+
+    def test_generated_file(self):
+        """DownloadResponse reads blocks from generated files."""
+        file_instance = VirtualFile(
+            BytesIteratorIO(iter([b"abc", b"def", b"g"])), name="generated.txt"
+        )
+        response = DownloadResponse(file_instance, chunk_size=2)
+        self.assertEqual(list(response.streaming_content), [b"ab", b"cd", b"ef", b"g"])
+
+    def test_coalesce(self):
+        """Fragments generated by file wrapper are joined in blocks."""
+        file_instance = VirtualFile(io.BytesIO(b"abcde"), name="generated.txt")
+        file_instance.chunks = mock.Mock(return_value=iter([b"a", b"bcd", b"e"]))
+        response = DownloadResponse(file_instance, chunk_size=2)
+        self.assertEqual(list(response.streaming_content), [b"abcd", b"e"])
+
+    def test_max_latency(self):
+        """With max_latency, content is read as it is generated."""
+        file_instance = VirtualFile(
+            BytesIteratorIO(iter([b"a", b"b", b"c"])), name="generated.txt"
+        )
+        response = DownloadResponse(file_instance, chunk_size=2, max_latency=0)
+        self.assertEqual(list(response.streaming_content), [b"a", b"b", b"c"])
+
+    def test_max_latency_blocked(self):
+        """With max_latency, pending content is sent while generator blocks."""
+        resume = threading.Event()
+
+        def generate():
+            yield b"a"
+            resume.wait(5)
+            yield b"b"
+
+        file_instance = VirtualFile(BytesIteratorIO(generate()), name="events.txt")
+        response = DownloadResponse(file_instance, chunk_size=100, max_latency=0.05)
+        parts = iter(response)
+        self.assertEqual(next(parts), b"a")
+        self.assertFalse(resume.is_set())
+        resume.set()
+        self.assertEqual(list(parts), [b"b"])
+
+    def test_max_latency_text(self):
+        """With max_latency, generated text is sent as it is generated."""
+        file_instance = VirtualFile(
+            BytesIteratorIO(iter(["a", "b", "c"])), name="generated.txt"
+        )
+        response = DownloadResponse(file_instance, chunk_size=2, max_latency=0)
+        self.assertEqual(list(response.streaming_content), [b"a", b"b", b"c"])
+
+    def test_text_charset(self):
+        """Text content is encoded incrementally with response's charset."""
+        file_instance = VirtualFile(io.StringIO("éèê"), name="generated.txt")
+        response = DownloadResponse(
+            file_instance, content_type="text/plain; charset=utf-16", chunk_size=2
+        )
+        self.assertEqual(b"".join(response.streaming_content), "éèê".encode("utf-16"))
+
+
+class DownloadResponseReadAheadTestCase(unittest.TestCase):
+    """Tests around synchronous read-ahead in :class:`DownloadResponse`."""
+
+    def get_file(self, threads):
+        """Return file wrapper which records threads it is read from."""
+        source = io.BytesIO(b"0123456789")
+
+        def read(size=-1):
+            threads.add(threading.current_thread())
+            return source.read(size)
+
+        file_instance = mock.Mock(spec=["name", "size", "read"])
+        file_instance.name = "digits.txt"
+        file_instance.size = 10
+        file_instance.read.side_effect = read
+        return file_instance
+
+    def test_disabled(self):
+        """Synchronous responses are read by the caller by default."""
+        threads = set()
+        response = DownloadResponse(self.get_file(threads), chunk_size=3)
+        self.assertEqual(list(response), [b"012", b"345", b"678", b"9"])
+        self.assertEqual(threads, {threading.current_thread()})
+
+    def test_read_ahead(self):
+        """With read_ahead, file wrappers are read in a worker thread."""
+        threads = set()
+        response = DownloadResponse(self.get_file(threads), chunk_size=3, read_ahead=2)
+        self.assertEqual(list(response), [b"012", b"345", b"678", b"9"])
+        self.assertEqual(len(threads), 1)
+        self.assertNotIn(threading.current_thread(), threads)
+
+    def test_early_close(self):
+        """Worker thread is stopped before file wrapper is closed."""
+        file_instance = File(io.BytesIO(b"0" * 1000), name="zeros.txt")
+        response = DownloadResponse(file_instance, chunk_size=1, read_ahead=2)
+        parts = iter(response)
+        self.assertEqual(next(parts), b"0")
+        self.assertEqual(response._resource_closers[0], parts.close)
+        parts.close()
+        position = file_instance.tell()
+        self.assertLess(position, 1000)
+        file_instance.close()
+        self.assertEqual(list(parts), [])
+
+    def test_error(self):
+        """Errors raised while reading file are propagated."""
+        file_instance = mock.Mock(spec=["name", "size", "read"])
+        file_instance.name = "error.txt"
+        file_instance.read.side_effect = OSError("fake")
+        response = DownloadResponse(file_instance, read_ahead=1)
+        with self.assertRaises(OSError):
+            list(response)
+
+
+class DownloadResponseAsyncTestCase(unittest.TestCase):
+    """Tests around asynchronous iteration over :class:`DownloadResponse`."""
+
+    def consume(self, response, limit=None):
+        """Return list of parts from ``response``'s asynchronous iterator."""
+
+        async def consume():
+            parts = []
+            iterator = response.__aiter__()
+            async for part in iterator:
+                parts.append(part)
+                if len(parts) == limit:
+                    break
+            await iterator.aclose()
+            return parts
+
+        return asyncio.run(consume())
+
+    def test_read_ahead(self):
+        """Synchronous file wrappers are read in a worker thread."""
+        file_instance = File(io.BytesIO(b"0123456789"), name="digits.txt")
+        response = DownloadResponse(file_instance, chunk_size=3)
+        response.read_ahead = 1
+        self.assertEqual(self.consume(response), [b"012", b"345", b"678", b"9"])
+
+    def test_early_close(self):
+        """Worker thread stops when client goes away."""
+        file_instance = File(io.BytesIO(b"0" * 1000), name="zeros.txt")
+        response = DownloadResponse(file_instance, chunk_size=1)
+        response.read_ahead = 2
+        self.assertEqual(self.consume(response, limit=3), [b"0", b"0", b"0"])
+
+    def test_error(self):
+        """Errors raised while reading file are propagated."""
+        file_instance = mock.Mock(spec=["name", "size", "read"])
+        file_instance.name = "error.txt"
+        file_instance.read.side_effect = OSError("fake")
+        response = DownloadResponse(file_instance)
+        with self.assertRaises(OSError):
+            self.consume(response)
+
+    def test_achunks(self):
+        """File wrappers with ``achunks()`` are read natively."""
+
+        async def achunks(chunk_size):
+            yield b"native"
+
+        file_instance = File(io.BytesIO(b"sync"), name="native.txt")
+        file_instance.achunks = achunks
+        response = DownloadResponse(file_instance)
+        self.assertEqual(self.consume(response), [b"native"])
+
+
+class DownloadResponseRangeTestCase(unittest.TestCase):
+    """Tests around byte ranges in :class:`DownloadResponse`."""
+
+    def test_single_range(self):
+        """DownloadResponse with one range streams partial content."""
+        file_instance = File(io.BytesIO(b"0123456789"), name="digits.txt")
+        response = DownloadResponse(file_instance, ranges=[(2, 5)])
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 2-4/10")
+        self.assertEqual(response["Content-Length"], "3")
+        self.assertEqual(b"".join(response.streaming_content), b"234")
+
+    def test_multiple_ranges(self):
+        """DownloadResponse with several ranges streams multipart content."""
+        file_instance = File(io.BytesIO(b"0123456789"), name="digits.txt")
+        response = DownloadResponse(file_instance, ranges=[(0, 2), (8, 10)])
+        self.assertEqual(response.status_code, 206)
+        boundary = response.boundary
+        self.assertEqual(
+            response["Content-Type"], f"multipart/byteranges; boundary={boundary}"
+        )
+        content = b"".join(response.streaming_content)
+        self.assertEqual(int(response["Content-Length"]), len(content))
+        self.assertEqual(
+            content,
+            (
+                f"\r\n--{boundary}\r\n"
+                "Content-Type: text/plain; charset=utf-8\r\n"
+                "Content-Range: bytes 0-1/10\r\n\r\n"
+                "01"
+                f"\r\n--{boundary}\r\n"
+                "Content-Type: text/plain; charset=utf-8\r\n"
+                "Content-Range: bytes 8-9/10\r\n\r\n"
+                "89"
+                f"\r\n--{boundary}--\r\n"
+            ).encode("ascii"),
+        )
+
+    def test_no_range(self):
+        """DownloadResponse without ranges streams the whole file."""
+        file_instance = File(io.BytesIO(b"0123456789"), name="digits.txt")
+        response = DownloadResponse(file_instance)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Content-Range", response)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+
+    def test_range_chunks(self):
+        """Ranges are sliced by file wrappers which have range_chunks()."""
+        file_instance = MappedFile(__file__)
+        with open(__file__, "rb") as source:
+            expected = source.read()[10:5000]
+        response = DownloadResponse(file_instance, ranges=[(10, 5000)], chunk_size=1024)
+        with mock.patch.object(
+            file_instance, "range_chunks", wraps=file_instance.range_chunks
+        ) as range_chunks:
+            chunks = list(response.streaming_content)
+        range_chunks.assert_called_once_with(10, 5000, 1024)
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(b"".join(chunks), expected)
+        file_instance.close()
+
+    def test_buffer_chunks(self):
+        """Slices are sent without copy if buffer_chunks is set."""
+
+        class BufferResponse(DownloadResponse):
+            buffer_chunks = True
+
+        file_instance = MappedFile(__file__)
+        response = DownloadResponse(file_instance, ranges=[(10, 5000)], chunk_size=1024)
+        chunks = list(response.streaming_content)
+        self.assertTrue(all(type(chunk) is bytes for chunk in chunks))
+        response = BufferResponse(file_instance, ranges=[(10, 5000)], chunk_size=1024)
+        buffers = list(response.streaming_content)
+        self.assertTrue(all(isinstance(chunk, memoryview) for chunk in buffers))
+        self.assertTrue(all(chunk.obj is file_instance.mmap for chunk in buffers))
+        self.assertEqual(b"".join(buffers), b"".join(chunks))
+        del buffers
+        file_instance.close()
+
+
+class DownloadResponseFileToStreamTestCase(unittest.TestCase):
+    """Tests around :attr:`DownloadResponse.file_to_stream`."""
+
+    def test_file_descriptor(self):
+        """File wrappers backed by a file descriptor are given to server."""
+        file_instance = PathFile(__file__)
+        response = DownloadResponse(file_instance)
+        self.assertIs(response.file_to_stream, file_instance)
+        file_instance.close()
+
+    def test_text_mode(self):
+        """Files opened in text mode are encoded, not given to server."""
+        file_instance = File(open(__file__), name="response.py")
+        response = DownloadResponse(file_instance)
+        self.assertIsNone(response.file_to_stream)
+        with open(__file__, "rb") as source:
+            self.assertEqual(b"".join(response.streaming_content), source.read())
+        file_instance.close()
+
+    def test_lazy(self):
+        """File is not opened until server asks for file to stream."""
+        file_instance = PathFile(__file__)
+        DownloadResponse(file_instance)
+        self.assertTrue(file_instance.closed)
+
+    def test_no_file_descriptor(self):
+        """In-memory or generated files are iterated over."""
+        for file_instance in [
+            File(io.BytesIO(b"0123456789"), name="digits.txt"),
+            File(BytesIteratorIO(iter([b"0123456789"])), name="digits.txt"),
+        ]:
+            response = DownloadResponse(file_instance)
+            self.assertIsNone(response.file_to_stream)
+
+    def test_ranges(self):
+        """Byte ranges are iterated over."""
+        file_instance = PathFile(__file__)
+        response = DownloadResponse(file_instance, ranges=[(0, 1)])
+        self.assertIsNone(response.file_to_stream)
+
+
+class DownloadResponseCompressionTestCase(unittest.TestCase):
+    """Tests around streaming compression in :class:`DownloadResponse`."""
+
+    def test_gzip(self):
+        """DownloadResponse with compression streams compressed content."""
+        file_instance = File(
+            BytesIteratorIO(iter([b"Hello ", b"world!"])), name="hello.txt"
+        )
+        response = DownloadResponse(file_instance, compression="gzip", chunk_size=4)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/plain; charset=utf-8")
+        self.assertNotIn("Content-Length", response)
+        content = b"".join(response.streaming_content)
+        self.assertEqual(gzip.decompress(content), b"Hello world!")
+
+    def test_file_to_stream(self):
+        """Compressed content is not handed to ``wsgi.file_wrapper``."""
+        file_instance = PathFile(__file__)
+        response = DownloadResponse(file_instance, compression="gzip")
+        self.assertIsNone(response.file_to_stream)
+        self.assertTrue(file_instance.closed)
+
+    def test_ranges(self):
+        """Compression is ignored when byte ranges are served."""
+        file_instance = File(io.BytesIO(b"0123456789"), name="digits.txt")
+        response = DownloadResponse(file_instance, ranges=[(2, 5)], compression="gzip")
+        self.assertIsNone(response.compression)
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(b"".join(response.streaming_content), b"234")
+
+
+class DownloadResponseDigestTestCase(unittest.TestCase):
+    """Tests around digest headers in :class:`DownloadResponse`."""
+
+    sha256 = "c0535e4be2b79ffd93291305436bf889314e4a3faec05ecffcbb7df31ad9e51a"
+
+    def test_digest(self):
+        """DownloadResponse with digest sends Repr-Digest and Digest."""
+        file_instance = File(io.BytesIO(b"Hello world!"), name="hello.txt")
+        response = DownloadResponse(file_instance, digest=self.sha256)
+        self.assertEqual(
+            response["Repr-Digest"],
+            "sha-256=:wFNeS+K3n/2TKRMFQ2v4iTFOSj+uwF7P/Lt98xrZ5Ro=:",
+        )
+        self.assertEqual(
+            response["Digest"], "sha-256=wFNeS+K3n/2TKRMFQ2v4iTFOSj+uwF7P/Lt98xrZ5Ro="
+        )
+
+    def test_ranges(self):
+        """Digest of the whole file is sent with partial content."""
+        file_instance = File(io.BytesIO(b"Hello world!"), name="hello.txt")
+        response = DownloadResponse(file_instance, ranges=[(0, 5)], digest=self.sha256)
+        self.assertIn("Repr-Digest", response)
+
+    def test_compression(self):
+        """Digest is not sent when content is compressed on the fly."""
+        file_instance = File(io.BytesIO(b"Hello world!"), name="hello.txt")
+        response = DownloadResponse(
+            file_instance, compression="gzip", digest=self.sha256
+        )
+        self.assertIsNone(response.digest)
+        self.assertNotIn("Repr-Digest", response)
+
+
+@unittest.skipUnless(hasattr(os, "posix_fadvise"), "posix_fadvise is not available")
+class DownloadResponsePageCacheTestCase(unittest.TestCase):
+    """Tests around page cache policy of :class:`DownloadResponse`."""
+
+    def setUp(self):
+        self.policy = PageCachePolicy(drop_behind_size=1, drop_behind_window=1024)
+
+    def test_stream(self):
+        """Policy is applied while chunks are read, and when file is closed."""
+        file_instance = PathFile(__file__)
+        response = DownloadResponse(
+            file_instance, chunk_size=1024, page_cache_policy=self.policy
+        )
+        with mock.patch("os.posix_fadvise") as fadvise:
+            content = b"".join(response.streaming_content)
+            fd = file_instance.fileno()
+            response.finish_page_cache()
+        file_instance.close()
+        with open(__file__, "rb") as source:
+            self.assertEqual(content, source.read())
+        advices = [call.args[3] for call in fadvise.call_args_list]
+        self.assertEqual(advices[0], os.POSIX_FADV_SEQUENTIAL)
+        self.assertEqual(
+            advices.count(os.POSIX_FADV_DONTNEED), len(content) // 1024 + 1
+        )
+        self.assertEqual(
+            fadvise.call_args_list[-1], mock.call(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        )
+
+    def test_file_to_stream(self):
+        """Policy is applied to files handed to ``wsgi.file_wrapper``."""
+        file_instance = PathFile(__file__)
+        response = DownloadResponse(file_instance, page_cache_policy=self.policy)
+        with mock.patch("os.posix_fadvise") as fadvise:
+            self.assertIs(response.file_to_stream, file_instance)
+        fadvise.assert_called_once_with(
+            file_instance.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL
+        )
+        file_instance.close()
+
+    def test_unopened_file(self):
+        """Policy does not open files."""
+        file_instance = PathFile(__file__)
+        response = DownloadResponse(file_instance, page_cache_policy=self.policy)
+        response.finish_page_cache()
+        self.assertTrue(file_instance.closed)
+
+    def test_ranges(self):
+        """Policy is not applied to byte ranges."""
+        file_instance = File(io.BytesIO(b"0123456789"), name="digits.txt")
+        response = DownloadResponse(
+            file_instance, ranges=[(0, 2)], page_cache_policy=self.policy
+        )
+        self.assertIsNone(response.page_cache_policy)
@@ -1,18 +1,42 @@
 """Tests around :mod:`django_downloadview.views`."""
 
+import asyncio
 import calendar
 from datetime import datetime
+import gzip
+import hashlib
+import io
 import os
+import tempfile
 import unittest
 from unittest import mock
 
 from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db.models.fields.files import FieldFile, FileField
 from django.http import Http404
 from django.http.response import HttpResponseNotModified
 import django.test
+from django.utils.http import http_date
 
-from django_downloadview import exceptions, views
+from django_downloadview import (
+    BytesIteratorIO,
+    DownloadResponse,
+    PathFile,
+    VirtualFile,
+    exceptions,
+    views,
+)
+from django_downloadview.cache_control import CachePolicy
+from django_downloadview.compression import CompressedCache
+from django_downloadview.content_cache import ContentCache
+from django_downloadview.digest import ChecksumIndex
+from django_downloadview.files import MappedFile, SpooledFile, StorageFile
+from django_downloadview.open_files import OpenFileCache
+from django_downloadview.page_cache import PageCachePolicy
 from django_downloadview.test import setup_view
+from django_downloadview.utils import TimedLRUCache
 
 
 class DownloadMixinTestCase(unittest.TestCase):
@@ -132,6 +156,44 @@ class DownloadMixinTestCase(unittest.TestCase):
         mixin = views.DownloadMixin()
         self.assertIs(mixin.was_modified_since(file_wrapper, "fake since"), True)
 
+    def test_get_etag_specific(self):
+        """DownloadMixin.get_etag() uses file wrapper's ``etag`` if any."""
+        file_wrapper = mock.Mock(etag="abc123")
+        mixin = views.DownloadMixin()
+        self.assertEqual(mixin.get_etag(file_wrapper), '"abc123"')
+
+    def test_get_etag_weak(self):
+        """DownloadMixin.get_etag() fallbacks to weak ETag from ``size`` and
+        ``modified_time`` attributes."""
+        file_wrapper = mock.Mock(spec=["size", "modified_time"])
+        file_wrapper.size = 16
+        file_wrapper.modified_time = datetime(2020, 1, 1)
+        mixin = views.DownloadMixin()
+        etag = mixin.get_etag(file_wrapper)
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertTrue(etag.endswith('-10"'))
+        file_wrapper.size = 17
+        self.assertNotEqual(mixin.get_etag(file_wrapper), etag)
+
+    def test_get_etag_not_implemented(self):
+        """DownloadMixin.get_etag() returns None if file wrapper does not
+        support ``etag``, ``size`` or ``modified_time`` attributes."""
+        file_wrapper = mock.Mock(spec=["size"])
+        file_wrapper.size = 16
+        mixin = views.DownloadMixin()
+        self.assertIsNone(mixin.get_etag(file_wrapper))
+
+    def test_etag_matches(self):
+        """DownloadMixin.etag_matches() compares ETags weakly by default."""
+        mixin = views.DownloadMixin()
+        self.assertTrue(mixin.etag_matches('"a"', '"b", "a"'))
+        self.assertTrue(mixin.etag_matches('W/"a"', '"a"'))
+        self.assertTrue(mixin.etag_matches('"a"', "*"))
+        self.assertFalse(mixin.etag_matches('"a"', '"b"'))
+        self.assertFalse(mixin.etag_matches(None, "*"))
+        self.assertTrue(mixin.etag_matches('"a"', '"a"', weak=False))
+        self.assertFalse(mixin.etag_matches('W/"a"', 'W/"a"', weak=False))
+
     def test_not_modified_response(self):
         "DownloadMixin.not_modified_response returns HttpResponseNotModified."
         mixin = views.DownloadMixin()
@@ -156,6 +218,67 @@ class DownloadMixinTestCase(unittest.TestCase):
         self.assertIs(response, mock.sentinel.response)
         response_factory.assert_called_once_with(**response_kwargs)  # Not args
 
+    def test_download_response_chunk_size(self):
+        "DownloadMixin.download_response() passes ``chunk_size`` if set."
+        mixin = views.DownloadMixin()
+        mixin.file_instance = mock.sentinel.file_wrapper
+        mixin.response_class = mock.Mock(return_value=mock.sentinel.response)
+        mixin.chunk_size = 4096
+        mixin.download_response()
+        self.assertEqual(mixin.response_class.call_args.kwargs["chunk_size"], 4096)
+
+    def test_download_response_max_latency(self):
+        "DownloadMixin.download_response() passes ``max_latency`` if set."
+        mixin = views.DownloadMixin()
+        mixin.file_instance = mock.sentinel.file_wrapper
+        mixin.response_class = mock.Mock(return_value=mock.sentinel.response)
+        mixin.max_latency = 0.5
+        mixin.download_response()
+        self.assertEqual(mixin.response_class.call_args.kwargs["max_latency"], 0.5)
+
+    def test_download_response_read_ahead(self):
+        "DownloadMixin.download_response() passes ``read_ahead`` if set."
+        mixin = views.DownloadMixin()
+        mixin.file_instance = mock.sentinel.file_wrapper
+        mixin.response_class = mock.Mock(return_value=mock.sentinel.response)
+        mixin.read_ahead = 2
+        mixin.download_response()
+        self.assertEqual(mixin.response_class.call_args.kwargs["read_ahead"], 2)
+
+    def test_download_response_cache_policy(self):
+        "DownloadMixin.download_response() applies cache policy."
+        mixin = views.DownloadMixin()
+        mixin.request = django.test.RequestFactory().get("/dummy-url")
+        mixin.file_instance = PathFile(__file__)
+        mixin.cache_policy = CachePolicy(max_age=60, private=True)
+        response = mixin.download_response()
+        self.assertEqual(response["Cache-Control"], "private, max-age=60")
+        self.assertTrue(response.has_header("Expires"))
+
+    def test_get_cache_policy_rules(self):
+        "DownloadMixin.get_cache_policy() picks first matching rule."
+        mixin = views.DownloadMixin()
+        mixin.cache_policy = mock.sentinel.default
+        mixin.cache_rules = [
+            (r"\.[0-9a-f]{12}\.css$", mock.sentinel.hashed),
+            (r"\.css$", mock.sentinel.css),
+        ]
+        for name, policy in [
+            ("app.0123456789ab.css", mock.sentinel.hashed),
+            ("app.css", mock.sentinel.css),
+            ("app.js", mock.sentinel.default),
+        ]:
+            file_instance = File(None, name=name)
+            self.assertIs(mixin.get_cache_policy(file_instance), policy)
+
+    def test_not_modified_response_cache_policy(self):
+        "DownloadMixin.not_modified_response() applies cache policy."
+        mixin = views.DownloadMixin()
+        mixin.cache_policy = CachePolicy(max_age=60, public=True, expires=False)
+        response = mixin.not_modified_response()
+        self.assertEqual(response["Cache-Control"], "public, max-age=60")
+        self.assertFalse(response.has_header("Expires"))
+
     def test_render_to_response_not_modified(self):
         """DownloadMixin.render_to_response() respects HTTP_IF_MODIFIED_SINCE
         header (calls ``not_modified_response()``)."""
@@ -179,6 +302,20 @@ class DownloadMixinTestCase(unittest.TestCase):
         )
         mixin.not_modified_response.assert_called_once_with()
 
+    def test_render_to_response_none_match(self):
+        """DownloadMixin.render_to_response() respects HTTP_IF_NONE_MATCH
+        header (returns not modified response before download response)."""
+        mixin = views.DownloadMixin()
+        mixin.request = django.test.RequestFactory().get(
+            "/dummy-url", HTTP_IF_NONE_MATCH='"abc123"'
+        )
+        mixin.get_file = mock.Mock(return_value=mock.Mock(etag="abc123"))
+        mixin.download_response = mock.Mock()
+        response = mixin.render_to_response()
+        self.assertTrue(isinstance(response, HttpResponseNotModified))
+        self.assertEqual(response["ETag"], '"abc123"')
+        self.assertEqual(mixin.download_response.call_count, 0)
+
     def test_render_to_response_modified(self):
         """DownloadMixin.render_to_response() calls download_response()."""
         # Setup.
@@ -199,6 +336,120 @@ class DownloadMixinTestCase(unittest.TestCase):
         self.assertEqual(mixin.was_modified_since.call_count, 0)
         mixin.download_response.assert_called_once_with()
 
+    def test_render_to_response_range(self):
+        """DownloadMixin.render_to_response() respects HTTP_RANGE header
+        (passes ``ranges`` to ``download_response()``)."""
+        # Setup.
+        mixin = views.DownloadMixin()
+        mixin.request = django.test.RequestFactory().get(
+            "/dummy-url", HTTP_RANGE="bytes=2-4"
+        )
+        mixin.get_file = mock.Mock(
+            return_value=File(io.BytesIO(b"0123456789"), name="x")
+        )
+        # Run.
+        response = mixin.render_to_response()
+        # Check.
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 2-4/10")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(b"".join(response.streaming_content), b"234")
+
+    def test_render_to_response_range_not_satisfiable(self):
+        """DownloadMixin.render_to_response() returns 416 response if HTTP_RANGE
+        header cannot be satisfied."""
+        mixin = views.DownloadMixin()
+        mixin.request = django.test.RequestFactory().get(
+            "/dummy-url", HTTP_RANGE="bytes=20-"
+        )
+        mixin.get_file = mock.Mock(
+            return_value=File(io.BytesIO(b"0123456789"), name="x")
+        )
+        response = mixin.render_to_response()
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */10")
+
+    def test_render_to_response_if_range_date(self):
+        """DownloadMixin.render_to_response() serves ranges if HTTP_IF_RANGE
+        is exactly the file's modification date, else the whole file."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "digits.txt")
+        with open(path, "wb") as digits:
+            digits.write(b"0123456789")
+        os.utime(path, (1000000000, 1000000000))
+        for if_range, status in [
+            (http_date(1000000000), 206),
+            (http_date(1000000001), 200),
+            (http_date(999999999), 200),
+            ("not a date", 200),
+        ]:
+            mixin = views.DownloadMixin()
+            mixin.request = django.test.RequestFactory().get(
+                "/dummy-url", HTTP_RANGE="bytes=2-4", HTTP_IF_RANGE=if_range
+            )
+            mixin.get_file = mock.Mock(return_value=PathFile(path))
+            response = mixin.render_to_response()
+            self.assertEqual(response.status_code, status, if_range)
+            response.file.close()
+
+    def test_head_closes_file(self):
+        """DownloadMixin.render_to_response() closes file wrapper opened to
+        answer HEAD requests."""
+        mixin = views.DownloadMixin()
+        mixin.request = django.test.RequestFactory().head("/dummy-url")
+        file_wrapper = File(io.BytesIO(b"0123456789"), name="x")
+        mixin.get_file = mock.Mock(return_value=file_wrapper)
+        response = mixin.render_to_response()
+        self.assertEqual(response["Content-Length"], "10")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertTrue(file_wrapper.closed)
+
+    def test_render_to_response_too_many_ranges(self):
+        """DownloadMixin.render_to_response() ignores HTTP_RANGE header if it
+        lists more than :attr:`max_ranges` ranges."""
+        mixin = views.DownloadMixin()
+        mixin.request = django.test.RequestFactory().get(
+            "/dummy-url", HTTP_RANGE="bytes=" + ",".join(["0-"] * 200)
+        )
+        mixin.get_file = mock.Mock(
+            return_value=File(io.BytesIO(b"0123456789"), name="x")
+        )
+        response = mixin.render_to_response()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+
+    def test_render_to_response_range_not_seekable(self):
+        """DownloadMixin.render_to_response() ignores HTTP_RANGE header if file
+        wrapper is not seekable."""
+        mixin = views.DownloadMixin()
+        mixin.request = django.test.RequestFactory().get(
+            "/dummy-url", HTTP_RANGE="bytes=2-4"
+        )
+        file_wrapper = File(BytesIteratorIO(iter([b"0123456789"])), name="x")
+        file_wrapper.size = 10
+        mixin.get_file = mock.Mock(return_value=file_wrapper)
+        response = mixin.render_to_response()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Accept-Ranges", response)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+
+    def test_render_to_response_head(self):
+        """DownloadMixin.render_to_response() answers HEAD requests with
+        headers computed from file metadata, without reading the file."""
+        mixin = views.DownloadMixin()
+        mixin.request = django.test.RequestFactory().head("/dummy-url")
+        file_wrapper = PathFile(__file__)
+        mixin.get_file = mock.Mock(return_value=file_wrapper)
+        response = mixin.render_to_response()
+        self.assertFalse(isinstance(response, DownloadResponse))
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["Content-Length"], str(os.path.getsize(__file__)))
+        self.assertIn("Content-Type", response)
+        self.assertIn("Last-Modified", response)
+        self.assertIn("ETag", response)
+        self.assertTrue(file_wrapper.closed)
+
     def test_render_to_response_file_not_found(self):
         "DownloadMixin.render_to_response() calls file_not_found_response()."
         # Setup.
@@ -233,6 +484,42 @@ class BaseDownloadViewTestCase(unittest.TestCase):
         view.render_to_response.assert_called_once_with()
 
 
+class AsyncBaseDownloadViewTestCase(unittest.TestCase):
+    "Tests around :class:`django_downloadviews.views.base.AsyncBaseDownloadView`."
+
+    def test_view_is_async(self):
+        """AsyncBaseDownloadView subclasses are asynchronous views."""
+        for view_class in [
+            views.AsyncBaseDownloadView,
+            views.AsyncObjectDownloadView,
+            views.AsyncStorageDownloadView,
+            views.AsyncHTTPDownloadView,
+        ]:
+            self.assertTrue(view_class.view_is_async)
+
+    def test_get_file_coroutine(self):
+        """AsyncBaseDownloadView awaits ``async def get_file()``."""
+        file_wrapper = File(io.BytesIO(b"0123456789"), name="digits.txt")
+
+        class AsyncView(views.AsyncBaseDownloadView):
+            async def get_file(self):
+                return file_wrapper
+
+        request = django.test.RequestFactory().get("/dummy-url")
+        view = setup_view(AsyncView(), request)
+        response = asyncio.run(view.get(request))
+        self.assertIs(response.file, file_wrapper)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+
+    def test_get_file_not_found(self):
+        """AsyncBaseDownloadView raises Http404 if file does not exist."""
+        request = django.test.RequestFactory().get("/dummy-url")
+        view = setup_view(views.AsyncBaseDownloadView(), request)
+        view.get_file = mock.Mock(side_effect=exceptions.FileNotFound)
+        with self.assertRaises(Http404):
+            asyncio.run(view.get(request))
+
+
 class PathDownloadViewTestCase(unittest.TestCase):
     "Tests for :class:`django_downloadviews.views.path.PathDownloadView`."
 
@@ -242,6 +529,15 @@ class PathDownloadViewTestCase(unittest.TestCase):
         file_wrapper = view.get_file()
         self.assertTrue(isinstance(file_wrapper, File))
 
+    def test_get_file_lazy(self):
+        "PathDownloadView.get_file() does not open the file."
+        view = setup_view(views.PathDownloadView(path=__file__), "fake request")
+        file_wrapper = view.get_file()
+        self.assertEqual(file_wrapper.size, os.path.getsize(__file__))
+        self.assertTrue(file_wrapper.closed)
+        file_wrapper.close()
+        self.assertTrue(file_wrapper.closed)
+
     def test_get_file_does_not_exist(self):
         """PathDownloadView.get_file() raises FileNotFound if field does not
         exist.
@@ -260,6 +556,180 @@ class PathDownloadViewTestCase(unittest.TestCase):
         with self.assertRaises(exceptions.FileNotFound):
             view.get_file()
 
+    def test_get_file_metadata_cache(self):
+        """PathDownloadView.get_file() trusts :attr:`metadata_cache` entries,
+        and passes the cache to file wrapper."""
+        metadata_cache = mock.Mock()
+        metadata_cache.get.return_value = mock.Mock(size=42)
+        view = setup_view(
+            views.PathDownloadView(path=__file__, metadata_cache=metadata_cache),
+            "fake request",
+        )
+        with mock.patch("os.stat") as os_stat:
+            file_wrapper = view.get_file()
+            self.assertEqual(file_wrapper.size, 42)
+        self.assertFalse(os_stat.called)
+        self.assertIs(file_wrapper.metadata_cache, metadata_cache)
+
+    def test_get_file_single_stat(self):
+        "PathDownloadView stats the file once, and does not open it."
+        request = django.test.RequestFactory().get("/dummy-url")
+        view = setup_view(views.PathDownloadView(path=__file__), request)
+        with mock.patch("os.stat", wraps=os.stat) as os_stat:
+            response = view.render_to_response()
+        self.assertEqual(os_stat.call_count, 1)
+        self.assertTrue(response.file.closed)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+    def test_open_file_cache(self):
+        "PathDownloadView shares descriptors via :attr:`open_file_cache`."
+        open_file_cache = OpenFileCache()
+        self.addCleanup(open_file_cache.clear)
+        with open(__file__, "rb") as source:
+            content = source.read()
+        with mock.patch("os.open", wraps=os.open) as os_open:
+            for _ in range(2):
+                request = django.test.RequestFactory().get("/dummy-url")
+                view = setup_view(
+                    views.PathDownloadView(
+                        path=__file__, open_file_cache=open_file_cache
+                    ),
+                    request,
+                )
+                response = view.render_to_response()
+                self.assertIs(response.file_to_stream, response.file)
+                self.assertEqual(b"".join(response.streaming_content), content)
+                response.file.close()
+        self.assertEqual(os_open.call_count, 1)
+
+    def test_page_cache_policy(self):
+        "PathDownloadView passes :attr:`page_cache_policy` to responses."
+        policy = PageCachePolicy()
+        request = django.test.RequestFactory().get("/dummy-url")
+        view = setup_view(
+            views.PathDownloadView(path=__file__, page_cache_policy=policy), request
+        )
+        response = view.render_to_response()
+        self.assertIs(response.page_cache_policy, policy)
+
+    def test_head_accept_ranges(self):
+        "PathDownloadView answers HEAD requests with Accept-Ranges header."
+        request = django.test.RequestFactory().head("/dummy-url")
+        view = setup_view(views.PathDownloadView(path=__file__), request)
+        response = view.render_to_response()
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+    def test_file_class(self):
+        "PathDownloadView serves ranges of :attr:`file_class` instances."
+        request = django.test.RequestFactory().get("/dummy-url", HTTP_RANGE="bytes=0-9")
+        view = setup_view(
+            views.PathDownloadView(path=__file__, file_class=MappedFile), request
+        )
+        response = view.render_to_response()
+        self.assertIsInstance(response.file, MappedFile)
+        with open(__file__, "rb") as source:
+            self.assertEqual(b"".join(response.streaming_content), source.read(10))
+        response.file.close()
+
+
+class PathDownloadViewPrecompressedTestCase(unittest.TestCase):
+    """Tests for precompressed siblings in
+    :class:`django_downloadviews.views.path.PathDownloadView`."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "hello.txt")
+        for suffix, content in [("", b"Hello world!"), (".gz", b"gzipped")]:
+            with open(self.path + suffix, "wb") as sibling:
+                sibling.write(content)
+
+    def get_view(self, accept_encoding, encodings=("br", "gzip")):
+        request = django.test.RequestFactory().get(
+            "/dummy-url", HTTP_ACCEPT_ENCODING=accept_encoding
+        )
+        view = views.PathDownloadView(
+            path=self.path,
+            precompressed_encodings=encodings,
+            precompressed_cache=TimedLRUCache(),
+        )
+        return setup_view(view, request)
+
+    def test_get_file_precompressed(self):
+        "PathDownloadView serves acceptable precompressed sibling."
+        view = self.get_view("br, gzip")
+        response = view.render_to_response()
+        self.assertEqual(response.file.name, self.path + ".gz")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Length"], "7")
+        self.assertEqual(response["Content-Type"], "text/plain; charset=utf-8")
+        self.assertIn('filename="hello.txt"', response["Content-Disposition"])
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_get_file_not_accepted(self):
+        "PathDownloadView serves original file if encodings are not accepted."
+        view = self.get_view("br, gzip;q=0")
+        response = view.render_to_response()
+        self.assertEqual(response.file.name, self.path)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_get_file_disabled(self):
+        "PathDownloadView does not look for siblings by default."
+        view = self.get_view("gzip", encodings=())
+        response = view.render_to_response()
+        self.assertEqual(response.file.name, self.path)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertFalse(response.has_header("Vary"))
+
+    def test_existence_is_cached(self):
+        "PathDownloadView caches existence of precompressed siblings."
+        view = self.get_view("gzip")
+        with mock.patch("os.path.isfile", return_value=True) as isfile:
+            view.get_file()
+            view.get_file()
+        self.assertEqual(
+            [call.args[0] for call in isfile.call_args_list],
+            [self.path + ".gz"],
+        )
+
+    def test_get_file_sibling_removed(self):
+        "PathDownloadView serves original file if cached sibling is gone."
+        view = self.get_view("gzip")
+        self.assertEqual(view.get_file().name, self.path + ".gz")
+        os.remove(self.path + ".gz")
+        response = view.render_to_response()
+        self.assertEqual(response.file.name, self.path)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertIsNone(view.precompressed_cache.get(self.path + ".gz"))
+
+    def test_get_file_sibling_outdated(self):
+        "PathDownloadView does not serve siblings older than original file."
+        os.utime(self.path + ".gz", (0, 0))
+        view = self.get_view("gzip")
+        response = view.render_to_response()
+        self.assertEqual(response.file.name, self.path)
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_storage_sibling_removed(self):
+        "StorageDownloadView serves original file if cached sibling is gone."
+        request = django.test.RequestFactory().get(
+            "/dummy-url", HTTP_ACCEPT_ENCODING="gzip"
+        )
+        view = views.StorageDownloadView(
+            storage=FileSystemStorage(location=os.path.dirname(self.path)),
+            path="hello.txt",
+            precompressed_encodings=("gzip",),
+            precompressed_cache=TimedLRUCache(),
+        )
+        view = setup_view(view, request)
+        self.assertEqual(view.get_file().name, "hello.txt.gz")
+        os.remove(self.path + ".gz")
+        response = view.render_to_response()
+        self.assertEqual(response.file.name, "hello.txt")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertIsNone(view.precompressed_cache.get((view.storage, "hello.txt.gz")))
+
 
 class ObjectDownloadViewTestCase(unittest.TestCase):
     "Tests for :class:`django_downloadviews.views.object.ObjectDownloadView`."
@@ -296,6 +766,51 @@ class ObjectDownloadViewTestCase(unittest.TestCase):
         with self.assertRaises(exceptions.FileNotFound):
             view.get_file()
 
+    def test_get_file_sha256_field(self):
+        "ObjectDownloadView.get_file() sets ``sha256`` from model field."
+        view = setup_view(
+            views.ObjectDownloadView(sha256_field="checksum"), "fake request"
+        )
+        view.object = mock.Mock(spec=["file", "checksum"])
+        file_wrapper = view.get_file()
+        self.assertIs(file_wrapper.sha256, view.object.checksum)
+        self.assertIs(view.get_digest(file_wrapper), view.object.checksum)
+
+    def test_get_file_metadata_cache(self):
+        """ObjectDownloadView.get_file() wraps field file in a StorageFile
+        using :attr:`metadata_cache`."""
+        metadata_cache = mock.Mock()
+        view = setup_view(
+            views.ObjectDownloadView(metadata_cache=metadata_cache, size_field="size"),
+            "fake request",
+        )
+        view.object = mock.Mock(spec=["file", "size"])
+        file_wrapper = view.get_file()
+        self.assertIsInstance(file_wrapper, StorageFile)
+        self.assertIs(file_wrapper.storage, view.object.file.storage)
+        self.assertIs(file_wrapper.name, view.object.file.name)
+        self.assertIs(file_wrapper.metadata_cache, metadata_cache)
+        self.assertIs(file_wrapper.size, view.object.size)
+
+    def test_head_field_file(self):
+        """ObjectDownloadView answers HEAD requests without opening field
+        files of local storages."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        storage = FileSystemStorage(location=directory.name)
+        storage.save("hello.txt", ContentFile(b"Hello world!"))
+        field = FileField(storage=storage)
+        field.name = "file"
+        request = django.test.RequestFactory().head("/dummy-url")
+        view = setup_view(views.ObjectDownloadView(), request)
+        view.object = mock.Mock(spec=["file"])
+        view.object.file = FieldFile(None, field, "hello.txt")
+        with mock.patch.object(storage, "open", wraps=storage.open) as storage_open:
+            response = view.render_to_response()
+        self.assertFalse(storage_open.called)
+        self.assertEqual(response["Content-Length"], "12")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
 
 class VirtualDownloadViewTestCase(unittest.TestCase):
     """Test suite around
@@ -328,3 +843,337 @@ class VirtualDownloadViewTestCase(unittest.TestCase):
         self.assertTrue(result is True)
         self.assertFalse(modified_time.called)
         self.assertFalse(size.called)
+
+    def test_spooled_file(self):
+        """VirtualDownloadView serves size and ranges of spooled content."""
+        request = django.test.RequestFactory().get("/dummy-url", HTTP_RANGE="bytes=6-")
+        view = setup_view(views.VirtualDownloadView(), request)
+        view.get_file = mock.Mock(
+            return_value=SpooledFile(iter([b"Hello ", b"world!"]), name="hello.txt")
+        )
+        response = view.render_to_response()
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Length"], "6")
+        self.assertEqual(b"".join(response.streaming_content), b"world!")
+
+
+class VirtualDownloadViewCompressionTestCase(unittest.TestCase):
+    """Tests around on-the-fly compression of generated files."""
+
+    def get_view(self, accept_encoding, **kwargs):
+        request = django.test.RequestFactory().get(
+            "/dummy-url", HTTP_ACCEPT_ENCODING=accept_encoding
+        )
+        view = views.VirtualDownloadView(compress_encodings=("gzip",), **kwargs)
+        view.get_file = mock.Mock(
+            side_effect=lambda: VirtualFile(
+                BytesIteratorIO(iter([b"Hello ", b"world!"])), name="hello.txt"
+            )
+        )
+        return setup_view(view, request)
+
+    def test_compressed(self):
+        "VirtualDownloadView compresses content if client accepts encoding."
+        response = self.get_view("gzip, deflate").render_to_response()
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        content = b"".join(response.streaming_content)
+        self.assertEqual(gzip.decompress(content), b"Hello world!")
+
+    def test_not_accepted(self):
+        "VirtualDownloadView streams identity if client does not accept it."
+        response = self.get_view("br").render_to_response()
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(b"".join(response.streaming_content), b"Hello world!")
+
+    def test_cache(self):
+        "Compressed content is served from cache on repeat downloads."
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cache = CompressedCache(directory.name)
+        view = self.get_view("gzip", compressed_cache=cache)
+        view.get_compressed_cache_key = mock.Mock(return_value="hello-v1")
+        response = view.render_to_response()
+        b"".join(response.streaming_content)
+        self.assertNotIn("Content-Length", response)
+        response = view.render_to_response()
+        os.remove(cache.get_path("hello-v1", "gzip"))  # Pruned concurrently.
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/plain; charset=utf-8")
+        self.assertIn('filename="hello.txt"', response["Content-Disposition"])
+        content = b"".join(response.streaming_content)
+        self.assertEqual(int(response["Content-Length"]), len(content))
+        self.assertEqual(gzip.decompress(content), b"Hello world!")
+        response.file.close()
+
+
+class PathDownloadViewCompressionTestCase(unittest.TestCase):
+    """Tests around on-the-fly compression of local files."""
+
+    def get_view(self, **headers):
+        request = django.test.RequestFactory().get(
+            "/dummy-url", HTTP_ACCEPT_ENCODING="gzip", **headers
+        )
+        view = views.PathDownloadView(path=__file__, compress_encodings=("gzip",))
+        return setup_view(view, request)
+
+    def test_etag(self):
+        "Compressed content has its own weak ETag, and no Accept-Ranges."
+        view = self.get_view()
+        etag = view.get_etag(view.get_file())
+        response = view.render_to_response()
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["ETag"], view.get_compressed_etag(etag, "gzip"))
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        self.assertTrue(response["ETag"].endswith('-gzip"'))
+        self.assertNotIn("Accept-Ranges", response)
+        response.file.close()
+
+    def test_if_none_match(self):
+        "Compressed ETag is matched by If-None-Match."
+        response = self.get_view().render_to_response()
+        response.file.close()
+        response = self.get_view(
+            HTTP_IF_NONE_MATCH=response["ETag"]
+        ).render_to_response()
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_range(self):
+        "Ranges are not resumed from compressed content."
+        response = self.get_view().render_to_response()
+        response.file.close()
+        response = self.get_view(
+            HTTP_RANGE="bytes=10-", HTTP_IF_RANGE=response["ETag"]
+        ).render_to_response()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        response.file.close()
+
+    def test_range(self):
+        "Ranges are served uncompressed, with identity ETag."
+        view = self.get_view(HTTP_RANGE="bytes=0-9")
+        etag = view.get_etag(view.get_file())
+        response = view.render_to_response()
+        self.assertEqual(response.status_code, 206)
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        response.file.close()
+
+
+class DownloadMixinDigestTestCase(unittest.TestCase):
+    """Tests around digest headers in download views."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "hello.txt")
+        with open(self.path, "wb") as hello:
+            hello.write(b"Hello world!")
+        self.sha256 = hashlib.sha256(b"Hello world!").hexdigest()
+
+    def get_view(self, **kwargs):
+        request = django.test.RequestFactory().get("/dummy-url")
+        return setup_view(views.PathDownloadView(path=self.path, **kwargs), request)
+
+    def test_sidecar(self):
+        "PathDownloadView reads digest from sidecar file."
+        with open(self.path + ".sha256", "w") as sidecar:
+            sidecar.write(f"{self.sha256}  hello.txt\n")
+        view = self.get_view(digest_sidecar_suffix=".sha256")
+        response = view.render_to_response()
+        self.assertEqual(
+            response["Repr-Digest"],
+            "sha-256=:wFNeS+K3n/2TKRMFQ2v4iTFOSj+uwF7P/Lt98xrZ5Ro=:",
+        )
+        self.assertIs(response.file_to_stream, response.file)
+        response.file.close()
+
+    def test_no_sidecar(self):
+        "PathDownloadView sends no digest if sidecar file is missing."
+        view = self.get_view(digest_sidecar_suffix=".sha256")
+        response = view.render_to_response()
+        self.assertNotIn("Repr-Digest", response)
+
+    def test_sidecar_cached(self):
+        "Digests read from sidecar files are cached until file changes."
+        with open(self.path + ".sha256", "w") as sidecar:
+            sidecar.write(self.sha256)
+        kwargs = {"digest_sidecar_suffix": ".sha256", "sidecar_cache": TimedLRUCache()}
+        view = self.get_view(**kwargs)
+        with mock.patch.object(
+            view, "read_sidecar_digest", wraps=view.read_sidecar_digest
+        ) as read:
+            for _ in range(2):
+                self.assertEqual(view.get_digest(PathFile(self.path)), self.sha256)
+            self.assertEqual(read.call_count, 1)
+            os.utime(self.path, (0, 0))
+            self.assertEqual(view.get_digest(PathFile(self.path)), self.sha256)
+            self.assertEqual(read.call_count, 2)
+
+    def test_storage_sidecar_missing(self):
+        "StorageDownloadView checks sidecar files exist before opening them."
+        storage = mock.Mock(spec=["exists", "open"])
+        storage.exists.return_value = False
+        request = django.test.RequestFactory().get("/dummy-url")
+        view = setup_view(
+            views.StorageDownloadView(
+                storage=storage,
+                path="hello.txt",
+                digest_sidecar_suffix=".sha256",
+                sidecar_cache=TimedLRUCache(),
+            ),
+            request,
+        )
+        file_instance = mock.Mock(spec=["name"], etag='"abc"')
+        file_instance.name = "hello.txt"
+        self.assertIsNone(view.get_sidecar_digest(file_instance))
+        storage.exists.assert_called_once_with("hello.txt.sha256")
+        self.assertFalse(storage.open.called)
+
+    def test_checksum_index(self):
+        "Checksum index is filled the first time file is streamed."
+        index = ChecksumIndex()
+        index.cache.clear()
+        response = self.get_view(checksum_index=index).render_to_response()
+        self.assertNotIn("Repr-Digest", response)
+        self.assertIsNone(response.file_to_stream)
+        self.assertEqual(b"".join(response.streaming_content), b"Hello world!")
+        response.file.close()
+        self.assertEqual(index.get(PathFile(self.path)), self.sha256)
+        response = self.get_view(checksum_index=index).render_to_response()
+        self.assertEqual(
+            response["Digest"], "sha-256=wFNeS+K3n/2TKRMFQ2v4iTFOSj+uwF7P/Lt98xrZ5Ro="
+        )
+        self.assertIs(response.file_to_stream, response.file)
+        response.file.close()
+
+    def test_checksum_index_modified_file(self):
+        "Checksum index entries are keyed by size and modification time."
+        index = ChecksumIndex()
+        file_instance = PathFile(self.path)
+        index.set(file_instance, self.sha256)
+        os.utime(self.path, (0, 0))
+        self.assertIsNone(index.get(PathFile(self.path)))
+
+
+class StorageDownloadViewLazyOpenTestCase(unittest.TestCase):
+    """Tests around lazy opening of files in :class:`StorageDownloadView`."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = FileSystemStorage(location=directory.name)
+        self.storage.save("hello.txt", ContentFile(b"Hello world!"))
+
+    def render(self, **headers):
+        request = django.test.RequestFactory().get("/dummy-url", **headers)
+        view = setup_view(
+            views.StorageDownloadView(storage=self.storage, path="hello.txt"),
+            request,
+        )
+        with mock.patch.object(
+            self.storage, "open", wraps=self.storage.open
+        ) as storage_open:
+            response = view.render_to_response()
+            if response.status_code == 200:
+                response.file.close()
+        return response, storage_open
+
+    def test_download(self):
+        "Files are not opened until content is iterated over."
+        response, storage_open = self.render()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertFalse(storage_open.called)
+
+    def test_open_file_cache(self):
+        "Files of FileSystemStorage are read via :attr:`open_file_cache`."
+        open_file_cache = OpenFileCache()
+        self.addCleanup(open_file_cache.clear)
+        request = django.test.RequestFactory().get("/dummy-url")
+        view = setup_view(
+            views.StorageDownloadView(
+                storage=self.storage,
+                path="hello.txt",
+                open_file_cache=open_file_cache,
+            ),
+            request,
+        )
+        response = view.render_to_response()
+        self.assertEqual(b"".join(response.streaming_content), b"Hello world!")
+        response.file.close()
+        self.assertEqual(len(open_file_cache), 1)
+
+    def test_not_modified(self):
+        "Files are not opened for 304 responses."
+        etag = self.render()[0]["ETag"]
+        response, storage_open = self.render(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(storage_open.called)
+
+
+class DownloadMixinContentCacheTestCase(unittest.TestCase):
+    """Tests around :attr:`DownloadMixin.content_cache`."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = FileSystemStorage(location=directory.name)
+        self.storage.save("hello.txt", ContentFile(b"Hello world!"))
+        self.content_cache = ContentCache(max_file_size=64)
+
+    def get_view(self, request=None, **kwargs):
+        if request is None:
+            request = django.test.RequestFactory().get("/dummy-url")
+        view = views.StorageDownloadView(
+            storage=self.storage,
+            path="hello.txt",
+            content_cache=self.content_cache,
+            **kwargs,
+        )
+        return setup_view(view, request)
+
+    def test_hit(self):
+        "Cached content is served without opening the file."
+        response = self.get_view().render_to_response()
+        self.assertEqual(b"".join(response.streaming_content), b"Hello world!")
+        response.file.close()
+        with mock.patch.object(self.storage, "open") as storage_open:
+            response = self.get_view().render_to_response()
+            self.assertEqual(list(response.streaming_content), [b"Hello world!"])
+        self.assertFalse(storage_open.called)
+        self.assertEqual(response["Content-Length"], "12")
+
+    def test_modified_file(self):
+        "Entries of modified files are not served."
+        response = self.get_view().render_to_response()
+        b"".join(response.streaming_content)
+        response.file.close()
+        self.storage.delete("hello.txt")
+        self.storage.save("hello.txt", ContentFile(b"Hello!"))
+        response = self.get_view().render_to_response()
+        self.assertEqual(b"".join(response.streaming_content), b"Hello!")
+        response.file.close()
+
+    def test_big_file(self):
+        "Files bigger than ``max_file_size`` are not cached."
+        self.content_cache.max_file_size = 5
+        response = self.get_view().render_to_response()
+        self.assertIs(response.file_to_stream, response.file)
+        b"".join(response.streaming_content)
+        response.file.close()
+        self.assertEqual(self.content_cache.size, 0)
+
+    def test_range(self):
+        "Byte ranges of cached files are served from cache."
+        response = self.get_view().render_to_response()
+        b"".join(response.streaming_content)
+        response.file.close()
+        request = django.test.RequestFactory().get("/dummy-url", HTTP_RANGE="bytes=6-")
+        with mock.patch.object(self.storage, "open") as storage_open:
+            response = self.get_view(request).render_to_response()
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(b"".join(response.streaming_content), b"world!")
+        self.assertFalse(storage_open.called)